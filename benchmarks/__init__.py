@@ -0,0 +1,3 @@
+'''
+Benchmarks for the pyLYNX hot paths, run with "python -m benchmarks".
+'''
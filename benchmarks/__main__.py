@@ -0,0 +1,80 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from . import codecs, parsers, transport
+
+SUITES = ("codecs", "parsers", "transport")
+
+
+def _revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _compare(results, baseline_path: str) -> None:
+    with open(baseline_path) as baseline_file:
+        baseline = {result['name']: result for result in json.load(baseline_file)['results']}
+    print("\ncompared to %s:" % baseline_path)
+    for result in results:
+        before = baseline.get(result['name'])
+        if before and before.get('ops_per_sec') and 'ops_per_sec' in result:
+            print("%-45s %+.1f %% ops/s" % (result['name'], (result['ops_per_sec'] / before['ops_per_sec'] - 1) * 100))
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the pyLYNX hot paths")
+    arguments.add_argument("suites", nargs="*", metavar="suite", help="suites to run: %s, default all" % ", ".join(SUITES))
+    arguments.add_argument("--output", "-o", help="write the results as JSON to this file")
+    arguments.add_argument("--compare", "-c", help="JSON results of an earlier run to compare against")
+    arguments.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke test")
+    arguments.add_argument("--transport", choices=("queue", "shared_memory"), default="queue", help="pyLYNX transport")
+    arguments.add_argument("--address", default="127.0.0.1:50151", help="address of the pyLYNX instance")
+    options = arguments.parse_args()
+    for suite in options.suites:
+        if suite not in SUITES:
+            arguments.error("unknown suite: " + suite)
+    suites = options.suites or SUITES
+
+    repeat = 2 if options.quick else 5
+    results = []
+    if "codecs" in suites:
+        results += codecs.run(number=2000 if options.quick else 100000, repeat=repeat)
+    if "parsers" in suites:
+        results += parsers.run(elements=10 if options.quick else 100, repeat=repeat)
+    if "transport" in suites:
+        results += transport.run(
+            options.address,
+            options.transport,
+            messages=500 if options.quick else 10000,
+            round_trips=50 if options.quick else 1000
+        )
+
+    for result in results:
+        values = ", ".join("%s=%.6g" % (key, value) for key, value in result.items() if key != 'name')
+        print("%-45s %s" % (result['name'], values))
+
+    if options.compare:
+        _compare(results, options.compare)
+
+    if options.output:
+        report = {
+            'revision': _revision(),
+            'timestamp': time.time(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'results': results,
+        }
+        with open(options.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
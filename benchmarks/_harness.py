@@ -0,0 +1,31 @@
+import time
+
+from typing import Any, Callable, Dict, List
+
+
+def measure(name: str, function: Callable[[], Any], number: int, repeat: int = 5) -> Dict[str, Any]:
+    '''
+    Time a function and report the best of several rounds, like timeit.
+
+    @param name name of the benchmark
+    @param function the function to call, without arguments
+    @param number calls per round
+    @param repeat number of rounds
+
+    @returns dict with the name, operations per round and the best and median time per operation in nanoseconds
+    '''
+    rounds: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        rounds.append(time.perf_counter() - start)
+    rounds.sort()
+    best = rounds[0] / number
+    return {
+        'name': name,
+        'ops': number,
+        'best_ns': best * 1e9,
+        'median_ns': rounds[len(rounds) // 2] / number * 1e9,
+        'ops_per_sec': 1 / best if best else 0.0,
+    }
@@ -0,0 +1,129 @@
+from typing import Any, Callable, Dict, List
+from pyLYNX.messages._generic import EulynxGenericHandle
+from pyLYNX.messages.point import EulynxPoint, EulynxPointHandle, PointPosition
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalHandle, EulynxSignalLuminosity
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    EulynxTrainDetectionHandle,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionFCFailedReason,
+    TrainDetectionFCMode,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPassingDirection,
+    TrainDetectionPassingState,
+    TrainDetectionPOMState,
+    TrainDetectionRejectionReason,
+)
+from ._harness import measure
+
+try:
+    from pyLYNX.messages import batch
+except ImportError:
+    # the batch encoders need the optional numpy dependency, their cases are skipped without it
+    batch = None
+
+SENDER = "INTERLOCKING"
+RECEIVER = "99N1"
+
+# every encoder classmethod with representative arguments
+ENCODERS = {
+    'generic.pdi_version_check': (EulynxSignal.pdi_version_check, ()),
+    'generic.initialization_request': (EulynxSignal.initialization_request, ()),
+    'signal.indicate_signal_aspect': (EulynxSignal.indicate_signal_aspect, (EulynxSignalAspect.proceed_clear,)),
+    'signal.set_luminosity': (EulynxSignal.set_luminosity, (EulynxSignalLuminosity.night,)),
+    'point.move_point': (EulynxPoint.move_point, (PointPosition.left,)),
+    'traindetection.fc': (EulynxTrainDetection.fc, (TrainDetectionFCMode.FCP,)),
+    'traindetection.update_filling_level': (EulynxTrainDetection.update_filling_level, ()),
+    'traindetection.cancel': (EulynxTrainDetection.cancel, ()),
+    'traindetection.drfc': (EulynxTrainDetection.drfc, ()),
+    'traindetection.occupancy_status': (EulynxTrainDetection.occupancy_status, (
+        TrainDetectionOccupancyState.OCCUPIED,
+        TrainDetectionForceClearAbility.ABLE,
+        3,
+        TrainDetectionPOMState.OK,
+        TrainDetectionDisturbanceState.NA,
+        TrainDetectionChangeTrigger.PASSING_DETECTED,
+    )),
+    'traindetection.command_rejected': (EulynxTrainDetection.command_rejected, (TrainDetectionRejectionReason.OPERATIONAL,)),
+    'traindetection.fcp_failed': (EulynxTrainDetection.fcp_failed, (TrainDetectionFCFailedReason.TIMEOUT,)),
+    'traindetection.fcpa_failed': (EulynxTrainDetection.fcpa_failed, (TrainDetectionFCFailedReason.TIMEOUT,)),
+    'traindetection.additional_information': (EulynxTrainDetection.additional_information, (bytes.fromhex('0120'), bytes.fromhex('0850'))),
+    'traindetection.tdp_status': (EulynxTrainDetection.tdp_status, (TrainDetectionPassingState.PASSED, TrainDetectionPassingDirection.REFERENCE)),
+}
+
+
+# handles bound to SENDER and RECEIVER, keyed like ENCODERS, with the same arguments
+_HANDLES = {
+    'generic': EulynxGenericHandle(SENDER, RECEIVER, EulynxSignal.protocol_type),
+    'signal': EulynxSignalHandle(SENDER, RECEIVER),
+    'point': EulynxPointHandle(SENDER, RECEIVER),
+    'traindetection': EulynxTrainDetectionHandle(SENDER, RECEIVER),
+}
+
+# number of telegrams the batch encoders and the per-call loops they are compared with encode per operation
+BATCH_SIZE = 1000
+
+
+def _handle_method(name: str) -> Callable[..., bytes]:
+    subsystem, message = name.split('.')
+    return getattr(_HANDLES[subsystem], message)
+
+
+def _per_call(encoder: Callable[..., bytes], receivers: List[str], arguments: tuple) -> Callable[[], List[bytes]]:
+    def run():
+        return [encoder(SENDER, receiver, *arguments) for receiver in receivers]
+    return run
+
+
+def _batch_cases(receivers: List[str]) -> List[tuple]:
+    # name, batch encoder call and the per-call classmethod loop producing the same telegrams
+    occupancy = ENCODERS['traindetection.occupancy_status'][1]
+    aspect = ENCODERS['signal.indicate_signal_aspect'][1]
+    position = ENCODERS['point.move_point'][1]
+    return [
+        ('occupancy_status', lambda: batch.occupancy_status_batch(SENDER, receivers, *occupancy),
+         _per_call(EulynxTrainDetection.occupancy_status, receivers, occupancy)),
+        ('indicate_signal_aspect', lambda: batch.indicate_signal_aspect_batch(SENDER, receivers, *aspect),
+         _per_call(EulynxSignal.indicate_signal_aspect, receivers, aspect)),
+        ('move_point', lambda: batch.move_point_batch(SENDER, receivers, *position),
+         _per_call(EulynxPoint.move_point, receivers, position)),
+    ]
+
+
+def _per_telegram(result: Dict[str, Any], telegrams: int) -> Dict[str, Any]:
+    for key in ('best_ns', 'median_ns'):
+        result[key] /= telegrams
+    result['ops_per_sec'] *= telegrams
+    result['ops'] *= telegrams
+    return result
+
+
+def run(number: int = 100000, repeat: int = 5) -> List[Dict[str, Any]]:
+    '''
+    Benchmark every encoder classmethod and the same command through a pre-bound handle, and the
+    batch encoders against a loop of per-call encoders producing the same telegrams.
+
+    @param number calls per round
+    @param repeat number of rounds
+
+    @returns list of results, one operation of the batch cases is one telegram
+    '''
+    results = []
+    for name, (encoder, arguments) in ENCODERS.items():
+        result = measure('encode.' + name, lambda: encoder(SENDER, RECEIVER, *arguments), number, repeat)
+        result['bytes'] = len(encoder(SENDER, RECEIVER, *arguments))
+        results.append(result)
+
+        method = _handle_method(name)
+        results.append(measure('handle.' + name, lambda: method(*arguments), number, repeat))
+
+    if batch is None:
+        return results
+    receivers = ["TDS%d" % index for index in range(BATCH_SIZE)]
+    rounds = max(1, number // BATCH_SIZE)
+    for name, encode_batch, encode_per_call in _batch_cases(receivers):
+        results.append(_per_telegram(measure('batch.' + name, encode_batch, rounds, repeat), BATCH_SIZE))
+        results.append(_per_telegram(measure('per_call.' + name, encode_per_call, rounds, repeat), BATCH_SIZE))
+    return results
@@ -0,0 +1,123 @@
+import random
+
+from typing import Any, Dict, List
+from pyLYNX._dispatch import _ParserRegistry
+from pyLYNX.messages.point import EulynxPoint, EulynxPointParser, PointPosition
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalParser
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    EulynxTrainDetectionParser,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPassingDirection,
+    TrainDetectionPassingState,
+    TrainDetectionPOMState,
+)
+from ._harness import measure
+
+
+def _ignore(*args) -> None:
+    pass
+
+
+def signal_messages(elements: int) -> List[bytes]:
+    aspects = (EulynxSignalAspect.stop_danger, EulynxSignalAspect.proceed_clear, EulynxSignalAspect.approach_caution)
+    return [
+        EulynxSignal.indicate_signal_aspect("INTERLOCKING", "S%d" % element, aspect)
+        for element in range(elements) for aspect in aspects
+    ]
+
+
+def point_messages(elements: int) -> List[bytes]:
+    return [
+        EulynxPoint.move_point("INTERLOCKING", "W%d" % element, position)
+        for element in range(elements) for position in (PointPosition.left, PointPosition.right)
+    ]
+
+
+def traindetection_messages(elements: int) -> List[bytes]:
+    # mostly occupancy reports, as sent by the sections while trains pass
+    messages = []
+    for element in range(elements):
+        section = "TDS%d" % element
+        for state in (TrainDetectionOccupancyState.OCCUPIED, TrainDetectionOccupancyState.VACANT):
+            messages.append(EulynxTrainDetection.occupancy_status(
+                section, "INTERLOCKING", state, TrainDetectionForceClearAbility.ABLE, -1,
+                TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+            ))
+        messages.append(EulynxTrainDetection.tdp_status(section, "INTERLOCKING", TrainDetectionPassingState.PASSED, TrainDetectionPassingDirection.REFERENCE))
+    return messages
+
+
+def mixed_messages(elements: int, seed: int = 0) -> List[bytes]:
+    '''
+    realistic inbound mix: occupancy and passing reports dominate, commands are rare
+
+    :param elements: number of elements per type
+    :param seed: seed of the shuffle
+
+    returns list of telegrams
+    '''
+    messages = 4 * traindetection_messages(elements) + signal_messages(elements) + point_messages(elements)
+    random.Random(seed).shuffle(messages)
+    return messages
+
+
+def _signal_parser() -> EulynxSignalParser:
+    parser = EulynxSignalParser()
+    parser.register_indicate_signal_aspect_callback(_ignore, ())
+    parser.register_set_luminosity_callback(_ignore, ())
+    return parser
+
+
+def _point_parser() -> EulynxPointParser:
+    parser = EulynxPointParser()
+    parser.register_move_point_callback(_ignore, ())
+    return parser
+
+
+def _traindetection_parser(views: bool = False) -> EulynxTrainDetectionParser:
+    parser = EulynxTrainDetectionParser(views)
+    parser.register_occupancy_status_callback(_ignore, ())
+    parser.register_tdp_status_callback(_ignore, ())
+    return parser
+
+
+def _parse_all(parse, messages: List[bytes]):
+    def run():
+        for message in messages:
+            parse(message)
+    return run
+
+
+def run(elements: int = 100, repeat: int = 5) -> List[Dict[str, Any]]:
+    '''
+    Benchmark every parser on its own message mix and the parser registry on the mixed traffic.
+
+    @param elements number of elements per type
+    @param repeat number of rounds
+
+    @returns list of results, one operation is one message
+    '''
+    cases = (
+        ('parse.signal', _signal_parser().parse_message, signal_messages(elements)),
+        ('parse.point', _point_parser().parse_message, point_messages(elements)),
+        ('parse.traindetection', _traindetection_parser().parse_message, traindetection_messages(elements)),
+        ('parse.traindetection.views', _traindetection_parser(True).parse_message, traindetection_messages(elements)),
+    )
+    registry = _ParserRegistry()
+    for parser in (_signal_parser(), _point_parser(), _traindetection_parser()):
+        registry.register_parser(parser)
+    cases += (('dispatch.mixed', registry._dispatch, mixed_messages(elements)),)
+
+    results = []
+    for name, parse, messages in cases:
+        result = measure(name, _parse_all(parse, messages), 20, repeat)
+        for key in ('best_ns', 'median_ns'):
+            result[key] /= len(messages)
+        result['ops_per_sec'] *= len(messages)
+        result['ops'] *= len(messages)
+        results.append(result)
+    return results
@@ -0,0 +1,82 @@
+import time
+
+from typing import Any, Dict, List
+from pyLYNX.loopback import LoopbackBridge
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalParser
+from pyLYNX.pyLYNX import pyLYNX
+
+
+def _percentile(latencies: List[float], percentile: float) -> float:
+    return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+
+
+def run(
+    address: str = "127.0.0.1:50151",
+    transport: str = "queue",
+    messages: int = 10000,
+    round_trips: int = 1000
+) -> List[Dict[str, Any]]:
+    '''
+    Benchmark a real pyLYNX instance against the loopback bridge on localhost, which only echoes.
+
+    @param address address pyLYNX listens on
+    @param transport pyLYNX transport between the main process and the grpc process
+    @param messages number of telegrams for the throughput run
+    @param round_trips number of sequential round trips for the latency run
+
+    @returns list of results
+    '''
+    received = []
+    parser = EulynxSignalParser()
+    parser.register_indicate_signal_aspect_callback(lambda *args: received.append(time.perf_counter()), ())
+    message = EulynxSignal.indicate_signal_aspect("INTERLOCKING", "99N1", EulynxSignalAspect.proceed_clear)
+
+    with pyLYNX(address, transport=transport) as srv:
+        srv.register_parser(parser)
+        srv.wait_until_serving()
+        # without a rate the bridge only answers, every telegram comes back with sender and receiver swapped
+        bridge = LoopbackBridge(address, rate=0)
+        bridge.start()
+        try:
+            srv.wait_until_connected()
+            # warm up the round trip
+            srv.send_message(message)
+            while not received:
+                srv.wait_for_messages(1)
+
+            received.clear()
+            start = time.perf_counter()
+            for _ in range(messages):
+                srv.send_message(message)
+            while len(received) < messages:
+                srv.wait_for_messages(1)
+            elapsed = time.perf_counter() - start
+
+            latencies = []
+            for _ in range(round_trips):
+                received.clear()
+                sent = time.perf_counter()
+                srv.send_message(message)
+                while not received:
+                    srv.wait_for_messages(1)
+                latencies.append(received[0] - sent)
+            latencies.sort()
+        finally:
+            bridge.stop()
+
+    return [
+        {
+            'name': 'transport.%s.throughput' % transport,
+            'ops': messages,
+            'seconds': elapsed,
+            'ops_per_sec': messages / elapsed,
+        },
+        {
+            'name': 'transport.%s.round_trip' % transport,
+            'ops': round_trips,
+            'mean_us': sum(latencies) / len(latencies) * 1e6,
+            'p50_us': _percentile(latencies, 50) * 1e6,
+            'p99_us': _percentile(latencies, 99) * 1e6,
+            'max_us': latencies[-1] * 1e6,
+        },
+    ]
@@ -27,6 +27,7 @@ def print_usage():
 Possible options for MODE argument:
     server      Run as grpc server
     client      Run as grpc client
+    connect     Connect to a bridge that runs a grpc server, reconnecting if the connection fails
     """)
 
 def grpc_streamer(message, channel):
@@ -47,7 +48,7 @@ def server():
     logging.basicConfig(level="DEBUG")
     with pyLYNX("0.0.0.0:50051") as srv1:
         srv1.register_default_parser(DefaultParser())
-        time.sleep(5)
+        srv1.wait_until_connected()
         logging.info("Sending Init Messages")
         srv1.send_message(EulynxSignal.pdi_version_check("INTERLOCKING", "99N1"))
         srv1.send_message(EulynxSignal.initialization_request("INTERLOCKING", "99N1"))
@@ -63,6 +64,20 @@ def server():
 
             time.sleep(5)
 
+def connect():
+    logging.basicConfig(level="INFO")
+    with pyLYNX(bridges=["localhost:50051"], keepalive=10.0, reconnect_backoff=(0.1, 10.0)) as srv1:
+        srv1.register_default_parser(DefaultParser())
+        srv1.start_dispatcher()
+        srv1.wait_until_connected()
+        srv1.send_message(EulynxSignal.pdi_version_check("INTERLOCKING", "99N1"))
+        srv1.send_message(EulynxSignal.initialization_request("INTERLOCKING", "99N1"))
+
+        # refreshed every 5 seconds, sent once the stream is up again if the bridge is unreachable
+        scheduler = srv1.start_scheduler()
+        scheduler.register("99N1", EulynxSignal.indicate_signal_aspect("INTERLOCKING", "99N1", EulynxSignalAspect().proceed_clear), period=5.0)
+        time.sleep(500)
+
 if __name__ == '__main__':
     if len(sys.argv) != 2:
         print_usage()
@@ -70,5 +85,7 @@ if __name__ == '__main__':
         server()
     elif sys.argv[1] == "client":
         grpc_client()
+    elif sys.argv[1] == "connect":
+        connect()
     else:
         print_usage()
\ No newline at end of file
@@ -0,0 +1,101 @@
+from typing import Callable, Dict, List
+from .messages._generic import HEADER_LENGTH, EulynxGenericParser
+
+
+class _ParserRegistry:
+    '''
+    Registry of message parsers with a dispatch table keyed by protocol type + message type.
+    Every entry lists the handlers of its key and the parsers without declared handlers in
+    registration order, so the first registered parser that parses a message wins, as when
+    every parser was offered every message.
+    '''
+    def __init__(self):
+        self.parsers: List[EulynxGenericParser] = []
+        self.default_parser: EulynxGenericParser = None
+        # parse_message of the parsers without declared handlers, offered every message
+        self._fallback_handlers: List[Callable[[bytes], bool]] = []
+        self._dispatch_table: Dict[bytes, List[Callable[[bytes], bool]]] = {}
+        self.state_stores = []
+
+    def register_parser(self, parser: EulynxGenericParser) -> None:
+        '''
+        Register a message parser that is called when calling the "parse_message" method.
+        Messages are routed to the handlers the parser declares in "message_handlers",
+        parsers without declared handlers are offered every message. Parsers are tried in
+        the order they were registered until one parses the message.
+
+        @parser the parser to register
+
+        @returns None
+        '''
+        self.parsers.append(parser)
+        handlers = parser.message_handlers()
+        if not handlers:
+            self._fallback_handlers.append(parser.parse_message)
+            for entry in self._dispatch_table.values():
+                entry.append(parser.parse_message)
+            return
+
+        for key, handler in handlers.items():
+            # the parsers without handlers registered so far come first
+            self._dispatch_table.setdefault(key, list(self._fallback_handlers)).append(handler)
+
+    def register_default_parser(self, parser: EulynxGenericParser) -> None:
+        '''
+        Register a default parser that will be called in the "parse_message" method
+        if no other parser could be found. An existing default parser will be overwritten.
+
+        @parser the default parser to register
+
+        @returns None
+        '''
+        self.default_parser = parser
+
+    def register_state_store(self, store) -> None:
+        '''
+        Register a state store, e.g. pyLYNX.state.ElementStateStore, that is updated with
+        every received message before the parsers are called.
+
+        @store the state store to register
+
+        @returns None
+        '''
+        self.state_stores.append(store)
+
+    def inject_message(self, message: bytes) -> bool:
+        '''
+        Pass a message to the state stores and parsers as if it had been received, e.g. to replay a capture.
+
+        @param message EULYNX message as byte array
+
+        @returns True if a parser parsed the message, otherwise False
+        '''
+        return self._dispatch(message)
+
+    def _parser_registry(self) -> '_ParserRegistry':
+        # the parsers without the state stores, e.g. for a parse worker process
+        registry = _ParserRegistry()
+        registry.parsers = list(self.parsers)
+        registry.default_parser = self.default_parser
+        registry._fallback_handlers = list(self._fallback_handlers)
+        registry._dispatch_table = {key: list(handlers) for key, handlers in self._dispatch_table.items()}
+        return registry
+
+    def _dispatch(self, message: bytes) -> bool:
+        for store in self.state_stores:
+            store.update(message)
+
+        handlers = self._fallback_handlers
+        if len(message) >= HEADER_LENGTH:
+            handlers = self._dispatch_table.get(message[:3], handlers)
+
+        found_parser = False
+        for handler in handlers:
+            if handler(message):
+                found_parser = True
+                break
+
+        if not found_parser and self.default_parser:
+            self.default_parser.parse_message(message)
+
+        return found_parser
@@ -0,0 +1,124 @@
+import logging
+import queue
+import threading
+import time
+
+from typing import Any, Callable, Dict, List
+from ._queues import BoundedQueue
+from .metrics import LatencyStats
+
+# offset of the identifier field a message is sharded by
+SHARD_KEYS = {"sender": 3, "receiver": 23}
+# "raise" is not offered, a full shard must not stop the thread that parses the inbound queue
+SHARD_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class _Shard:
+    def __init__(self, capacity: int, policy: str):
+        self.queue = BoundedQueue(queue.Queue(capacity), capacity, policy)
+        self.thread: threading.Thread = None
+        # time messages waited in the shard queue and time spent in the callbacks
+        self.wait = LatencyStats()
+        self.callback = LatencyStats()
+        self.errors = 0
+
+
+class _ShardedExecutor:
+    '''
+    Runs the parsers and callbacks of received messages on a pool of threads. Every message is
+    assigned to a shard by its sender or receiver identifier, each shard has its own bounded
+    queue and thread. Messages of one element are thus processed strictly in order, while
+    messages of different elements are processed concurrently.
+    '''
+    def __init__(self, process: Callable[[bytes], Any], workers: int = 4, key: str = "sender", capacity: int = 1024, policy: str = "block"):
+        '''
+        @param process function that is called with every message on the thread of its shard
+        @param workers number of shards and threads
+        @param key the identifier messages are sharded by, "sender" or "receiver"
+        @param capacity maximum number of queued messages per shard, 0 for unbounded
+        @param policy what happens to a message if its shard is full: "block", "drop_oldest" or "drop_newest"
+
+        @returns _ShardedExecutor-Object
+        '''
+        if workers < 1:
+            raise ValueError("at least one worker is required")
+        if key not in SHARD_KEYS:
+            raise ValueError("unknown shard key: " + key)
+        if policy not in SHARD_POLICIES:
+            raise ValueError("unsupported shard policy: " + policy)
+        self.process = process
+        self.key = key
+        self._offset = SHARD_KEYS[key]
+        self._shards = [_Shard(capacity, policy) for _ in range(workers)]
+
+    def start(self) -> None:
+        for index, shard in enumerate(self._shards):
+            shard.thread = threading.Thread(target=self._work, args=(shard,), name="pyLYNX-shard-%d" % index, daemon=True)
+            shard.thread.start()
+
+    def submit(self, message: bytes) -> None:
+        offset = self._offset
+        shard = self._shards[hash(message[offset:offset + 20]) % len(self._shards)]
+        shard.queue.put((message, time.monotonic()))
+
+    def stop(self) -> None:
+        '''
+        Process the queued messages and stop the threads.
+
+        @returns None
+        '''
+        for shard in self._shards:
+            # bypass the policy, the stop marker must not be dropped
+            shard.queue.put_marker(None)
+        for shard in self._shards:
+            shard.thread.join()
+
+    def join(self) -> None:
+        '''
+        Block until all submitted messages are processed.
+
+        @returns None
+        '''
+        for shard in self._shards:
+            shard.queue.join()
+
+    def _work(self, shard: _Shard) -> None:
+        get = shard.queue.get
+        while True:
+            item = get()
+            if item is None:
+                shard.queue.task_done()
+                return
+            message, submitted = item
+            started = time.monotonic()
+            try:
+                self.process(message)
+            except Exception:
+                # a failing callback must not stall the other elements of the shard
+                shard.errors += 1
+                logging.exception("Callback failed for message type " + message[:3].hex())
+            shard.wait.record(started - submitted)
+            shard.callback.record(time.monotonic() - started)
+            shard.queue.task_done()
+
+    def snapshot(self) -> List[Dict[str, float]]:
+        '''
+        Get the metrics of every shard.
+
+        @returns list with depth, high_water, drops and capacity of the shard queue, the number of
+                 processed messages and failed callbacks, and mean and max queue wait and callback time in seconds
+        '''
+        metrics = []
+        for shard in self._shards:
+            wait = shard.wait.snapshot()
+            callback = shard.callback.snapshot()
+            metrics.append(dict(
+                shard.queue.snapshot(),
+                processed=callback['count'],
+                errors=shard.errors,
+                wait_mean=wait['mean'],
+                wait_max=wait['max'],
+                callback_mean=callback['mean'],
+                callback_max=callback['max'],
+            ))
+        return metrics
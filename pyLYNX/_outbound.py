@@ -0,0 +1,146 @@
+import queue
+import threading
+
+from collections import deque
+from typing import Callable, Deque, Dict, FrozenSet, List, Optional, Sequence, Tuple
+from .messages.point import EulynxPoint, EulynxPointMessageType
+from .messages.signal import EulynxSignal, EulynxSignalMessageType
+
+# commands that only matter in their latest version, keyed by protocol type + message type
+SUPERSEDABLE_MESSAGES: FrozenSet[bytes] = frozenset((
+    EulynxSignal.protocol_type + EulynxSignalMessageType.indicate_signal_aspect,
+    EulynxSignal.protocol_type + EulynxSignalMessageType.set_luminosity,
+    EulynxPoint.protocol_type + EulynxPointMessageType.move_point,
+))
+
+
+# commands that must not wait behind bulk traffic, they go to lane 0 with priorities=True
+PRIORITY_MESSAGES: Dict[bytes, int] = {
+    EulynxSignal.protocol_type + EulynxSignalMessageType.indicate_signal_aspect: 0,
+    EulynxPoint.protocol_type + EulynxPointMessageType.move_point: 0,
+}
+
+
+class _CoalescingQueue:
+    '''
+    Queue of outbound (message, timestamp[, lane]) items with one FIFO per priority lane.
+    With several lanes the lane is the third element of the item. Lanes are served strictly
+    by priority, lane 0 first, or with weights by smooth weighted round robin between the
+    non-empty lanes. A supersedable message replaces a queued message with the same protocol
+    type, message type and receiver in place, or moves it to the end of its own lane if the
+    lanes differ. All other messages keep FIFO order in their lane.
+
+    None ends the stream: get returns it once all lanes are empty.
+    '''
+    def __init__(
+        self,
+        supersedable: FrozenSet[bytes] = frozenset(),
+        on_superseded: Callable[[], None] = None,
+        lanes: int = 1,
+        weights: Sequence[int] = None
+    ):
+        self.supersedable = supersedable
+        self.on_superseded = on_superseded
+        self.superseded = 0
+        self._lanes: List[Deque[list]] = [deque() for _ in range(lanes)]
+        self._weights = weights
+        self._credits = [0] * lanes
+        self._size = 0
+        self._ends = 0
+        self._pending = {}
+        self._condition = threading.Condition()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def lane_sizes(self) -> List[int]:
+        return [len(lane) for lane in self._lanes]
+
+    def put_nowait(self, item: Optional[Tuple[bytes, float]]) -> None:
+        if item is None:
+            with self._condition:
+                self._ends += 1
+                self._condition.notify()
+            return
+
+        key = None
+        if self.supersedable:
+            message = item[0]
+            if message[:3] in self.supersedable:
+                key = message[:3] + message[23:43]
+
+        with self._condition:
+            if key is not None:
+                slot = self._pending.get(key)
+                if slot is not None:
+                    lanes = self._lanes
+                    if len(lanes) > 1 and slot[0][2] != item[2]:
+                        # the update waits in its own lane, e.g. an urgent aspect must not stay behind bulk traffic
+                        lanes[slot[0][2]].remove(slot)
+                        lanes[item[2]].append(slot)
+                    slot[0] = item
+                    self.superseded += 1
+                    if self.on_superseded:
+                        self.on_superseded()
+                    return
+                slot = self._pending[key] = [item, key]
+            else:
+                slot = [item, None]
+            lanes = self._lanes
+            lanes[item[2] if len(lanes) > 1 else 0].append(slot)
+            self._size += 1
+            self._condition.notify()
+
+    def _next_lane(self) -> Deque[list]:
+        # must be called with the condition held and at least one item queued
+        lanes = self._lanes
+        if self._weights is None:
+            for lane in lanes:
+                if lane:
+                    return lane
+        credits = self._credits
+        weights = self._weights
+        best = -1
+        total = 0
+        for index, lane in enumerate(lanes):
+            if lane:
+                credits[index] += weights[index]
+                total += weights[index]
+                if best < 0 or credits[index] > credits[best]:
+                    best = index
+        credits[best] -= total
+        return lanes[best]
+
+    def get(self, block: bool = True, timeout: float = None) -> Optional[Tuple[bytes, float]]:
+        with self._condition:
+            if block and not self._condition.wait_for(lambda: self._size or self._ends, timeout):
+                raise queue.Empty
+            if not self._size:
+                if not self._ends:
+                    raise queue.Empty
+                self._ends -= 1
+                return None
+            item, key = self._next_lane().popleft()
+            self._size -= 1
+            if key is not None:
+                del self._pending[key]
+            return item
+
+    def get_nowait(self) -> Optional[Tuple[bytes, float]]:
+        return self.get(False)
+
+    def drop_oldest(self) -> bool:
+        '''
+        Discard the oldest message of the lowest priority lane that holds one.
+
+        returns True if a message was discarded, False if no message is queued
+        '''
+        with self._condition:
+            for lane in reversed(self._lanes):
+                if lane:
+                    _, key = lane.popleft()
+                    self._size -= 1
+                    if key is not None:
+                        del self._pending[key]
+                    return True
+            return False
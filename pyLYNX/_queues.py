@@ -0,0 +1,166 @@
+import multiprocessing
+import multiprocessing.queues
+import queue
+
+from typing import Any, Dict
+
+QUEUE_POLICIES = ("block", "drop_oldest", "drop_newest", "raise")
+
+_HIGH_WATER = 0
+_DROPS = 1
+_DEPTH = 2
+
+
+class BoundedQueue:
+    '''
+    Wrapper around a multiprocessing.JoinableQueue or SharedRingQueue that applies a policy
+    when the queue is full and keeps depth, high-water mark and drop counters that both
+    processes can read without locking. A queue.Queue of a single process keeps its counters
+    in plain ints under the mutex of the queue instead.
+
+    Policies:
+        block        wait until there is space, raise queue.Full after the timeout
+        drop_oldest  discard the oldest queued item to make space
+        drop_newest  discard the item that should be put
+        raise        raise queue.Full immediately
+    '''
+    def __init__(self, wrapped, capacity: int = 0, policy: str = "block", timeout: float = None):
+        '''
+        @param wrapped the underlying queue
+        @param capacity maximum number of items the underlying queue holds, 0 for unbounded
+        @param policy behaviour if the queue is full, one of QUEUE_POLICIES
+        @param timeout maximum time to wait with the "block" policy, None waits forever
+
+        @returns BoundedQueue-Object
+        '''
+        if policy not in QUEUE_POLICIES:
+            raise ValueError("unknown queue policy: " + policy)
+        self.queue = wrapped
+        self.capacity = capacity
+        self.policy = policy
+        self.timeout = timeout
+        if isinstance(wrapped, queue.Queue):
+            self._counters = [0] * 3
+            self._lock = wrapped.mutex
+        else:
+            self._counters = multiprocessing.Array('q', 3)
+            self._lock = self._counters.get_lock()
+        # multiprocessing queues can not report their size on every platform (qsize raises
+        # NotImplementedError on macOS), their depth is counted in the shared counters instead
+        self._counted = isinstance(wrapped, multiprocessing.queues.Queue)
+
+    def put_nowait(self, item: Any) -> None:
+        self.put(item)
+
+    def put(self, item: Any) -> None:
+        if self.policy == "block":
+            try:
+                self.queue.put(item, True, self.timeout)
+            except queue.Full:
+                self._record_drop()
+                raise
+        elif self.policy == "drop_oldest":
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    pass
+                try:
+                    self.get_nowait()
+                    self.queue.task_done()
+                    self._record_drop()
+                except queue.Empty:
+                    pass
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self._record_drop()
+                if self.policy == "raise":
+                    raise
+                return
+        self._record_put()
+
+    def put_marker(self, item: Any) -> None:
+        '''
+        Put an item without applying the policy, e.g. a stop marker that must be queued behind
+        the other items and must not be dropped.
+
+        @param item the item to put
+
+        @returns None
+        '''
+        self.queue.put(item)
+        self._record_put()
+
+    def _record_put(self) -> None:
+        if self._counted:
+            with self._lock:
+                self._counters[_DEPTH] += 1
+                depth = self._counters[_DEPTH]
+        else:
+            depth = self.queue.qsize()
+        if depth > self._counters[_HIGH_WATER]:
+            with self._lock:
+                if depth > self._counters[_HIGH_WATER]:
+                    self._counters[_HIGH_WATER] = depth
+
+    def _record_get(self) -> None:
+        with self._lock:
+            self._counters[_DEPTH] -= 1
+
+    def _record_drop(self) -> None:
+        with self._lock:
+            self._counters[_DROPS] += 1
+
+    def get(self, block: bool = True, timeout: float = None) -> Any:
+        item = self.queue.get(block, timeout)
+        if self._counted:
+            self._record_get()
+        return item
+
+    def get_nowait(self) -> Any:
+        item = self.queue.get_nowait()
+        if self._counted:
+            self._record_get()
+        return item
+
+    def task_done(self) -> None:
+        self.queue.task_done()
+
+    def join(self) -> None:
+        self.queue.join()
+
+    def qsize(self) -> int:
+        if self._counted:
+            return self._counters[_DEPTH]
+        return self.queue.qsize()
+
+    def empty(self) -> bool:
+        return self.queue.empty()
+
+    def close(self) -> None:
+        if hasattr(self.queue, "close"):
+            self.queue.close()
+
+    @property
+    def high_water(self) -> int:
+        return self._counters[_HIGH_WATER]
+
+    @property
+    def drops(self) -> int:
+        return self._counters[_DROPS]
+
+    def snapshot(self) -> Dict[str, int]:
+        '''
+        get the current queue metrics
+
+        returns dict with depth, high_water, drops and capacity (0 for unbounded)
+        '''
+        return {
+            'depth': self.qsize(),
+            'high_water': self._counters[_HIGH_WATER],
+            'drops': self._counters[_DROPS],
+            'capacity': self.capacity,
+        }
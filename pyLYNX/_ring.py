@@ -0,0 +1,171 @@
+import multiprocessing
+import queue
+import struct
+import threading
+import time
+
+from multiprocessing import shared_memory
+from typing import Tuple
+
+# indices of the 8 byte counters, one cache line apart: written by producer, consumer and task_done
+_TAIL = 0
+_HEAD = 8
+_DONE = 16
+_DATA_OFFSET = 192
+# slot header: message length, outbound lane and timestamp of the queue item
+_SLOT_HEADER = struct.Struct('<HB5xd')
+
+
+def _backoff(attempt: int) -> None:
+    if attempt < 64:
+        time.sleep(0)
+    else:
+        time.sleep(min(0.001, 0.00001 * (attempt - 63)))
+
+
+class SharedRingQueue:
+    '''
+    Single-producer / single-consumer ring of fixed size slots in shared memory, with the
+    subset of the multiprocessing.JoinableQueue interface that pyLYNX uses. Items are
+    (message, timestamp) tuples like on the multiprocessing queues.
+
+    Telegrams are copied straight into a slot and the consumer is signalled by advancing
+    a counter, so no pickling, feeder thread or pipe is involved. Threads of the same
+    process that put (or get) concurrently are serialized by a process local lock.
+    With shared_consumer the get side lock is shared between processes instead, so the
+    producer may discard the oldest item. With lanes the items are (message, timestamp, lane)
+    tuples, the outbound priority lane is kept in the slot header.
+    Blocking calls poll with a short backoff of at most one millisecond.
+    '''
+    def __init__(self, capacity: int = 65536, slot_size: int = 128, shared_consumer: bool = False, lanes: bool = False):
+        '''
+        @param capacity number of slots in the ring
+        @param slot_size size of a slot in bytes, the largest telegram is 16 bytes smaller
+        @param shared_consumer allow items to be taken from both processes
+        @param lanes the items carry a priority lane as third element
+
+        @returns SharedRingQueue-Object
+        '''
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.lanes = lanes
+        self._shm = shared_memory.SharedMemory(create=True, size=_DATA_OFFSET + capacity * slot_size)
+        self._owner = True
+        self._shared_consumer_lock = multiprocessing.Lock() if shared_consumer else None
+        self._attach()
+
+    def _attach(self) -> None:
+        self._buf = self._shm.buf
+        self._counters = self._buf[:_DATA_OFFSET].cast('Q')
+        self._producer_lock = threading.Lock()
+        self._consumer_lock = self._shared_consumer_lock or threading.Lock()
+        self._done_lock = self._shared_consumer_lock or threading.Lock()
+
+    def __getstate__(self):
+        return (self.capacity, self.slot_size, self.lanes, self._shm.name, self._shared_consumer_lock)
+
+    def __setstate__(self, state):
+        self.capacity, self.slot_size, self.lanes, name, self._shared_consumer_lock = state
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._owner = False
+        self._attach()
+
+    def qsize(self) -> int:
+        counters = self._counters
+        return counters[_TAIL] - counters[_HEAD]
+
+    def empty(self) -> bool:
+        return self.qsize() <= 0
+
+    def full(self) -> bool:
+        return self.qsize() >= self.capacity
+
+    def put_nowait(self, item: Tuple[bytes, float]) -> None:
+        self.put(item, False)
+
+    def put(self, item: Tuple[bytes, float], block: bool = True, timeout: float = None) -> None:
+        message = item[0]
+        lane = item[2] if self.lanes else 0
+        length = len(message)
+        if length > self.slot_size - _SLOT_HEADER.size:
+            raise ValueError("message of %d bytes exceeds the ring slot size" % length)
+
+        counters = self._counters
+        with self._producer_lock:
+            tail = counters[_TAIL]
+            deadline = None if timeout is None else time.monotonic() + timeout
+            attempt = 0
+            while tail - counters[_HEAD] >= self.capacity:
+                if not block or (deadline is not None and time.monotonic() >= deadline):
+                    raise queue.Full
+                _backoff(attempt)
+                attempt += 1
+
+            offset = _DATA_OFFSET + (tail % self.capacity) * self.slot_size
+            _SLOT_HEADER.pack_into(self._buf, offset, length, lane, item[1])
+            offset += _SLOT_HEADER.size
+            self._buf[offset:offset + length] = message
+            counters[_TAIL] = tail + 1
+
+    def get_nowait(self) -> Tuple[bytes, float]:
+        return self.get(False)
+
+    def get(self, block: bool = True, timeout: float = None) -> Tuple[bytes, float]:
+        counters = self._counters
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempt = 0
+        while True:
+            # the lock is only held to take an item, a shared consumer lock must not be held while waiting,
+            # the producer takes it to discard the oldest item
+            with self._consumer_lock:
+                head = counters[_HEAD]
+                if head < counters[_TAIL]:
+                    offset = _DATA_OFFSET + (head % self.capacity) * self.slot_size
+                    length, lane, timestamp = _SLOT_HEADER.unpack_from(self._buf, offset)
+                    offset += _SLOT_HEADER.size
+                    message = bytes(self._buf[offset:offset + length])
+                    counters[_HEAD] = head + 1
+                    if self.lanes:
+                        return message, timestamp, lane
+                    return message, timestamp
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                raise queue.Empty
+            _backoff(attempt)
+            attempt += 1
+
+    def task_done(self) -> None:
+        counters = self._counters
+        with self._done_lock:
+            if counters[_DONE] >= counters[_TAIL]:
+                raise ValueError('task_done() called too many times')
+            counters[_DONE] += 1
+
+    def join(self, timeout: float = None) -> bool:
+        '''
+        Block until every item put has been marked done.
+
+        @param timeout maximum time to wait in seconds, None waits forever
+
+        @returns True if all items are done, False if the timeout expired
+        '''
+        counters = self._counters
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempt = 0
+        while counters[_DONE] < counters[_TAIL]:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            _backoff(attempt)
+            attempt += 1
+        return True
+
+    def close(self) -> None:
+        '''
+        Release the shared memory segment. The creating process also removes it.
+
+        @returns None
+        '''
+        self._counters.release()
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
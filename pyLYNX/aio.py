@@ -0,0 +1,204 @@
+import asyncio
+import grpc
+import logging
+
+from grpc import aio
+from typing import AsyncIterator, Callable, Iterable, Set
+from ._dispatch import _ParserRegistry
+from .commands import _CommandTable
+from .proto.rasta_pb2 import SciPacket
+from .proto.rasta_pb2_grpc import RastaServicer, add_RastaServicer_to_server
+
+
+class _AsyncRastaElement(RastaServicer):
+    def __init__(
+        self,
+        message_queue: asyncio.Queue,
+        response_queue: asyncio.Queue,
+        commands: _CommandTable,
+        on_error: Callable[[BaseException], None]
+    ):
+        self.message_queue = message_queue
+        self.response_queue = response_queue
+        self.commands = commands
+        self.on_error = on_error
+        # the reader tasks of the open streams, awaited on close
+        self.readers: Set[asyncio.Future] = set()
+
+    async def message_reader(self, request_iterator, context, stream: asyncio.Task) -> None:
+        try:
+            async for request in request_iterator:
+                if self.commands._pending:
+                    self.commands.update(request.message)
+                self.response_queue.put_nowait(request.message)
+        except Exception as error:
+            # a bridge closing or cancelling its stream ends the iteration without an error
+            self.on_error(error)
+            # the stream can not receive anymore, end it with an error so the bridge opens a new one
+            try:
+                await context.abort(grpc.StatusCode.INTERNAL, "reading the stream failed: %s" % error)
+            except aio.AbortError:
+                pass
+            stream.cancel()
+
+    async def Stream(self, request_iterator, context):
+        reader = asyncio.ensure_future(self.message_reader(request_iterator, context, asyncio.current_task()))
+        self.readers.add(reader)
+        reader.add_done_callback(self.readers.discard)
+        try:
+            while True:
+                message = await self.message_queue.get()
+                try:
+                    yield SciPacket(message=message)
+                finally:
+                    # a stream cancelled while grpc holds the message counts it as sent, close must not wait for it
+                    self.message_queue.task_done()
+                logging.debug(message)
+        finally:
+            reader.cancel()
+
+
+class AsyncPyLYNX(_ParserRegistry):
+    '''
+    pyLYNX variant that runs the grpc server on grpc.aio in the event loop of the caller,
+    without a background process.
+    '''
+    def __init__(self, listen_addr: str):
+        '''
+        Constructor for AsyncPyLYNX class
+
+        @param listen_addr IP + Port where the underlying grpc server should listen
+
+        @returns AsyncPyLYNX-Object
+        '''
+        super().__init__()
+        self.listen_addr = listen_addr
+        self.message_queue: asyncio.Queue = None
+        self.response_queue: asyncio.Queue = None
+        self.server: aio.Server = None
+        # error of a failed stream reader, raised by "messages" and "parse_messages"
+        self.error: BaseException = None
+        self._commands = _CommandTable()
+        self._element: _AsyncRastaElement = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    async def open(self) -> None:
+        '''
+        Create and start the grpc server in the running event loop.
+
+        @returns None
+        '''
+        self.message_queue = asyncio.Queue()
+        self.response_queue = asyncio.Queue()
+        self.server = aio.server()
+        self._element = _AsyncRastaElement(self.message_queue, self.response_queue, self._commands, self._reader_failed)
+        add_RastaServicer_to_server(self._element, self.server)
+        self.server.add_insecure_port(self.listen_addr)
+        await self.server.start()
+        logging.info("Server running at " + self.listen_addr)
+
+    async def close(self, grace: float = None, timeout: float = None) -> None:
+        '''
+        Wait until all messages have been sent and stop the grpc server.
+
+        @param grace seconds to wait for active streams before they are cancelled
+        @param timeout maximum time in seconds to wait for the unsent messages, None waits until all messages are sent
+
+        @returns None
+        '''
+        logging.info("Waiting for Message Queue to get empty")
+        try:
+            await asyncio.wait_for(self.message_queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning("Message Queue is not empty after %s seconds, stopping anyway", timeout)
+        await self.server.stop(grace)
+        # the streams cancel their readers when they end, the readers report their errors through _reader_failed
+        await asyncio.gather(*self._element.readers, return_exceptions=True)
+
+    def _reader_failed(self, error: BaseException) -> None:
+        logging.error("Reading a bridge stream failed", exc_info=error)
+        self.error = error
+        # wakes a consumer waiting in "messages"
+        self.response_queue.put_nowait(error)
+
+    async def send_message(self, message: bytes) -> None:
+        '''
+        Send the given message
+
+        @param message Message to send, any bytes-like object
+
+        @returns None
+        '''
+        if not isinstance(message, bytes):
+            message = bytes(message)
+        await self.message_queue.put(message)
+
+    async def send_command(self, message: bytes, timeout: float = 5.0, responses: Iterable[bytes] = None) -> bytes:
+        '''
+        Send a command and wait for the response of the commanded element. Responses are matched
+        as they arrive, run several send_command calls concurrently (e.g. with asyncio.gather)
+        to pipeline commands.
+
+        @param message the command telegram
+        @param timeout seconds to wait for the response, None waits forever
+        @param responses protocol type + message type keys of the messages that answer the command,
+                         defaults to COMMAND_RESPONSES or any message of the same protocol type
+
+        @returns the response telegram, raises CommandRejected if the element rejected the command
+                 and asyncio.TimeoutError if no response arrived in time
+        '''
+        if not isinstance(message, bytes):
+            message = bytes(message)
+        future = asyncio.get_running_loop().create_future()
+        pending = self._commands.add(message, future, responses)
+        try:
+            await self.send_message(message)
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._commands.discard(pending)
+
+    async def messages(self) -> AsyncIterator[bytes]:
+        '''
+        Iterate over received messages as they arrive. Messages returned by this iterator
+        are not passed to the registered parsers.
+
+        @returns async iterator of messages, raises the error if reading a stream failed
+        '''
+        while True:
+            message = await self.response_queue.get()
+            self.response_queue.task_done()
+            if isinstance(message, BaseException):
+                raise message
+            yield message
+
+    def inject_message(self, message: bytes) -> bool:
+        '''
+        Pass a message to the pending commands, state stores and parsers as if it had been received,
+        e.g. to replay a capture.
+
+        @param message EULYNX message as byte array
+
+        @returns True if a parser parsed the message, otherwise False
+        '''
+        if self._commands._pending:
+            self._commands.update(message)
+        return self._dispatch(message)
+
+    def parse_messages(self) -> None:
+        '''
+        Parse all messages that have been received since the last call of this function.
+
+        @returns None, raises the error if reading a stream failed
+        '''
+        while not self.response_queue.empty():
+            request = self.response_queue.get_nowait()
+            self.response_queue.task_done()
+            if isinstance(request, BaseException):
+                raise request
+            self._dispatch(request)
@@ -0,0 +1,196 @@
+import asyncio
+import mmap
+import os
+import struct
+import time
+
+from typing import Any, Callable, Iterator, Tuple
+
+# file header: magic and format version
+_MAGIC = b'PYLYNXCAP'
+_VERSION = 1
+_FILE_HEADER = struct.Struct('<9sB')
+# record header: wall clock timestamp, direction and length of the telegram that follows
+_RECORD_HEADER = struct.Struct('<dBH')
+
+
+class CaptureDirection:
+    inbound = 0
+    outbound = 1
+
+
+class CaptureWriter:
+    '''
+    Append-only writer of a binary capture file. Every record is written with a single
+    write on a file opened in append mode, so records of several threads or processes
+    never interleave and nothing is lost if the process is killed.
+    '''
+    def __init__(self, path: str):
+        '''
+        @param path the capture file, it is created if it does not exist and appended to otherwise
+
+        @returns CaptureWriter-Object
+        '''
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size == 0:
+            os.write(self._fd, _FILE_HEADER.pack(_MAGIC, _VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def write(self, direction: int, message: bytes, timestamp: float = None) -> None:
+        '''
+        Append a telegram to the capture.
+
+        @param direction CaptureDirection.inbound or CaptureDirection.outbound
+        @param message the telegram
+        @param timestamp seconds since the epoch, defaults to now
+
+        @returns None
+        '''
+        if timestamp is None:
+            timestamp = time.time()
+        os.write(self._fd, _RECORD_HEADER.pack(timestamp, direction, len(message)) + message)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class CaptureReader:
+    '''
+    Reader of a capture file. The file is memory mapped, so captures of any size are read
+    record by record without loading them into memory. A record that was cut off at the end
+    of the file is ignored.
+    '''
+    def __init__(self, path: str):
+        '''
+        @param path the capture file
+
+        @returns CaptureReader-Object
+        '''
+        self.path = path
+        with open(path, 'rb') as capture:
+            size = os.fstat(capture.fileno()).st_size
+            if size < _FILE_HEADER.size:
+                raise ValueError("not a pyLYNX capture: " + path)
+            self._map = mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _FILE_HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError("not a pyLYNX capture: " + path)
+        if hasattr(self._map, 'madvise'):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def __iter__(self) -> Iterator[Tuple[float, int, bytes]]:
+        return self.records()
+
+    def records(self, direction: int = None) -> Iterator[Tuple[float, int, bytes]]:
+        '''
+        Iterate over the records of the capture.
+
+        @param direction only return records of this direction, None for both
+
+        @returns iterator of (timestamp, direction, message) tuples
+        '''
+        data = self._map
+        size = len(data)
+        offset = _FILE_HEADER.size
+        unpack_from = _RECORD_HEADER.unpack_from
+        header_size = _RECORD_HEADER.size
+        while offset + header_size <= size:
+            timestamp, record_direction, length = unpack_from(data, offset)
+            offset += header_size
+            if offset + length > size:
+                return
+            if direction is None or record_direction == direction:
+                yield timestamp, record_direction, data[offset:offset + length]
+            offset += length
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def _feed(target, direction: int) -> Callable[[bytes], Any]:
+    if direction == CaptureDirection.outbound:
+        return target.send_message
+    if hasattr(target, "inject_message"):
+        return target.inject_message
+    return target.parse_message
+
+
+def _timed_records(path: str, speed: float, direction: int) -> Iterator[Tuple[float, bytes]]:
+    # yields the time to wait before each telegram, computed when the next telegram is requested
+    with CaptureReader(path) as reader:
+        first = None
+        for timestamp, _, message in reader.records(direction):
+            delay = 0.0
+            if speed:
+                if first is None:
+                    first = timestamp
+                    start = time.monotonic()
+                delay = start + (timestamp - first) / speed - time.monotonic()
+            yield delay, message
+
+
+def replay(path: str, target, speed: float = 1.0, direction: int = CaptureDirection.inbound) -> int:
+    '''
+    Feed the telegrams of a capture into pyLYNX, keeping the original timing.
+    Inbound telegrams are passed to the parsers of the target with inject_message, the target
+    may be a pyLYNX instance, an AsyncPyLYNX instance or a single parser. Outbound telegrams are
+    sent again with the send_message method of the target, use replay_async for an AsyncPyLYNX.
+
+    @param path the capture file
+    @param target pyLYNX instance or parser
+    @param speed replay speed relative to the capture, e.g. 10 replays ten times faster,
+                 0 replays as fast as possible
+    @param direction which telegrams to replay, CaptureDirection.inbound or CaptureDirection.outbound
+
+    @returns number of replayed telegrams
+    '''
+    feed = _feed(target, direction)
+    if asyncio.iscoroutinefunction(feed):
+        raise TypeError("the target sends asynchronously, replay outbound telegrams with replay_async")
+    count = 0
+    for delay, message in _timed_records(path, speed, direction):
+        if delay > 0:
+            time.sleep(delay)
+        feed(message)
+        count += 1
+    return count
+
+
+async def replay_async(path: str, target, speed: float = 1.0, direction: int = CaptureDirection.inbound) -> int:
+    '''
+    Like replay, but waits in the running event loop and awaits send_message of an AsyncPyLYNX target.
+
+    @param path the capture file
+    @param target AsyncPyLYNX, pyLYNX instance or parser
+    @param speed replay speed relative to the capture, 0 replays as fast as possible
+    @param direction which telegrams to replay, CaptureDirection.inbound or CaptureDirection.outbound
+
+    @returns number of replayed telegrams
+    '''
+    feed = _feed(target, direction)
+    awaited = asyncio.iscoroutinefunction(feed)
+    count = 0
+    for delay, message in _timed_records(path, speed, direction):
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if awaited:
+            await feed(message)
+        else:
+            feed(message)
+        count += 1
+    return count
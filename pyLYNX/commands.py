@@ -0,0 +1,186 @@
+import heapq
+import itertools
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional
+from .messages._generic import HEADER_LENGTH
+from .messages.traindetection import EulynxTrainDetection, TrainDetectionMessageType
+
+# messages that fail a pending command of the same element, keyed by protocol type + message type
+REJECTION_MESSAGES: FrozenSet[bytes] = frozenset((
+    EulynxTrainDetection.protocol_type + TrainDetectionMessageType.command_rejected,
+    EulynxTrainDetection.protocol_type + TrainDetectionMessageType.fcp_failed,
+    EulynxTrainDetection.protocol_type + TrainDetectionMessageType.fcpa_failed,
+))
+
+_TRAIN_DETECTION_STATUS = frozenset((EulynxTrainDetection.protocol_type + TrainDetectionMessageType.occupancy_status,))
+
+# responses that complete a command, keyed by protocol type + message type of the command.
+# Commands without an entry are completed by any message of the same protocol type from the commanded element.
+COMMAND_RESPONSES: Dict[bytes, FrozenSet[bytes]] = {
+    EulynxTrainDetection.protocol_type + TrainDetectionMessageType.fc: _TRAIN_DETECTION_STATUS,
+    EulynxTrainDetection.protocol_type + TrainDetectionMessageType.update_filling_level: _TRAIN_DETECTION_STATUS,
+    EulynxTrainDetection.protocol_type + TrainDetectionMessageType.cancel: _TRAIN_DETECTION_STATUS,
+    EulynxTrainDetection.protocol_type + TrainDetectionMessageType.drfc: _TRAIN_DETECTION_STATUS,
+}
+
+
+class CommandRejected(Exception):
+    '''
+    Raised by the future of a command if the element answered with a rejection, e.g. "command rejected".
+    '''
+    def __init__(self, message: bytes):
+        self.message = message
+        self.reason = message[HEADER_LENGTH:HEADER_LENGTH + 1]
+        super().__init__("command rejected with message type %s, reason %s" % (message[1:3].hex(), self.reason.hex()))
+
+
+class _PendingCommand:
+    __slots__ = ('key', 'responses', 'future', 'deadline', 'done')
+
+    def __init__(self, key: bytes, responses: Optional[FrozenSet[bytes]], future: Any, deadline: float):
+        self.key = key
+        self.responses = responses
+        self.future = future
+        self.deadline = deadline
+        self.done = False
+
+
+class _CommandTable:
+    '''
+    Commands waiting for a response, keyed by the identifier field of the commanded element
+    and the protocol type. Responses complete the oldest matching command of the element,
+    so any number of commands can be in flight, also several to the same element.
+    '''
+    def __init__(self):
+        self._pending: Dict[bytes, Deque[_PendingCommand]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(commands) for commands in self._pending.values())
+
+    def add(self, command: bytes, future: Any, responses: Iterable[bytes] = None, timeout: float = None) -> _PendingCommand:
+        if len(command) < HEADER_LENGTH:
+            raise ValueError("command is shorter than the EULYNX header")
+        if responses is None:
+            responses = COMMAND_RESPONSES.get(command[:3])
+        else:
+            responses = frozenset(responses)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        pending = _PendingCommand(command[23:43] + command[:1], responses, future, deadline)
+        with self._lock:
+            commands = self._pending.get(pending.key)
+            if commands is None:
+                commands = self._pending[pending.key] = deque()
+            commands.append(pending)
+        return pending
+
+    def _remove(self, pending: _PendingCommand) -> bool:
+        # must be called with the lock held
+        if pending.done:
+            return False
+        pending.done = True
+        commands = self._pending[pending.key]
+        commands.remove(pending)
+        if not commands:
+            del self._pending[pending.key]
+        return True
+
+    def discard(self, pending: _PendingCommand) -> None:
+        with self._lock:
+            self._remove(pending)
+
+    def update(self, message: bytes) -> bool:
+        '''
+        complete the oldest pending command the message answers
+
+        :param message: a received telegram
+
+        returns True if the message completed a command, otherwise False
+        '''
+        commands = self._pending.get(message[3:23] + message[:1])
+        if not commands or len(message) < HEADER_LENGTH:
+            return False
+        message_key = message[:3]
+        rejected = message_key in REJECTION_MESSAGES
+        with self._lock:
+            for pending in commands:
+                if rejected or pending.responses is None or message_key in pending.responses:
+                    self._remove(pending)
+                    break
+            else:
+                return False
+
+        if rejected:
+            self._set_exception(pending.future, CommandRejected(message))
+        else:
+            self._set_result(pending.future, message)
+        return True
+
+    def _set_result(self, future: Any, message: bytes) -> None:
+        if not future.done():
+            future.set_result(message)
+
+    def _set_exception(self, future: Any, exception: Exception) -> None:
+        if not future.done():
+            future.set_exception(exception)
+
+
+class _CommandTracker(_CommandTable):
+    '''
+    Command table with concurrent.futures futures. A background thread fails the futures of
+    commands that did not get a response in time with TimeoutError. Completed and discarded
+    commands are dropped from the deadlines once they are half of them, so the deadlines grow
+    with the commands in flight, not with the command rate times the timeout.
+    '''
+    def __init__(self):
+        super().__init__()
+        self._deadlines: List = []
+        # entries of the deadlines whose command was completed or discarded
+        self._stale = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition(self._lock)
+        self._expiry: threading.Thread = None
+
+    def add(self, command: bytes, future: Future = None, responses: Iterable[bytes] = None, timeout: float = None) -> _PendingCommand:
+        pending = super().add(command, future or Future(), responses, timeout)
+        if pending.deadline is not None:
+            with self._condition:
+                heapq.heappush(self._deadlines, (pending.deadline, next(self._sequence), pending))
+                if self._expiry is None:
+                    self._expiry = threading.Thread(target=self._expire_loop, daemon=True)
+                    self._expiry.start()
+                elif self._deadlines[0][2] is pending:
+                    self._condition.notify()
+        return pending
+
+    def _remove(self, pending: _PendingCommand) -> bool:
+        # must be called with the lock held
+        if not super()._remove(pending):
+            return False
+        if pending.deadline is not None:
+            self._stale += 1
+            if self._stale > len(self._deadlines) // 2:
+                self._deadlines = [entry for entry in self._deadlines if not entry[2].done]
+                heapq.heapify(self._deadlines)
+                self._stale = 0
+        return True
+
+    def _expire_loop(self) -> None:
+        while True:
+            expired = []
+            with self._condition:
+                now = time.monotonic()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    pending = heapq.heappop(self._deadlines)[2]
+                    if pending.done:
+                        self._stale -= 1
+                    elif super()._remove(pending):
+                        expired.append(pending)
+                if not expired:
+                    self._condition.wait(self._deadlines[0][0] - now if self._deadlines else None)
+            for pending in expired:
+                self._set_exception(pending.future, TimeoutError("no response to the command within the timeout"))
@@ -0,0 +1,396 @@
+import argparse
+import heapq
+import json
+import queue
+import random
+import threading
+import time
+
+import grpc
+
+from collections import deque
+from typing import Any, Dict, Iterator, List
+from .messages._generic import EulynxGenericParser
+from .messages.point import EulynxPoint, PointPosition
+from .messages.signal import EulynxSignal, EulynxSignalAspect
+from .messages.traindetection import (
+    EulynxTrainDetection,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPassingDirection,
+    TrainDetectionPassingState,
+    TrainDetectionPOMState,
+)
+from .metrics import LatencyHistogram
+from .proto.rasta_pb2 import SciPacket
+from .proto.rasta_pb2_grpc import RastaStub
+
+DEFAULT_MIX = {"signal": 1, "point": 1, "traindetection": 8}
+# outstanding telegrams remembered per reply key for the round trip latency
+_OUTSTANDING_LIMIT = 64
+
+
+def _swap_identifiers(message: bytes) -> bytes:
+    return message[:3] + message[23:43] + message[3:23] + message[43:]
+
+
+def _signal_telegrams(element: str, receiver: str) -> List[bytes]:
+    return [
+        EulynxSignal.indicate_signal_aspect(element, receiver, aspect)
+        for aspect in (EulynxSignalAspect.stop_danger, EulynxSignalAspect.proceed_clear)
+    ]
+
+
+def _point_telegrams(element: str, receiver: str) -> List[bytes]:
+    return [EulynxPoint.move_point(element, receiver, position) for position in (PointPosition.left, PointPosition.right)]
+
+
+def _traindetection_telegrams(element: str, receiver: str) -> List[bytes]:
+    telegrams = [
+        EulynxTrainDetection.occupancy_status(
+            element, receiver, state, TrainDetectionForceClearAbility.ABLE, -1,
+            TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+        )
+        for state in (TrainDetectionOccupancyState.OCCUPIED, TrainDetectionOccupancyState.VACANT)
+    ]
+    telegrams.append(EulynxTrainDetection.tdp_status(element, receiver, TrainDetectionPassingState.PASSED, TrainDetectionPassingDirection.REFERENCE))
+    return telegrams
+
+
+_GENERATORS = {
+    "signal": ("S", _signal_telegrams),
+    "point": ("W", _point_telegrams),
+    "traindetection": ("TDS", _traindetection_telegrams),
+}
+
+
+class _BridgeStream:
+    '''
+    One Stream call of the loopback bridge with its own telegram pool, pacing and echo schedule.
+    '''
+    def __init__(self, bridge: "LoopbackBridge", channel: grpc.Channel, telegrams: List[bytes], rate: float, seed: int):
+        self.bridge = bridge
+        self.telegrams = telegrams
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.requests = queue.SimpleQueue()
+        self.echoes = []
+        self.echo_lock = threading.Lock()
+        self.call = RastaStub(channel).Stream(self._requests())
+        self.threads = [
+            threading.Thread(target=self._receive, daemon=True),
+            threading.Thread(target=self._schedule, daemon=True),
+        ]
+
+    def start(self) -> None:
+        for thread in self.threads:
+            thread.start()
+
+    def _requests(self) -> Iterator[SciPacket]:
+        while True:
+            message = self.requests.get()
+            if message is None:
+                return
+            yield SciPacket(message=message)
+
+    def _send(self, message: bytes) -> None:
+        bridge = self.bridge
+        key = _swap_identifiers(message[:43])
+        with bridge._lock:
+            outstanding = bridge._outstanding.get(key)
+            if outstanding is None:
+                outstanding = bridge._outstanding[key] = deque(maxlen=_OUTSTANDING_LIMIT)
+            outstanding.append(time.monotonic())
+            bridge.sent += 1
+        self.requests.put(message)
+
+    def _schedule(self) -> None:
+        bridge = self.bridge
+        if not (self.rate and self.telegrams) and not bridge.echo_delay:
+            # nothing is paced or delayed, the echoes are sent by the receiving thread
+            bridge._stop.wait()
+            self.requests.put(None)
+            return
+        telegrams = self.telegrams
+        sent = 0
+        start = time.monotonic()
+        while not bridge._stop.is_set():
+            now = time.monotonic()
+            if self.rate and telegrams:
+                due = int((now - start) * self.rate)
+                if due - sent > self.rate:
+                    # more than a second behind, do not try to catch up with a burst
+                    sent = due - int(self.rate)
+                while sent < due:
+                    self._send(telegrams[sent % len(telegrams)])
+                    sent += 1
+
+            with self.echo_lock:
+                while self.echoes and self.echoes[0][0] <= now:
+                    self.requests.put(heapq.heappop(self.echoes)[2])
+                next_echo = self.echoes[0][0] - now if self.echoes else 0.001
+
+            bridge._stop.wait(min(0.001, max(next_echo, 0)))
+        self.requests.put(None)
+
+    def _receive(self) -> None:
+        bridge = self.bridge
+        try:
+            for response in self.call:
+                message = response.message
+                arrival = time.monotonic()
+                with bridge._lock:
+                    bridge.received += 1
+                    outstanding = bridge._outstanding.get(message[:43])
+                    sent = outstanding.popleft() if outstanding else None
+                    if sent is not None:
+                        bridge.latency.record(arrival - sent)
+                        continue
+                    if not bridge.echo:
+                        continue
+                    if self.random.random() < bridge.loss:
+                        bridge.lost += 1
+                        continue
+                    bridge.echoed += 1
+                    bridge._sequence += 1
+                    sequence = bridge._sequence
+
+                echo = _swap_identifiers(message)
+                if bridge.echo_delay:
+                    with self.echo_lock:
+                        heapq.heappush(self.echoes, (arrival + bridge.echo_delay, sequence, echo))
+                else:
+                    self.requests.put(echo)
+        except grpc.RpcError:
+            pass
+
+    def close(self) -> None:
+        self.call.cancel()
+
+
+class LoopbackBridge:
+    '''
+    Stand-in for the RaSTA bridge on localhost. It opens several Stream calls to pyLYNX, sends a
+    mix of signal, point and train detection telegrams at a target rate and answers the telegrams
+    of pyLYNX with the same telegram, sender and receiver swapped, after a delay and with a loss rate.
+
+    The elements are spread over the streams, so every element always uses the same stream like
+    behind several bridges. Telegrams that come back from pyLYNX with sender and receiver swapped,
+    e.g. because the application answers every report, are matched per element and message type
+    and their round trip latency is recorded.
+    '''
+    def __init__(
+        self,
+        address: str,
+        streams: int = 1,
+        rate: float = 0.0,
+        mix: Dict[str, float] = None,
+        elements: int = 100,
+        receiver: str = "INTERLOCKING",
+        echo: bool = True,
+        echo_delay: float = 0.0,
+        loss: float = 0.0,
+        seed: int = 0
+    ):
+        '''
+        @param address address of the pyLYNX grpc server
+        @param streams number of concurrent Stream calls
+        @param rate telegrams per second sent over all streams, 0 only answers
+        @param mix relative weights of "signal", "point" and "traindetection" telegrams
+        @param elements number of elements per type
+        @param receiver identifier the generated telegrams are addressed to
+        @param echo answer telegrams received from pyLYNX
+        @param echo_delay seconds to wait before an answer is sent
+        @param loss probability that a telegram from pyLYNX is not answered
+        @param seed seed of the telegram order and the losses
+
+        @returns LoopbackBridge-Object
+        '''
+        for kind in (mix or {}):
+            if kind not in _GENERATORS:
+                raise ValueError("unknown telegram type: " + kind)
+        self.address = address
+        self.streams = streams
+        self.rate = rate
+        self.mix = mix or DEFAULT_MIX
+        self.elements = elements
+        self.receiver = receiver
+        self.echo = echo
+        self.echo_delay = echo_delay
+        self.loss = loss
+        self.seed = seed
+        self.latency = LatencyHistogram()
+        self.sent = 0
+        self.received = 0
+        self.echoed = 0
+        self.lost = 0
+        self.started = None
+        self.stopped = None
+        self._sequence = 0
+        self._outstanding: Dict[bytes, deque] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._channels: List[grpc.Channel] = []
+        self._streams: List[_BridgeStream] = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    def _telegram_pools(self) -> List[List[bytes]]:
+        # weights are turned into how often the telegrams of a type appear in the cycle of a stream
+        smallest = min(weight for weight in self.mix.values() if weight > 0)
+        pools = [[] for _ in range(self.streams)]
+        for kind, weight in self.mix.items():
+            if weight <= 0:
+                continue
+            prefix, generate = _GENERATORS[kind]
+            repetitions = max(1, round(weight / smallest))
+            for element in range(self.elements):
+                telegrams = generate("%s%d" % (prefix, element), self.receiver)
+                pools[element % self.streams].extend(repetitions * telegrams)
+        for index, pool in enumerate(pools):
+            random.Random(self.seed + index).shuffle(pool)
+        return pools
+
+    def start(self, timeout: float = 10.0) -> None:
+        '''
+        Connect all streams and start sending.
+
+        @param timeout seconds to wait for the pyLYNX server
+
+        @returns None
+        '''
+        self._stop.clear()
+        pools = self._telegram_pools()
+        for index in range(self.streams):
+            # a channel per stream, so the streams do not share one HTTP/2 connection
+            channel = grpc.insecure_channel(self.address, options=[("grpc.use_local_subchannel_pool", 1)])
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+            self._channels.append(channel)
+            self._streams.append(_BridgeStream(self, channel, pools[index], self.rate / self.streams, self.seed + index))
+        self.started = time.monotonic()
+        self.stopped = None
+        for stream in self._streams:
+            stream.start()
+
+    def stop(self) -> None:
+        '''
+        Stop sending and close all streams.
+
+        @returns None
+        '''
+        self._stop.set()
+        self.stopped = time.monotonic()
+        for stream in self._streams:
+            for thread in stream.threads:
+                if thread is not threading.current_thread():
+                    thread.join(1)
+            stream.close()
+        for channel in self._channels:
+            channel.close()
+        self._streams.clear()
+        self._channels.clear()
+
+    def run(self, duration: float) -> Dict[str, Any]:
+        '''
+        Run the bridge for the given time and stop it.
+
+        @param duration seconds to run
+
+        @returns the report, see report()
+        '''
+        self.start()
+        try:
+            time.sleep(duration)
+        finally:
+            self.stop()
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        '''
+        Get the achieved throughput and the round trip latency.
+
+        @returns dict with the telegram counters, rates per second and latency statistics in seconds
+        '''
+        elapsed = ((self.stopped or time.monotonic()) - self.started) if self.started else 0.0
+        with self._lock:
+            report = {
+                'streams': self.streams,
+                'elapsed': elapsed,
+                'sent': self.sent,
+                'received': self.received,
+                'echoed': self.echoed,
+                'lost': self.lost,
+            }
+        report['sent_per_sec'] = report['sent'] / elapsed if elapsed else 0.0
+        report['received_per_sec'] = report['received'] / elapsed if elapsed else 0.0
+        report['round_trip'] = self.latency.snapshot()
+        return report
+
+
+class _Responder(EulynxGenericParser):
+    '''
+    Parser for pyLYNX that answers every telegram with the same telegram, sender and receiver swapped.
+    '''
+    def __init__(self, srv):
+        self.srv = srv
+
+    def parse_message(self, message: bytes) -> bool:
+        self.srv.send_message(_swap_identifiers(message))
+        return True
+
+
+def _parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(prog="python -m pyLYNX.loopback", description="Loopback RaSTA bridge and load generator")
+    arguments.add_argument("--address", default="127.0.0.1:50051", help="address of the pyLYNX grpc server")
+    arguments.add_argument("--streams", type=int, default=1, help="number of concurrent streams")
+    arguments.add_argument("--rate", type=float, default=1000, help="telegrams per second over all streams")
+    arguments.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX, help="weights, e.g. signal=1,point=1,traindetection=8")
+    arguments.add_argument("--elements", type=int, default=100, help="number of elements per type")
+    arguments.add_argument("--delay", type=float, default=0.0, help="seconds before a telegram from pyLYNX is answered")
+    arguments.add_argument("--loss", type=float, default=0.0, help="probability that a telegram from pyLYNX is not answered")
+    arguments.add_argument("--no-echo", dest="echo", action="store_false", help="do not answer telegrams from pyLYNX")
+    arguments.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    arguments.add_argument("--serve", action="store_true", help="also run a pyLYNX server that answers every telegram")
+    arguments.add_argument("--transport", choices=("queue", "shared_memory"), default="queue", help="transport of the pyLYNX server")
+    options = arguments.parse_args()
+
+    bridge = LoopbackBridge(
+        options.address,
+        streams=options.streams,
+        rate=options.rate,
+        mix=options.mix,
+        elements=options.elements,
+        echo=options.echo and not options.serve,
+        echo_delay=options.delay,
+        loss=options.loss
+    )
+    if options.serve:
+        from .pyLYNX import pyLYNX
+        with pyLYNX(options.address, transport=options.transport) as srv:
+            srv.register_default_parser(_Responder(srv))
+            srv.start_dispatcher()
+            srv.wait_until_serving()
+            report = bridge.run(options.duration)
+            srv.stop_dispatcher()
+    else:
+        report = bridge.run(options.duration)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,117 @@
 import abc
+from typing import Callable, Dict
+# the identifier table moved to its own module so the schemas can be imported here, the names stay available
+from ._identifiers import HEADER_LENGTH, IDENTIFIER_LENGTH, IDENTIFIERS, IdentifierTable, decode_identifier, encode_identifier
+from .schema import GENERIC_PROTOCOL, INITIALIZATION_REQUEST, PDI_VERSION_CHECK, MessageSchema, generic_schemas
+
+
+class EulynxGenericMessageType:
+    pdi_version_check = PDI_VERSION_CHECK.message_type
+    initialization_request = INITIALIZATION_REQUEST.message_type
+
 
 class EulynxGeneric:
-    protocol_type = bytes.fromhex('00')
+    protocol_type = GENERIC_PROTOCOL
 
     @classmethod
     def pdi_version_check(cls, sender_id: str, receiver_id: str) -> bytes:
-        message = cls.protocol_type
-        message += bytes.fromhex('2400')
+        return generic_schemas(cls.protocol_type).pdi_version_check.encode(sender_id, receiver_id)
 
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
+    @classmethod
+    def initialization_request(cls, sender_id: str, receiver_id: str) -> bytes:
+        return generic_schemas(cls.protocol_type).initialization_request.encode(sender_id, receiver_id)
 
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
 
-        message += bytes.fromhex('01')
+class EulynxGenericHandle:
+    '''
+    Telegram builder bound to one sender, receiver and protocol type.
 
-        return message
+    The 43 byte header of every message type is built once and complete telegrams
+    for enumerated arguments are memoized, so repeated commands to the same element
+    are a dictionary lookup returning the same bytes object. The layout of the
+    telegrams comes from the schemas in pyLYNX.messages.schema.
+    '''
+    protocol_type = EulynxGeneric.protocol_type
 
-    @classmethod
-    def initialization_request(cls, sender_id: str, receiver_id: str) -> bytes:
-        message = cls.protocol_type
-        message += bytes.fromhex('2100')
+    def __init__(self, sender_id: str, receiver_id: str, protocol_type: bytes = None):
+        '''
+        :param sender_id: Identifier of the sending instance of the commands
+        :param receiver_id: Identifier of the receiving instance of the commands
+        :param protocol_type: overrides the protocol type of the handle class
+        '''
+        if protocol_type is not None:
+            self.protocol_type = protocol_type
+        self.sender_id = sender_id
+        self.receiver_id = receiver_id
+        self.identifiers = encode_identifier(sender_id) + encode_identifier(receiver_id)
+        self.generic_schemas = generic_schemas(self.protocol_type)
+        self._headers = {}
+        self._telegrams = {}
+
+    def header(self, message_type: bytes) -> bytes:
+        '''
+        get the 43 byte header (protocol type, message type, sender and receiver) of a message type
+
+        :param message_type: the two byte message type
+
+        returns bytes
+        '''
+        header = self._headers.get(message_type)
+        if header is None:
+            header = self._headers[message_type] = self.protocol_type + message_type + self.identifiers
+        return header
 
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
+    def telegram(self, schema: MessageSchema, argument: bytes = b'') -> bytes:
+        '''
+        get the memoized telegram for a message type and an enumerated argument
+
+        :param schema: the schema of the message type
+        :param argument: the field without constant, e.g. a signal aspect, the constant fields of the schema follow
+
+        returns bytes, raises ValueError if the argument does not fit its field
+        '''
+        telegrams = self._telegrams.get(schema.message_type)
+        if telegrams is None:
+            telegrams = self._telegrams[schema.message_type] = {}
+        telegram = telegrams.get(argument)
+        if telegram is None:
+            # encoded and checked once per argument
+            header = self.header(schema.message_type)
+            telegram = schema.encode_with_header(header, argument) if argument else schema.encode_with_header(header)
+            telegrams[argument] = telegram
+        return telegram
+
+    def build(self, schema: MessageSchema, *arguments) -> bytes:
+        '''
+        build a telegram with non-enumerated fields without memoizing it
+
+        :param schema: the schema of the message type
+        :param arguments: values of the fields without constant, as for MessageSchema.encode
 
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
+        returns bytes, raises ValueError if an argument does not fit its field
+        '''
+        return schema.encode_with_header(self.header(schema.message_type), *arguments)
+
+    def pdi_version_check(self) -> bytes:
+        return self.telegram(self.generic_schemas.pdi_version_check)
+
+    def initialization_request(self) -> bytes:
+        return self.telegram(self.generic_schemas.initialization_request)
 
-        return message
 
 class EulynxGenericParser:
     __metaclass__ = abc.ABCMeta
 
+    def message_handlers(self) -> Dict[bytes, Callable[[bytes], bool]]:
+        '''
+        get the message handlers of this parser, keyed by protocol type + message type (the first three bytes of a message).
+        pyLYNX routes matching messages straight to the handlers. Parsers without handlers are offered every message
+        through parse_message.
+
+        returns dict mapping message keys to callables that accept the message and return True if it was parsed
+        '''
+        return {}
+
     @abc.abstractclassmethod
     def parse_message(self, message: bytes) -> bool:
         '''
@@ -47,4 +121,4 @@ class EulynxGenericParser:
 
         @returns True if the message could be parsed successfully, otherwise False
         '''
-        return False
\ No newline at end of file
+        return False
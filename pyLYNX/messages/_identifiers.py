@@ -0,0 +1,108 @@
+import sys
+import threading
+from typing import Dict, List
+
+IDENTIFIER_LENGTH = 20
+HEADER_LENGTH = 3 + 2 * IDENTIFIER_LENGTH
+
+
+class IdentifierTable:
+    '''
+    Registry of element identifiers. It maps the padded 20 byte identifier fields to interned
+    strings and small integer ids and back, so parsing and encoding is a dictionary lookup
+    instead of decoding, padding and allocating new strings for every telegram.
+
+    Identifiers are added when they are seen first. Beyond the limit, unknown identifiers are
+    still encoded and decoded, but not added, so malformed traffic cannot grow the table forever.
+    '''
+    def __init__(self, limit: int = 65536):
+        '''
+        :param limit: maximum number of identifiers in the table
+        '''
+        self.limit = limit
+        self.names: List[str] = []
+        self.fields: List[bytes] = []
+        self._names: Dict[bytes, str] = {}
+        self._fields: Dict[str, bytes] = {}
+        self._ids: Dict[bytes, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _add(self, name: str, field: bytes) -> int:
+        with self._lock:
+            index = self._ids.get(field)
+            if index is None and len(self.names) < self.limit:
+                name = sys.intern(name)
+                index = len(self.names)
+                self.names.append(name)
+                self.fields.append(field)
+                self._fields[name] = field
+                self._names[field] = name
+                self._ids[field] = index
+            return index
+
+    def encode(self, identifier: str) -> bytes:
+        '''
+        encode an element identifier as ISO-8859-1 field padded to 20 bytes with "_"
+
+        :param identifier: Identifier of a EULYNX instance, e.g. "INTERLOCKING" or "99N1"
+
+        returns bytes, raises ValueError if the identifier is longer than 20 bytes
+        '''
+        field = self._fields.get(identifier)
+        if field is None:
+            field = identifier.encode('iso8859-1').ljust(IDENTIFIER_LENGTH, b'_')
+            if len(field) > IDENTIFIER_LENGTH:
+                # the struct codecs would truncate it, the handles would build an overlong telegram
+                raise ValueError("identifier %r is longer than %d bytes" % (identifier, IDENTIFIER_LENGTH))
+            self._add(identifier, field)
+        return field
+
+    def decode(self, field: bytes) -> str:
+        '''
+        decode a padded 20 byte identifier field
+
+        :param field: the identifier field as byte array
+
+        returns the interned identifier
+        '''
+        name = self._names.get(field)
+        if name is None:
+            name = field.decode('iso8859-1').rstrip("_")
+            index = self._add(name, bytes(field))
+            if index is not None:
+                name = self.names[index]
+        return name
+
+    def id(self, field: bytes) -> int:
+        '''
+        get the id of an identifier field, ids are assigned in the order identifiers are seen
+
+        :param field: the identifier field as byte array
+
+        returns int or None if the table is full
+        '''
+        index = self._ids.get(field)
+        if index is None:
+            index = self._add(field.decode('iso8859-1').rstrip("_"), bytes(field))
+        return index
+
+    def id_of(self, identifier: str) -> int:
+        '''
+        get the id of an element identifier
+
+        :param identifier: Identifier of a EULYNX instance, e.g. "99N1"
+
+        returns int or None if the table is full
+        '''
+        return self.id(self.encode(identifier))
+
+
+# table shared by all encoders, parsers, views and state stores, the functions below are its bound methods
+IDENTIFIERS = IdentifierTable()
+
+
+encode_identifier = IDENTIFIERS.encode
+decode_identifier = IDENTIFIERS.decode
@@ -0,0 +1,237 @@
+'''
+Vectorized encoders and decoders for large batches of fixed size EULYNX telegrams.
+
+Requires numpy, install it with the "batch" extra: pip install "pyLYNX[batch]"
+'''
+import numpy as np
+
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+from ._generic import IDENTIFIER_LENGTH, HEADER_LENGTH, encode_identifier
+from .schema import INDICATE_SIGNAL_ASPECT, MOVE_POINT, OCCUPANCY_STATUS, SCHEMAS, MessageSchema
+
+EnumColumn = Union[bytes, Sequence[bytes], Sequence[int], np.ndarray]
+
+
+class TelegramBatch:
+    '''
+    Contiguous buffer of telegrams with equal length. Iterating the batch yields
+    zero-copy memoryview slices of the buffer that can be passed to pyLYNX.send_message.
+    '''
+    def __init__(self, buffer: np.ndarray):
+        '''
+        :param buffer: two dimensional uint8 array with one telegram per row
+        '''
+        self.buffer = buffer
+        self.telegram_length = buffer.shape[1]
+        self._view = memoryview(buffer).cast('B')
+
+    def __len__(self) -> int:
+        return self.buffer.shape[0]
+
+    def __getitem__(self, index: int) -> memoryview:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("telegram index out of range")
+        start = index * self.telegram_length
+        return self._view[start:start + self.telegram_length]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        length = self.telegram_length
+        view = self._view
+        for start in range(0, len(view), length):
+            yield view[start:start + length]
+
+    def tobytes(self) -> bytes:
+        return self.buffer.tobytes()
+
+
+def _allocate(schema: MessageSchema, sender_id: str, receiver_ids: Sequence[str]) -> np.ndarray:
+    receivers = np.frombuffer(b''.join(map(encode_identifier, receiver_ids)), dtype=np.uint8)
+    buffer = np.empty((len(receiver_ids), schema.length), dtype=np.uint8)
+    buffer[:, :3 + IDENTIFIER_LENGTH] = np.frombuffer(schema.key + encode_identifier(sender_id), dtype=np.uint8)
+    buffer[:, 3 + IDENTIFIER_LENGTH:HEADER_LENGTH] = receivers.reshape(-1, IDENTIFIER_LENGTH)
+    if schema.tail:
+        buffer[:, schema.length - len(schema.tail):] = np.frombuffer(schema.tail, dtype=np.uint8)
+    return buffer
+
+
+def _column(values, count: int, name: str) -> np.ndarray:
+    # a single value for all telegrams or one value per telegram
+    column = np.asarray(values, dtype=np.int64)
+    if column.ndim > 1 or (column.ndim and len(column) != count):
+        raise ValueError("%s needs a single value or one value per telegram, got %d for %d telegrams" % (name, column.size, count))
+    return column
+
+
+def _enum_column(values: EnumColumn, count: int, name: str) -> Union[int, np.ndarray]:
+    if isinstance(values, bytes):
+        if len(values) != 1:
+            raise ValueError("%s must be a one byte value" % name)
+        return values[0]
+    if isinstance(values, (list, tuple)) and values and isinstance(values[0], bytes):
+        joined = b''.join(values)
+        if len(joined) != len(values):
+            raise ValueError("%s must be one byte values" % name)
+        values = np.frombuffer(joined, dtype=np.uint8)
+    column = _column(values, count, name)
+    if ((column < 0) | (column > 0xFF)).any():
+        raise ValueError("%s values must be between 0 and 255" % name)
+    return column.astype(np.uint8)
+
+
+def occupancy_status_batch(
+    sender_id: str,
+    receiver_ids: Sequence[str],
+    occupancy_status: EnumColumn,
+    force_clear_ability: EnumColumn,
+    filling_level: Union[int, Sequence[int], np.ndarray],
+    pom_state: EnumColumn,
+    disturbance_state: EnumColumn,
+    change_trigger: EnumColumn
+) -> TelegramBatch:
+    '''
+    generate "TVPS Occupancy Status" messages for many TDS at once.
+    Every enumerated column is either a single value for all telegrams, a sequence of
+    one byte values (e.g. TrainDetectionOccupancyState constants) or an array of integers,
+    with one value per telegram. Other lengths and values outside 0..255 raise ValueError.
+
+    :param sender_id: Identifier of the sending instance of the messages
+    :param receiver_ids: Identifiers of the receiving instances, one per telegram
+    :param occupancy_status: the occupancy status of the TDS - see TrainDetectionOccupancyState class
+    :param force_clear_ability: the ability of the TDS to be forced to clear - see TrainDetectionForceClearAbility class
+    :param filling_level: the filling level of the TDS - use negative value if not applicable
+    :param pom_state: state of the power supply - see TrainDetectionPOMState class
+    :param disturbance_state: the disturbance state of the TDS - see TrainDetectionDisturbanceState class
+    :param change_trigger: the trigger for this message - see TrainDetectionChangeTrigger class
+
+    returns TelegramBatch
+    '''
+    buffer = _allocate(OCCUPANCY_STATUS, sender_id, receiver_ids)
+    count = len(receiver_ids)
+    offsets = OCCUPANCY_STATUS.offsets
+    buffer[:, offsets['occupancy_status']] = _enum_column(occupancy_status, count, 'occupancy_status')
+    buffer[:, offsets['force_clear_ability']] = _enum_column(force_clear_ability, count, 'force_clear_ability')
+    filling_level = _column(filling_level, count, 'filling_level')
+    # negative levels mean not applicable, like in the per-telegram encoder
+    filling_level = np.where(filling_level < 0, 0xFFFF, filling_level)
+    if ((filling_level < 0) | (filling_level > 0xFFFF)).any():
+        raise ValueError("filling levels must not exceed %d" % 0xFFFF)
+    filling_level = filling_level.astype('>u2')
+    offset = offsets['filling_level']
+    buffer[:, offset:offset + 2] = filling_level.reshape(-1, 1).view(np.uint8)
+    buffer[:, offsets['pom_state']] = _enum_column(pom_state, count, 'pom_state')
+    buffer[:, offsets['disturbance_state']] = _enum_column(disturbance_state, count, 'disturbance_state')
+    buffer[:, offsets['change_trigger']] = _enum_column(change_trigger, count, 'change_trigger')
+    return TelegramBatch(buffer)
+
+
+def indicate_signal_aspect_batch(sender_id: str, receiver_ids: Sequence[str], signal_aspect: EnumColumn) -> TelegramBatch:
+    '''
+    generate "indicate signal aspect" commands for many signals at once
+
+    :param sender_id: Identifier of the sending instance of the commands
+    :param receiver_ids: Identifiers of the receiving signals, one per telegram
+    :param signal_aspect: the signal aspects - see EulynxSignalAspect class
+
+    returns TelegramBatch
+    '''
+    buffer = _allocate(INDICATE_SIGNAL_ASPECT, sender_id, receiver_ids)
+    buffer[:, INDICATE_SIGNAL_ASPECT.offsets['signal_aspect']] = _enum_column(signal_aspect, len(receiver_ids), 'signal_aspect')
+    return TelegramBatch(buffer)
+
+
+def move_point_batch(sender_id: str, receiver_ids: Sequence[str], point_position: EnumColumn) -> TelegramBatch:
+    '''
+    generate "move point" commands for many points at once
+
+    :param sender_id: Identifier of the sending instance of the commands
+    :param receiver_ids: Identifiers of the receiving points, one per telegram
+    :param point_position: Positions the points should switch to - see PointPosition class
+
+    returns TelegramBatch
+    '''
+    buffer = _allocate(MOVE_POINT, sender_id, receiver_ids)
+    buffer[:, MOVE_POINT.offsets['point_position']] = _enum_column(point_position, len(receiver_ids), 'point_position')
+    return TelegramBatch(buffer)
+
+
+def _layout(schema: MessageSchema) -> np.dtype:
+    fields = [
+        ('protocol_type', 'u1', 0),
+        ('message_type', '>u2', 1),
+        ('sender', 'S20', 3),
+        ('receiver', 'S20', 23),
+    ] + [(field.name, field.numpy_format, field.offset) for field in schema.fields]
+    return np.dtype({
+        'names': [field[0] for field in fields],
+        'formats': [field[1] for field in fields],
+        'offsets': [field[2] for field in fields],
+        'itemsize': schema.length,
+    })
+
+
+# structured dtypes of the fixed layout messages, keyed by protocol type + message type
+LAYOUTS: Dict[bytes, Tuple[str, np.dtype]] = {schema.key: (schema.name, _layout(schema)) for schema in SCHEMAS}
+
+LAYOUTS_BY_NAME: Dict[str, np.dtype] = {name: dtype for name, dtype in LAYOUTS.values()}
+
+
+def decode_buffer(buffer: Union[bytes, memoryview, np.ndarray], message: str) -> np.ndarray:
+    '''
+    decode a contiguous buffer of telegrams of one message type in a single pass
+
+    :param buffer: concatenated telegrams, e.g. TelegramBatch.buffer
+    :param message: the name of the message type, e.g. "occupancy_status"
+
+    returns structured numpy array with one record per telegram
+    '''
+    dtype = LAYOUTS_BY_NAME[message]
+    if isinstance(buffer, np.ndarray):
+        buffer = buffer.reshape(-1)
+    if len(buffer) % dtype.itemsize:
+        raise ValueError("buffer length is not a multiple of the %s message length" % message)
+    return np.frombuffer(buffer, dtype=dtype)
+
+
+def decode_batch(telegrams: Iterable[bytes]) -> Dict[str, np.ndarray]:
+    '''
+    decode a batch of raw telegrams into one structured numpy array per message type.
+    Identifier fields keep their "_" padding, use decode_identifiers to strip it.
+    Telegrams of unknown types or with an unexpected length are skipped.
+
+    :param telegrams: iterable of raw EULYNX telegrams
+
+    returns dict mapping message type names to structured numpy arrays
+    '''
+    groups: Dict[bytes, List[bytes]] = {}
+    for telegram in telegrams:
+        key = bytes(telegram[:3])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = []
+        group.append(telegram)
+
+    decoded = {}
+    for key, group in groups.items():
+        layout = LAYOUTS.get(key)
+        if layout is None:
+            continue
+        name, dtype = layout
+        # checked per telegram, a short and a long telegram together would still add up to whole records
+        size = dtype.itemsize
+        data = b''.join(telegram for telegram in group if len(telegram) == size)
+        decoded[name] = np.frombuffer(data, dtype=dtype)
+
+    return decoded
+
+
+def decode_identifiers(identifiers: np.ndarray) -> np.ndarray:
+    '''
+    strip the "_" padding of an identifier column
+
+    :param identifiers: sender or receiver column of a decoded array
+
+    returns numpy array of unpadded identifiers
+    '''
+    return np.char.rstrip(identifiers, b'_')
@@ -1,5 +1,8 @@
-from ._generic import EulynxGeneric, EulynxGenericParser
-from typing import Callable
+from ._generic import EulynxGeneric, EulynxGenericHandle, EulynxGenericParser, decode_identifier
+from .schema import MOVE_POINT, POINT_PROTOCOL
+from .views import MovePointView, _call_view_callbacks
+from functools import partial
+from typing import Callable, Dict
 
 
 class PointPosition:
@@ -7,8 +10,12 @@ class PointPosition:
     left = bytes.fromhex('02')
 
 
+class EulynxPointMessageType:
+    move_point = MOVE_POINT.message_type
+
+
 class EulynxPoint(EulynxGeneric):
-    protocol_type = bytes.fromhex('40')
+    protocol_type = POINT_PROTOCOL
 
     @classmethod
     def move_point(cls, sender_id: str, receiver_id: str, point_position: bytes) -> bytes:
@@ -21,24 +28,39 @@ class EulynxPoint(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0100')    # Message Type
+        return MOVE_POINT.encode(sender_id, receiver_id, point_position)
+
 
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
+class EulynxPointHandle(EulynxGenericHandle):
+    protocol_type = EulynxPoint.protocol_type
+
+    def move_point(self, point_position: bytes) -> bytes:
+        '''
+        get the command to switch the bound point to position
 
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
+        :param point_position: Position to point should switch to - see PointPosition class
 
-        message += point_position
-        return message
+        returns bytes
+        '''
+        return self.telegram(MOVE_POINT, point_position)
 
 
 class EulynxPointParser(EulynxGenericParser):
-    def __init__(self):
+    def __init__(self, views: bool = False):
+        '''
+        :param views: pass a lazy view of the message to the callbacks instead of the decoded fields, see pyLYNX.messages.views
+        '''
         self.move_point_callbacks = []
+        if views:
+            handler = partial(_call_view_callbacks, self.move_point_callbacks, MovePointView)
+        else:
+            handler = self._parse_move_point
+        self._handlers = {
+            MOVE_POINT.key: handler,
+        }
+
+    def message_handlers(self) -> Dict[bytes, Callable[[bytes], bool]]:
+        return self._handlers
 
     def parse_message(self, message: bytes) -> bool:
         '''
@@ -48,20 +70,26 @@ class EulynxPointParser(EulynxGenericParser):
 
         returns True if the message could be parsed successfully, otherwise False
         '''
-        if (message[:3] == EulynxPoint.protocol_type + bytes.fromhex('0100')):
+        handler = self._handlers.get(message[:3])
+        return handler is not None and handler(message)
+
+    def _parse_move_point(self, message: bytes) -> bool:
+        if self.move_point_callbacks:
+            if len(message) < MOVE_POINT.length:
+                return False
+            sender, receiver, point_position = MOVE_POINT.unpack_from(message)
+            sender = decode_identifier(sender)
+            receiver = decode_identifier(receiver)
             for func in self.move_point_callbacks:
-                sender = message[3:23].decode('iso8859-1').rstrip("_")
-                receiver = message[23:43].decode('iso8859-1').rstrip("_")
-                func[0](sender, receiver, message[43], func[1])
-            return True
-
-        return False
+                func[0](sender, receiver, point_position, func[1])
+        return True
 
     def register_move_point_callback(self, function: Callable[[str, str, bytes, tuple], None], params: tuple) -> None:
         '''
         Register a callback function for the "indicate signal aspect" EULYNX Message.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, point target position, params
+        :param function: Callable that accepts three parameters: sender id, receiver id, point target position, params,
+                         or a MovePointView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -0,0 +1,294 @@
+'''
+Declarative layout of the EULYNX telegrams. Every message is declared once in SCHEMAS with its
+protocol type, message type and payload fields; the message type constants, encoders, parsers,
+batch layouts and state columns are derived from this table, so they can not drift apart.
+
+Each schema compiles its layout into struct.Struct codecs once at import time.
+'''
+import struct
+
+from typing import Callable, Dict, Iterable, Tuple
+from ._identifiers import HEADER_LENGTH, IDENTIFIER_LENGTH, decode_identifier, encode_identifier
+
+# struct format to encode and to decode, numpy format and width of the field kinds
+FIELD_KINDS: Dict[str, Tuple[str, str, str, int]] = {
+    # one byte enumeration, encoded from the one byte enum constants and decoded as int
+    'enum': ('c', 'B', 'u1', 1),
+    # unsigned big endian integer
+    'uint16': ('H', 'H', '>u2', 2),
+    # two bytes in binary coded decimal, encoded and decoded as bytes
+    'bcd16': ('2s', '2s', '>u2', 2),
+}
+
+GENERIC_PROTOCOL = bytes.fromhex('00')
+SIGNAL_PROTOCOL = bytes.fromhex('30')
+POINT_PROTOCOL = bytes.fromhex('40')
+TRAIN_DETECTION_PROTOCOL = bytes.fromhex('20')
+
+_HEADER_FORMAT = '>3s%ds%ds' % (IDENTIFIER_LENGTH, IDENTIFIER_LENGTH)
+
+
+class Field:
+    '''
+    A payload field of a telegram. Fields with a value are constant, the encoder fills them in
+    and the decoder skips them, they must follow all fields without a value.
+    '''
+    __slots__ = ('name', 'kind', 'width', 'value', 'offset', 'encode_format', 'decode_format', 'numpy_format')
+
+    def __init__(self, name: str, kind: str = 'enum', width: int = None, value: bytes = None):
+        '''
+        :param name: name of the field, used for the batch layouts and state columns
+        :param kind: "enum", "uint16", "bcd16" or "bytes"
+        :param width: number of bytes, only for "bytes" fields
+        :param value: the constant value of the field, None if it is passed to the encoder
+        '''
+        if kind == 'bytes':
+            if not width:
+                raise ValueError("bytes field %s needs a width" % name)
+            self.encode_format = self.decode_format = '%ds' % width
+            self.numpy_format = ('u1', (width,))
+        elif kind in FIELD_KINDS:
+            self.encode_format, self.decode_format, self.numpy_format, width = FIELD_KINDS[kind]
+        else:
+            raise ValueError("unknown field kind: " + kind)
+        if value is not None and len(value) != width:
+            raise ValueError("constant of field %s must be %d bytes" % (name, width))
+        self.name = name
+        self.kind = kind
+        self.width = width
+        self.value = value
+        self.offset: int = None
+
+
+class MessageSchema:
+    '''
+    Layout of one message type with precompiled struct codecs.
+    '''
+    def __init__(self, name: str, protocol_type: bytes, message_type: bytes, fields: Iterable[Field] = ()):
+        '''
+        :param name: name of the message type, e.g. "occupancy_status"
+        :param protocol_type: the protocol type of the subsystem
+        :param message_type: the two byte message type
+        :param fields: the payload fields in telegram order
+        '''
+        self.name = name
+        self.protocol_type = protocol_type
+        self.message_type = message_type
+        self.key = protocol_type + message_type
+        self.fields: Tuple[Field, ...] = tuple(fields)
+
+        offset = HEADER_LENGTH
+        for field in self.fields:
+            field.offset = offset
+            offset += field.width
+        self.length = offset
+        self.offsets: Dict[str, int] = {field.name: field.offset for field in self.fields}
+
+        arguments = [field for field in self.fields if field.value is None]
+        if any(field.value is None for field in self.fields[len(arguments):]):
+            raise ValueError("constant fields of %s must follow the other fields" % name)
+        self.arguments: Tuple[str, ...] = tuple(field.name for field in arguments)
+        self._constants = tuple(field.value for field in self.fields[len(arguments):])
+        # the constant fields of the telegram as one byte string
+        self.tail = b''.join(self._constants)
+
+        self._encoder = struct.Struct(_HEADER_FORMAT + ''.join(field.encode_format for field in self.fields))
+        self._decoder = struct.Struct('>3x%ds%ds' % (IDENTIFIER_LENGTH, IDENTIFIER_LENGTH) + ''.join(
+            '%dx' % field.width if field.value is not None else field.decode_format for field in self.fields
+        ))
+        self._header_encoder = struct.Struct('>%ds' % HEADER_LENGTH + ''.join(field.encode_format for field in self.fields))
+        # decodes the sender and receiver field followed by the fields without constant, without length check
+        self.unpack_from: Callable[[bytes], tuple] = self._decoder.unpack_from
+
+    def __repr__(self) -> str:
+        return "MessageSchema(%s, %s, %d bytes)" % (self.name, self.key.hex(), self.length)
+
+    def encode(self, sender_id: str, receiver_id: str, *arguments) -> bytes:
+        '''
+        encode a telegram
+
+        :param sender_id: Identifier of the sending instance of the message
+        :param receiver_id: Identifier of the receiving instance of the message
+        :param arguments: values of the fields without constant, enumerations as one byte enum constants
+
+        returns bytes, raises ValueError if an argument does not fit its field
+        '''
+        try:
+            return self._encoder.pack(
+                self.key, encode_identifier(sender_id), encode_identifier(receiver_id), *arguments, *self._constants
+            )
+        except struct.error as error:
+            raise ValueError("invalid %s arguments %r: %s" % (self.name, arguments, error)) from error
+
+    def encode_into(self, buffer: bytearray, offset: int, sender_id: str, receiver_id: str, *arguments) -> int:
+        '''
+        encode a telegram into a preallocated buffer, e.g. a slot of a larger send buffer
+
+        :param buffer: writable buffer
+        :param offset: position of the telegram in the buffer
+        :param sender_id: Identifier of the sending instance of the message
+        :param receiver_id: Identifier of the receiving instance of the message
+        :param arguments: values of the fields without constant, enumerations as one byte enum constants
+
+        returns the offset behind the telegram, raises ValueError if an argument does not fit its field
+        '''
+        try:
+            self._encoder.pack_into(
+                buffer, offset, self.key, encode_identifier(sender_id), encode_identifier(receiver_id), *arguments, *self._constants
+            )
+        except struct.error as error:
+            raise ValueError("invalid %s arguments %r: %s" % (self.name, arguments, error)) from error
+        return offset + self.length
+
+    def encode_with_header(self, header: bytes, *arguments) -> bytes:
+        '''
+        encode a telegram behind a prebuilt header, e.g. the cached header of an element handle.
+        The arguments are checked like in encode.
+
+        :param header: the 43 byte header of the telegram
+        :param arguments: values of the fields without constant, enumerations as one byte enum constants
+
+        returns bytes, raises ValueError if an argument does not fit its field
+        '''
+        try:
+            return self._header_encoder.pack(header, *arguments, *self._constants)
+        except struct.error as error:
+            raise ValueError("invalid %s arguments %r: %s" % (self.name, arguments, error)) from error
+
+    def validate(self, message: bytes) -> bool:
+        '''
+        check the message type and length of a telegram
+
+        :param message: the telegram
+
+        returns True if the telegram matches the schema, otherwise False
+        '''
+        return len(message) == self.length and message[:3] == self.key
+
+    def decode(self, message: bytes) -> tuple:
+        '''
+        decode a telegram
+
+        :param message: the telegram, additional trailing bytes are ignored
+
+        returns tuple of sender id and receiver id followed by the fields without constant,
+        enumerations and integers as int
+        '''
+        if len(message) < self.length:
+            raise ValueError("%s telegram must be at least %d bytes, got %d" % (self.name, self.length, len(message)))
+        fields = self._decoder.unpack_from(message)
+        return (decode_identifier(fields[0]), decode_identifier(fields[1])) + fields[2:]
+
+
+class GenericSchemas:
+    '''
+    The messages every subsystem shares, declared once per protocol type.
+    '''
+    __slots__ = ('pdi_version_check', 'initialization_request')
+
+    def __init__(self, protocol_type: bytes, prefix: str = ''):
+        '''
+        :param protocol_type: the protocol type of the subsystem
+        :param prefix: prefix of the message names, keeps the names unique across the protocol types
+        '''
+        self.pdi_version_check = MessageSchema(prefix + 'pdi_version_check', protocol_type, bytes.fromhex('2400'), (
+            Field('pdi_version', value=bytes.fromhex('01')),
+        ))
+        self.initialization_request = MessageSchema(prefix + 'initialization_request', protocol_type, bytes.fromhex('2100'))
+
+    def __iter__(self):
+        return iter((self.pdi_version_check, self.initialization_request))
+
+
+GENERIC_SCHEMAS: Dict[bytes, GenericSchemas] = {
+    GENERIC_PROTOCOL: GenericSchemas(GENERIC_PROTOCOL),
+    SIGNAL_PROTOCOL: GenericSchemas(SIGNAL_PROTOCOL, 'signal_'),
+    POINT_PROTOCOL: GenericSchemas(POINT_PROTOCOL, 'point_'),
+    TRAIN_DETECTION_PROTOCOL: GenericSchemas(TRAIN_DETECTION_PROTOCOL, 'train_detection_'),
+}
+PDI_VERSION_CHECK, INITIALIZATION_REQUEST = GENERIC_SCHEMAS[GENERIC_PROTOCOL]
+
+
+def generic_schemas(protocol_type: bytes) -> GenericSchemas:
+    '''
+    get the schemas of the generic messages of a protocol type
+
+    :param protocol_type: the protocol type of the subsystem
+
+    returns GenericSchemas, schemas outside of SCHEMAS for a protocol type that is not declared
+    '''
+    schemas = GENERIC_SCHEMAS.get(protocol_type)
+    if schemas is None:
+        schemas = GenericSchemas(protocol_type)
+    return schemas
+
+
+_DARK = bytes.fromhex('FF')
+
+INDICATE_SIGNAL_ASPECT = MessageSchema('indicate_signal_aspect', SIGNAL_PROTOCOL, bytes.fromhex('0100'), (
+    Field('signal_aspect'),
+    Field('aspect_extension', value=bytes.fromhex('02')),
+    Field('speed_indicator', value=_DARK),                   # FF = intended dark
+    Field('speed_indicator_announcement', value=_DARK),      # FF = intended dark
+    Field('direction_indicator', value=_DARK),               # FF = intended dark
+    Field('direction_indicator_announcement', value=_DARK),  # FF = intended dark
+    Field('downgrade_information', value=_DARK),             # FF = not applicable
+    Field('route_information', value=_DARK),                 # FF = not applicable
+    Field('intentionally_dark', value=_DARK),                # FF = not applicable
+    Field('national_specified', 'bytes', 9, value=9 * bytes.fromhex('00')),
+))
+SET_LUMINOSITY = MessageSchema('set_luminosity', SIGNAL_PROTOCOL, bytes.fromhex('0002'), (Field('luminosity'),))
+
+MOVE_POINT = MessageSchema('move_point', POINT_PROTOCOL, bytes.fromhex('0100'), (Field('point_position'),))
+
+FC = MessageSchema('fc', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0001'), (Field('mode'),))
+UPDATE_FILLING_LEVEL = MessageSchema('update_filling_level', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0002'))
+DRFC = MessageSchema('drfc', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0003'))
+COMMAND_REJECTED = MessageSchema('command_rejected', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0006'), (Field('reason'),))
+OCCUPANCY_STATUS = MessageSchema('occupancy_status', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0007'), (
+    Field('occupancy_status'),
+    Field('force_clear_ability'),
+    Field('filling_level', 'uint16'),
+    Field('pom_state'),
+    Field('disturbance_state'),
+    Field('change_trigger'),
+))
+CANCEL = MessageSchema('cancel', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0008'))
+FCP_FAILED = MessageSchema('fcp_failed', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0010'), (Field('reason'),))
+FCPA_FAILED = MessageSchema('fcpa_failed', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0011'), (Field('reason'),))
+ADDITIONAL_INFORMATION = MessageSchema('additional_information', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('0012'), (
+    Field('speed', 'bcd16'),
+    Field('diameter', 'bcd16'),
+))
+TDP_STATUS = MessageSchema('tdp_status', TRAIN_DETECTION_PROTOCOL, bytes.fromhex('000B'), (
+    Field('passing_state'),
+    Field('passing_direction'),
+))
+
+# all fixed layout messages
+SCHEMAS: Tuple[MessageSchema, ...] = (
+    *(schema for schemas in GENERIC_SCHEMAS.values() for schema in schemas),
+    INDICATE_SIGNAL_ASPECT,
+    SET_LUMINOSITY,
+    MOVE_POINT,
+    FC,
+    UPDATE_FILLING_LEVEL,
+    DRFC,
+    COMMAND_REJECTED,
+    OCCUPANCY_STATUS,
+    CANCEL,
+    FCP_FAILED,
+    FCPA_FAILED,
+    ADDITIONAL_INFORMATION,
+    TDP_STATUS,
+)
+
+SCHEMAS_BY_KEY: Dict[bytes, MessageSchema] = {}
+SCHEMAS_BY_NAME: Dict[str, MessageSchema] = {}
+for _schema in SCHEMAS:
+    # two messages sharing a type would silently shadow each other in every handler table
+    if _schema.key in SCHEMAS_BY_KEY or _schema.name in SCHEMAS_BY_NAME:
+        raise ValueError("duplicate message schema: %r" % _schema)
+    SCHEMAS_BY_KEY[_schema.key] = _schema
+    SCHEMAS_BY_NAME[_schema.name] = _schema
+del _schema
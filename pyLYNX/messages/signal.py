@@ -1,5 +1,8 @@
-from ._generic import EulynxGeneric, EulynxGenericParser
-from typing import Callable
+from ._generic import EulynxGeneric, EulynxGenericHandle, EulynxGenericParser, decode_identifier
+from .schema import INDICATE_SIGNAL_ASPECT, SET_LUMINOSITY, SIGNAL_PROTOCOL
+from .views import IndicateSignalAspectView, SetLuminosityView, _call_view_callbacks
+from functools import partial
+from typing import Callable, Dict
 
 
 class EulynxSignalAspect:
@@ -20,8 +23,13 @@ class EulynxSignalLuminosity:
     deleted = bytes.fromhex('FE')
 
 
+class EulynxSignalMessageType:
+    indicate_signal_aspect = INDICATE_SIGNAL_ASPECT.message_type
+    set_luminosity = SET_LUMINOSITY.message_type
+
+
 class EulynxSignal(EulynxGeneric):
-    protocol_type = bytes.fromhex('30')
+    protocol_type = SIGNAL_PROTOCOL
 
     @classmethod
     def indicate_signal_aspect(cls, sender_id: str, receiver_id: str, signal_aspect: bytes) -> bytes:
@@ -33,37 +41,7 @@ class EulynxSignal(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0100')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        message += signal_aspect
-
-        message += bytes.fromhex('02')      # extension of basic aspect type
-        # speed indicator (FF = intendet dark)
-        message += bytes.fromhex('FF')
-        # speed indicator announcements (FF = intendet dark)
-        message += bytes.fromhex('FF')
-        # direction indicator (FF = intendet dark)
-        message += bytes.fromhex('FF')
-        # direction indicator announcements (FF = intendet dark)
-        message += bytes.fromhex('FF')
-        # downgrade information (FF = not applicable)
-        message += bytes.fromhex('FF')
-        # route information (FF = not applicable)
-        message += bytes.fromhex('FF')
-        # intentionally dark (FF = not applicable)
-        message += bytes.fromhex('FF')
-        message += 9 * bytes.fromhex('00')  # national specified
-
-        return message
+        return INDICATE_SIGNAL_ASPECT.encode(sender_id, receiver_id, signal_aspect)
 
     @classmethod
     def set_luminosity(cls, sender_id: str, receiver_id: str, luminosity: bytes) -> bytes:
@@ -75,26 +53,54 @@ class EulynxSignal(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type        # Protocol Type
-        message += bytes.fromhex('0002')    # Message Type
+        return SET_LUMINOSITY.encode(sender_id, receiver_id, luminosity)
+
+
+class EulynxSignalHandle(EulynxGenericHandle):
+    protocol_type = EulynxSignal.protocol_type
 
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
+    def indicate_signal_aspect(self, signal_aspect: bytes) -> bytes:
+        '''
+        get the command to indicate a signal aspect at the bound signal
 
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
+        :param signal_aspect: the signal aspect - see EulynxSignalAspect class
 
-        message += luminosity
+        returns bytes
+        '''
+        return self.telegram(INDICATE_SIGNAL_ASPECT, signal_aspect)
 
-        return message
+    def set_luminosity(self, luminosity: bytes) -> bytes:
+        '''
+        get the command to set the luminosity of the bound signal
+
+        :param luminosity: the luminosity - see EulynxSignalLuminosity class
+
+        returns bytes
+        '''
+        return self.telegram(SET_LUMINOSITY, luminosity)
 
 
 class EulynxSignalParser(EulynxGenericParser):
-    def __init__(self):
+    def __init__(self, views: bool = False):
+        '''
+        :param views: pass a lazy view of the message to the callbacks instead of the decoded fields, see pyLYNX.messages.views
+        '''
         self.indicate_signal_aspect_callbacks = []
         self.set_luminosity_callbacks = []
+        if views:
+            self._handlers = {
+                INDICATE_SIGNAL_ASPECT.key:
+                    partial(_call_view_callbacks, self.indicate_signal_aspect_callbacks, IndicateSignalAspectView),
+                SET_LUMINOSITY.key: partial(_call_view_callbacks, self.set_luminosity_callbacks, SetLuminosityView),
+            }
+        else:
+            self._handlers = {
+                INDICATE_SIGNAL_ASPECT.key: self._parse_indicate_signal_aspect,
+                SET_LUMINOSITY.key: self._parse_set_luminosity,
+            }
+
+    def message_handlers(self) -> Dict[bytes, Callable[[bytes], bool]]:
+        return self._handlers
 
     def parse_message(self, message: bytes) -> bool:
         '''
@@ -104,27 +110,38 @@ class EulynxSignalParser(EulynxGenericParser):
 
         returns True if the message could be parsed successfully, otherwise False
         '''
-        if (message[:3] == EulynxSignal.protocol_type + bytes.fromhex('0100')):
+        handler = self._handlers.get(message[:3])
+        return handler is not None and handler(message)
+
+    def _parse_indicate_signal_aspect(self, message: bytes) -> bool:
+        if self.indicate_signal_aspect_callbacks:
+            if len(message) < INDICATE_SIGNAL_ASPECT.length:
+                return False
+            sender, receiver, signal_aspect = INDICATE_SIGNAL_ASPECT.unpack_from(message)
+            sender = decode_identifier(sender)
+            receiver = decode_identifier(receiver)
+            signal_aspect = bytes((signal_aspect,))
             for func in self.indicate_signal_aspect_callbacks:
-                sender = message[3:23].decode('iso8859-1').rstrip("_")
-                receiver = message[23:43].decode('iso8859-1').rstrip("_")
-                func[0](sender, receiver, bytes([message[43]]), func[1])
-            return True
-
-        elif (message[:3] == EulynxSignal.protocol_type + bytes.fromhex('0002')):
-            for func in self.indicate_signal_aspect_callbacks:
-                sender = message[3:23].decode('iso8859-1').rstrip("_")
-                receiver = message[23:43].decode('iso8859-1').rstrip("_")
-                func[0](sender, receiver, message[43], func[1])
-            return True
-
-        return False
+                func[0](sender, receiver, signal_aspect, func[1])
+        return True
+
+    def _parse_set_luminosity(self, message: bytes) -> bool:
+        if self.set_luminosity_callbacks:
+            if len(message) < SET_LUMINOSITY.length:
+                return False
+            sender, receiver, luminosity = SET_LUMINOSITY.unpack_from(message)
+            sender = decode_identifier(sender)
+            receiver = decode_identifier(receiver)
+            for func in self.set_luminosity_callbacks:
+                func[0](sender, receiver, luminosity, func[1])
+        return True
 
     def register_indicate_signal_aspect_callback(self, function: Callable[[str, str, bytes, tuple], None], params: tuple) -> None:
         '''
         Register a callback function for the "indicate signal aspect" EULYNX Message.
 
-        :param function: callable that accepts four parameters: sender id, receiver id, basic signal aspect and tuple of parameters
+        :param function: callable that accepts four parameters: sender id, receiver id, basic signal aspect and tuple of parameters,
+                         or an IndicateSignalAspectView and the tuple of parameters if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -135,7 +152,8 @@ class EulynxSignalParser(EulynxGenericParser):
         '''
         Register a callback function for the "set luminosity" EULYNX Message.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, luminosity value and tuple of paramters
+        :param function: Callable that accepts three parameters: sender id, receiver id, luminosity value and tuple of paramters,
+                         or a SetLuminosityView and the tuple of parameters if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -1,5 +1,32 @@
-from ._generic import EulynxGeneric, EulynxGenericParser
-from typing import Callable
+from ._generic import HEADER_LENGTH, EulynxGeneric, EulynxGenericHandle, EulynxGenericParser, decode_identifier
+from .schema import (
+    ADDITIONAL_INFORMATION,
+    CANCEL,
+    COMMAND_REJECTED,
+    DRFC,
+    FC,
+    FCP_FAILED,
+    FCPA_FAILED,
+    OCCUPANCY_STATUS,
+    TDP_STATUS,
+    TRAIN_DETECTION_PROTOCOL,
+    UPDATE_FILLING_LEVEL,
+)
+from .views import (
+    AdditionalInformationView,
+    CancelView,
+    CommandRejectedView,
+    DRFCView,
+    FCPAFailedView,
+    FCPFailedView,
+    FCView,
+    OccupancyStatusView,
+    TDPStatusView,
+    UpdateFillingLevelView,
+    _call_view_callbacks,
+)
+from functools import partial
+from typing import Callable, Dict
 
 
 class TrainDetectionFCMode:
@@ -72,8 +99,25 @@ class TrainDetectionPassingDirection:
     NOT_INDICATED = bytes.fromhex('03')
 
 
+class TrainDetectionMessageType:
+    fc = FC.message_type
+    update_filling_level = UPDATE_FILLING_LEVEL.message_type
+    drfc = DRFC.message_type
+    command_rejected = COMMAND_REJECTED.message_type
+    occupancy_status = OCCUPANCY_STATUS.message_type
+    cancel = CANCEL.message_type
+    fcp_failed = FCP_FAILED.message_type
+    fcpa_failed = FCPA_FAILED.message_type
+    additional_information = ADDITIONAL_INFORMATION.message_type
+    tdp_status = TDP_STATUS.message_type
+
+
+def _filling_level(filling_level: int) -> int:
+    return 0xFFFF if filling_level < 0 else filling_level
+
+
 class EulynxTrainDetection(EulynxGeneric):
-    protocol_type = bytes.fromhex('20')
+    protocol_type = TRAIN_DETECTION_PROTOCOL
 
     @classmethod
     def fc(cls, sender_id: str, receiver_id: str, mode: bytes) -> bytes:
@@ -86,19 +130,7 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0001')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        message += mode
-        return message
+        return FC.encode(sender_id, receiver_id, mode)
 
     @classmethod
     def update_filling_level(cls, sender_id: str, receiver_id: str) -> bytes:
@@ -110,18 +142,7 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0002')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        return message
+        return UPDATE_FILLING_LEVEL.encode(sender_id, receiver_id)
 
     @classmethod
     def cancel(cls, sender_id: str, receiver_id: str) -> bytes:
@@ -133,18 +154,7 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0008')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        return message
+        return CANCEL.encode(sender_id, receiver_id)
 
     @classmethod
     def drfc(cls, sender_id: str, receiver_id: str) -> bytes:
@@ -156,18 +166,7 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0003')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        return message
+        return DRFC.encode(sender_id, receiver_id)
 
     @classmethod
     def occupancy_status(
@@ -195,28 +194,16 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0007')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        message += occupancy_status
-        message += force_clear_ability
-        if filling_level < 0:
-            message += bytes.fromhex('FFFF')
-        else:
-            message += filling_level.to_bytes(2, 'big')
-        message += pom_state
-        message += disturbance_state
-        message += change_trigger
-
-        return message
+        return OCCUPANCY_STATUS.encode(
+            sender_id,
+            receiver_id,
+            occupancy_status,
+            force_clear_ability,
+            _filling_level(filling_level),
+            pom_state,
+            disturbance_state,
+            change_trigger
+        )
 
     @classmethod
     def command_rejected(cls, sender_id: str, receiver_id: str, reason: bytes) -> bytes:
@@ -229,20 +216,7 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0006')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        message += reason
-
-        return message
+        return COMMAND_REJECTED.encode(sender_id, receiver_id, reason)
 
     @classmethod
     def fcp_failed(cls, sender_id: str, receiver_id: str, reason: bytes) -> bytes:
@@ -255,20 +229,7 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0010')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        message += reason
-
-        return message
+        return FCP_FAILED.encode(sender_id, receiver_id, reason)
 
     @classmethod
     def fcpa_failed(cls, sender_id: str, receiver_id: str, reason: bytes) -> bytes:
@@ -281,20 +242,7 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0011')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
-        message += reason
-
-        return message
+        return FCPA_FAILED.encode(sender_id, receiver_id, reason)
 
     @classmethod
     def additional_information(cls, sender_id: str, receiver_id: str, speed: bytes, diameter: bytes) -> bytes:
@@ -311,24 +259,9 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0011')    # Message Type
-
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
-
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
-
         assert (len(speed) == 2)
-        message += speed
-
         assert (len(diameter) == 2)
-        message += diameter
-
-        return message
+        return ADDITIONAL_INFORMATION.encode(sender_id, receiver_id, speed, diameter)
 
     @classmethod
     def tdp_status(cls, sender_id: str, receiver_id: str, passing_state: bytes, passing_direction: bytes) -> bytes:
@@ -342,25 +275,77 @@ class EulynxTrainDetection(EulynxGeneric):
 
         returns bytes 
         '''
-        message = cls.protocol_type       # Protocol Type
-        message += bytes.fromhex('0011')    # Message Type
+        return TDP_STATUS.encode(sender_id, receiver_id, passing_state, passing_direction)
+
+
+class EulynxTrainDetectionHandle(EulynxGenericHandle):
+    protocol_type = EulynxTrainDetection.protocol_type
+
+    def fc(self, mode: bytes) -> bytes:
+        '''
+        get the command to "Force section status to clear" for the bound TDS
 
-        # sender Identifier
-        sender_id = sender_id.encode('iso8859-1')
-        message += sender_id + ((20 - len(sender_id)) * bytes.fromhex('5f'))
+        :param mode: the FC mode - see TrainDetectionFCMode class
 
-        # receiver Identifier
-        receiver = receiver_id.encode('iso8859-1')
-        message += receiver + ((20 - len(receiver)) * bytes.fromhex('5f'))
+        returns bytes
+        '''
+        return self.telegram(FC, mode)
 
-        message += passing_state
-        message += passing_direction
+    def update_filling_level(self) -> bytes:
+        return self.telegram(UPDATE_FILLING_LEVEL)
 
-        return message
+    def cancel(self) -> bytes:
+        return self.telegram(CANCEL)
+
+    def drfc(self) -> bytes:
+        return self.telegram(DRFC)
+
+    def occupancy_status(
+        self,
+        occupancy_status: bytes,
+        force_clear_ability: bytes,
+        filling_level: int,
+        pom_state: bytes,
+        disturbance_state: bytes,
+        change_trigger: bytes
+    ) -> bytes:
+        '''
+        get the message to report the status of the bound TDS. The filling level is not
+        enumerated, so these telegrams are built from the cached header but not memoized.
+
+        returns bytes
+        '''
+        return self.build(
+            OCCUPANCY_STATUS,
+            occupancy_status,
+            force_clear_ability,
+            _filling_level(filling_level),
+            pom_state,
+            disturbance_state,
+            change_trigger
+        )
+
+    def command_rejected(self, reason: bytes) -> bytes:
+        return self.telegram(COMMAND_REJECTED, reason)
+
+    def fcp_failed(self, reason: bytes) -> bytes:
+        return self.telegram(FCP_FAILED, reason)
+
+    def fcpa_failed(self, reason: bytes) -> bytes:
+        return self.telegram(FCPA_FAILED, reason)
+
+    def additional_information(self, speed: bytes, diameter: bytes) -> bytes:
+        return self.build(ADDITIONAL_INFORMATION, speed, diameter)
+
+    def tdp_status(self, passing_state: bytes, passing_direction: bytes) -> bytes:
+        return self.build(TDP_STATUS, passing_state, passing_direction)
 
 
 class EulynxTrainDetectionParser(EulynxGenericParser):
-    def __init__(self):
+    def __init__(self, views: bool = False):
+        '''
+        :param views: pass a lazy view of the message to the callbacks instead of the decoded fields, see pyLYNX.messages.views
+        '''
         self.fc_callbacks = []
         self.update_filling_level_callbacks = []
         self.cancel_callbacks = []
@@ -371,6 +356,27 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         self.fcpa_failed_callbacks = []
         self.additional_information_callbacks = []
         self.tdp_status_callbacks = []
+        handlers = {
+            FC: (self._parse_fc, self.fc_callbacks, FCView),
+            UPDATE_FILLING_LEVEL: (self._parse_update_filling_level, self.update_filling_level_callbacks, UpdateFillingLevelView),
+            CANCEL: (self._parse_cancel, self.cancel_callbacks, CancelView),
+            DRFC: (self._parse_drfc, self.drfc_callbacks, DRFCView),
+            OCCUPANCY_STATUS: (self._parse_occupancy_status, self.occupancy_status_callbacks, OccupancyStatusView),
+            COMMAND_REJECTED: (self._parse_command_rejected, self.command_rejected_callbacks, CommandRejectedView),
+            FCP_FAILED: (self._parse_fcp_failed, self.fcp_failed_callbacks, FCPFailedView),
+            FCPA_FAILED: (self._parse_fcpa_failed, self.fcpa_failed_callbacks, FCPAFailedView),
+            ADDITIONAL_INFORMATION: (
+                self._parse_additional_information, self.additional_information_callbacks, AdditionalInformationView
+            ),
+            TDP_STATUS: (self._parse_tdp_status, self.tdp_status_callbacks, TDPStatusView),
+        }
+        self._handlers = {
+            schema.key: partial(_call_view_callbacks, callbacks, view) if views else handler
+            for schema, (handler, callbacks, view) in handlers.items()
+        }
+
+    def message_handlers(self) -> Dict[bytes, Callable[[bytes], bool]]:
+        return self._handlers
 
     def parse_message(self, message: bytes) -> bool:
         '''
@@ -380,68 +386,159 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
 
         returns True if the message could be parsed successfully, otherwise False
         '''
-        if (len(message) > 42 and message[0].to_bytes(1,'big') == EulynxTrainDetection.protocol_type):
-            sender = message[3:23].decode('iso8859-1').rstrip("_")
-            receiver = message[23:43].decode('iso8859-1').rstrip("_")
-
-            if (message[1:3] == bytes.fromhex('0001')):
-                for func in self.fc_callbacks:
-                    func[0](sender, receiver, message[43], func[1])
-                return True
-            elif (message[1:3] == bytes.fromhex('0002')):
-                for func in self.update_filling_level_callbacks:
-                    func[0](sender, receiver, func[1])
-                return True
-            elif (message[1:3] == bytes.fromhex('0008')):
-                for func in self.cancel_callbacks:
-                    func[0](sender, receiver, func[1])
-                return True
-            elif (message[1:3] == bytes.fromhex('0003')):
-                for func in self.drfc_callbacks:
-                    func[0](sender, receiver, func[1])
-                return True
-            elif (message[1:3] == bytes.fromhex('0007')):
-                for func in self.occupancy_status_callbacks:
-                    func[0](
-                        sender,
-                        receiver,
-                        message[43],
-                        message[44],
-                        int.from_bytes(message[45:47], 'big'),
-                        message[47],
-                        message[48],
-                        message[49],
-                        func[1]
-                    )
-                return True
-            elif (message[1:3] == bytes.fromhex('0006')):
-                for func in self.command_rejected_callbacks:
-                    func[0](sender, receiver, message[43], func[1])
-                return True
-            elif (message[1:3] == bytes.fromhex('0010')):
-                for func in self.fcp_failed_callbacks:
-                    func[0](sender, receiver, message[43], func[1])
-                return True
-            elif (message[1:3] == bytes.fromhex('0011')):
-                for func in self.fcpa_failed_callbacks:
-                    func[0](sender, receiver, message[43], func[1])
-                return True
-            elif (message[1:3] == bytes.fromhex('0012')):
-                for func in self.additional_information_callbacks:
-                    func[0](sender, receiver, message[43:45], message[45:], func[1])
-                return True
-            elif (message[1:3] == bytes.fromhex('000B')):
-                for func in self.fcp_failed_callbacks:
-                    func[0](sender, receiver, message[43], message[44], func[1])
-                return True
-
-        return False
+        if len(message) < HEADER_LENGTH:
+            return False
+        handler = self._handlers.get(message[:3])
+        return handler is not None and handler(message)
+
+    def _parse_fc(self, message: bytes) -> bool:
+        callbacks = self.fc_callbacks
+        if not callbacks:
+            return True
+        if len(message) < FC.length:
+            return False
+        sender, receiver, mode = FC.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, mode, func[1])
+        return True
+
+    def _parse_update_filling_level(self, message: bytes) -> bool:
+        callbacks = self.update_filling_level_callbacks
+        if not callbacks:
+            return True
+        if len(message) < UPDATE_FILLING_LEVEL.length:
+            return False
+        sender, receiver = UPDATE_FILLING_LEVEL.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, func[1])
+        return True
+
+    def _parse_cancel(self, message: bytes) -> bool:
+        callbacks = self.cancel_callbacks
+        if not callbacks:
+            return True
+        if len(message) < CANCEL.length:
+            return False
+        sender, receiver = CANCEL.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, func[1])
+        return True
+
+    def _parse_drfc(self, message: bytes) -> bool:
+        callbacks = self.drfc_callbacks
+        if not callbacks:
+            return True
+        if len(message) < DRFC.length:
+            return False
+        sender, receiver = DRFC.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, func[1])
+        return True
+
+    def _parse_occupancy_status(self, message: bytes) -> bool:
+        callbacks = self.occupancy_status_callbacks
+        if not callbacks:
+            return True
+        if len(message) < OCCUPANCY_STATUS.length:
+            return False
+        (
+            sender, receiver, occupancy_status, force_clear_ability, filling_level, pom_state, disturbance_state, change_trigger
+        ) = OCCUPANCY_STATUS.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](
+                sender,
+                receiver,
+                occupancy_status,
+                force_clear_ability,
+                filling_level,
+                pom_state,
+                disturbance_state,
+                change_trigger,
+                func[1]
+            )
+        return True
+
+    def _parse_command_rejected(self, message: bytes) -> bool:
+        callbacks = self.command_rejected_callbacks
+        if not callbacks:
+            return True
+        if len(message) < COMMAND_REJECTED.length:
+            return False
+        sender, receiver, reason = COMMAND_REJECTED.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, reason, func[1])
+        return True
+
+    def _parse_fcp_failed(self, message: bytes) -> bool:
+        callbacks = self.fcp_failed_callbacks
+        if not callbacks:
+            return True
+        if len(message) < FCP_FAILED.length:
+            return False
+        sender, receiver, reason = FCP_FAILED.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, reason, func[1])
+        return True
+
+    def _parse_fcpa_failed(self, message: bytes) -> bool:
+        callbacks = self.fcpa_failed_callbacks
+        if not callbacks:
+            return True
+        if len(message) < FCPA_FAILED.length:
+            return False
+        sender, receiver, reason = FCPA_FAILED.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, reason, func[1])
+        return True
+
+    def _parse_additional_information(self, message: bytes) -> bool:
+        callbacks = self.additional_information_callbacks
+        if not callbacks:
+            return True
+        if len(message) < ADDITIONAL_INFORMATION.length:
+            return False
+        sender, receiver, speed, diameter = ADDITIONAL_INFORMATION.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, speed, diameter, func[1])
+        return True
+
+    def _parse_tdp_status(self, message: bytes) -> bool:
+        callbacks = self.tdp_status_callbacks
+        if not callbacks:
+            return True
+        if len(message) < TDP_STATUS.length:
+            return False
+        sender, receiver, passing_state, passing_direction = TDP_STATUS.unpack_from(message)
+        sender = decode_identifier(sender)
+        receiver = decode_identifier(receiver)
+        for func in callbacks:
+            func[0](sender, receiver, passing_state, passing_direction, func[1])
+        return True
 
     def register_fc_callback(self, function: Callable[[str, str, bytes, tuple], None], params: tuple) -> None:
         '''
         Register a callback function for the "FC" EULYNX Command.
 
-        :param function: Callable that accepts four parameters: sender id, receiver id, fc mode, params
+        :param function: Callable that accepts four parameters: sender id, receiver id, fc mode,
+                         or a FCView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -452,7 +549,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "Update Filling Level" EULYNX Command.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, params
+        :param function: Callable that accepts three parameters: sender id, receiver id,
+                         or a UpdateFillingLevelView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -463,7 +561,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "Cancel" EULYNX Command.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, params
+        :param function: Callable that accepts three parameters: sender id, receiver id,
+                         or a CancelView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -474,7 +573,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "DRFC" EULYNX Command.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, params
+        :param function: Callable that accepts three parameters: sender id, receiver id,
+                         or a DRFCView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -485,7 +585,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "TVPS Occupancy Status" EULYNX Message.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, occupancy status, force clear ability, filling level, POM Status, Disturbance Status, Change Trigger
+        :param function: Callable that accepts three parameters: sender id, receiver id, occupancy status, force clear ability, filling level, POM Status, Disturbance Status, Change Trigger,
+                         or an OccupancyStatusView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -496,7 +597,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "Command Rejected" EULYNX Message.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, rejection reason, params
+        :param function: Callable that accepts three parameters: sender id, receiver id, rejection reason,
+                         or a CommandRejectedView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -507,7 +609,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "TVPS FC-P failed" EULYNX Message.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, failure reason, params
+        :param function: Callable that accepts three parameters: sender id, receiver id, failure reason,
+                         or a FCPFailedView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -518,7 +621,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "TVPS FC-P-A failed" EULYNX Message.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, failure reason, params
+        :param function: Callable that accepts three parameters: sender id, receiver id, failure reason,
+                         or a FCPAFailedView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -529,7 +633,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "Additional Information" EULYNX Message.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, speed, wheel diameter, params
+        :param function: Callable that accepts three parameters: sender id, receiver id, speed, wheel diameter,
+                         or an AdditionalInformationView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
@@ -540,7 +645,8 @@ class EulynxTrainDetectionParser(EulynxGenericParser):
         '''
         Register a callback function for the "TDP Status" EULYNX Message.
 
-        :param function: Callable that accepts three parameters: sender id, receiver id, passing state, passing direction, params
+        :param function: Callable that accepts three parameters: sender id, receiver id, passing state, passing direction,
+                         or a TDPStatusView and params if the parser was created with views=True
         :param params: tuple of parameters passed to the callable
 
         returns None
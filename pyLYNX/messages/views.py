@@ -0,0 +1,200 @@
+'''
+Lazy views of received telegrams. A view keeps a reference to the raw telegram and
+decodes a field only when it is accessed, identifiers are decoded at most once.
+
+The telegram is not wrapped in a memoryview: the fields are returned as bytes or int,
+which copies the field from a bytes telegram as well as from a memoryview, and creating
+the memoryview made every view slower. A telegram passed as memoryview is sliced without copies.
+
+Parsers created with views=True pass one view per message to their callbacks instead
+of the decoded fields: function(view, params).
+'''
+from typing import Callable, List, Tuple, Union
+from ._generic import HEADER_LENGTH, decode_identifier
+from .schema import (
+    ADDITIONAL_INFORMATION,
+    CANCEL,
+    COMMAND_REJECTED,
+    DRFC,
+    FC,
+    FCP_FAILED,
+    FCPA_FAILED,
+    INDICATE_SIGNAL_ASPECT,
+    MOVE_POINT,
+    OCCUPANCY_STATUS,
+    SET_LUMINOSITY,
+    TDP_STATUS,
+    UPDATE_FILLING_LEVEL,
+    MessageSchema,
+)
+
+Telegram = Union[bytes, memoryview]
+
+_FILLING_LEVEL = OCCUPANCY_STATUS.offsets['filling_level']
+_SPEED = ADDITIONAL_INFORMATION.offsets['speed']
+_DIAMETER = ADDITIONAL_INFORMATION.offsets['diameter']
+
+
+class MessageView:
+    '''
+    View of the common header of a EULYNX telegram. One byte enum fields are returned as
+    one byte bytes objects, so they compare equal to the enum constants, e.g.
+    view.occupancy_status == TrainDetectionOccupancyState.OCCUPIED
+    '''
+    __slots__ = ('message', '_sender', '_receiver')
+    # minimum length of the telegram, shorter telegrams are not passed to the callbacks
+    length = HEADER_LENGTH
+
+    def __init__(self, message: Telegram):
+        '''
+        :param message: the raw telegram, it is referenced and not copied
+        '''
+        self.message = message
+        self._sender = None
+        self._receiver = None
+
+    def __repr__(self) -> str:
+        return '%s(sender=%r, receiver=%r)' % (type(self).__name__, self.sender, self.receiver)
+
+    @property
+    def raw(self) -> memoryview:
+        return memoryview(self.message)
+
+    @property
+    def protocol_type(self) -> bytes:
+        return bytes(self.message[0:1])
+
+    @property
+    def message_type(self) -> bytes:
+        return bytes(self.message[1:3])
+
+    @property
+    def sender_field(self) -> bytes:
+        return bytes(self.message[3:23])
+
+    @property
+    def receiver_field(self) -> bytes:
+        return bytes(self.message[23:43])
+
+    @property
+    def sender(self) -> str:
+        if self._sender is None:
+            self._sender = decode_identifier(bytes(self.message[3:23]))
+        return self._sender
+
+    @property
+    def receiver(self) -> str:
+        if self._receiver is None:
+            self._receiver = decode_identifier(bytes(self.message[23:43]))
+        return self._receiver
+
+
+def _enum_field(schema: MessageSchema, name: str, doc: str) -> property:
+    offset = schema.offsets[name]
+    end = offset + 1
+    return property(lambda view: bytes(view.message[offset:end]), doc=doc)
+
+
+class IndicateSignalAspectView(MessageView):
+    __slots__ = ()
+    length = INDICATE_SIGNAL_ASPECT.length
+    signal_aspect = _enum_field(INDICATE_SIGNAL_ASPECT, 'signal_aspect', 'basic signal aspect - see EulynxSignalAspect class')
+
+
+class SetLuminosityView(MessageView):
+    __slots__ = ()
+    length = SET_LUMINOSITY.length
+    luminosity = _enum_field(SET_LUMINOSITY, 'luminosity', 'luminosity - see EulynxSignalLuminosity class')
+
+
+class MovePointView(MessageView):
+    __slots__ = ()
+    length = MOVE_POINT.length
+    point_position = _enum_field(MOVE_POINT, 'point_position', 'target position - see PointPosition class')
+
+
+class FCView(MessageView):
+    __slots__ = ()
+    length = FC.length
+    mode = _enum_field(FC, 'mode', 'the FC mode - see TrainDetectionFCMode class')
+
+
+class UpdateFillingLevelView(MessageView):
+    __slots__ = ()
+    length = UPDATE_FILLING_LEVEL.length
+
+
+class CancelView(MessageView):
+    __slots__ = ()
+    length = CANCEL.length
+
+
+class DRFCView(MessageView):
+    __slots__ = ()
+    length = DRFC.length
+
+
+class OccupancyStatusView(MessageView):
+    __slots__ = ()
+    length = OCCUPANCY_STATUS.length
+    occupancy_status = _enum_field(OCCUPANCY_STATUS, 'occupancy_status', 'see TrainDetectionOccupancyState class')
+    force_clear_ability = _enum_field(OCCUPANCY_STATUS, 'force_clear_ability', 'see TrainDetectionForceClearAbility class')
+    pom_state = _enum_field(OCCUPANCY_STATUS, 'pom_state', 'see TrainDetectionPOMState class')
+    disturbance_state = _enum_field(OCCUPANCY_STATUS, 'disturbance_state', 'see TrainDetectionDisturbanceState class')
+    change_trigger = _enum_field(OCCUPANCY_STATUS, 'change_trigger', 'see TrainDetectionChangeTrigger class')
+
+    @property
+    def filling_level(self) -> int:
+        '''the filling level, 65535 if not applicable'''
+        return int.from_bytes(self.message[_FILLING_LEVEL:_FILLING_LEVEL + 2], 'big')
+
+
+class CommandRejectedView(MessageView):
+    __slots__ = ()
+    length = COMMAND_REJECTED.length
+    reason = _enum_field(COMMAND_REJECTED, 'reason', 'see TrainDetectionRejectionReason class')
+
+
+class FCPFailedView(MessageView):
+    __slots__ = ()
+    length = FCP_FAILED.length
+    reason = _enum_field(FCP_FAILED, 'reason', 'see TrainDetectionFCFailedReason class')
+
+
+class FCPAFailedView(MessageView):
+    __slots__ = ()
+    length = FCPA_FAILED.length
+    reason = _enum_field(FCPA_FAILED, 'reason', 'see TrainDetectionFCFailedReason class')
+
+
+class AdditionalInformationView(MessageView):
+    __slots__ = ()
+    length = ADDITIONAL_INFORMATION.length
+
+    @property
+    def speed(self) -> bytes:
+        '''measured vehicle speed, BCD encoded (2 bytes)'''
+        return bytes(self.message[_SPEED:_SPEED + 2])
+
+    @property
+    def diameter(self) -> bytes:
+        '''wheel diameter, BCD encoded (2 bytes)'''
+        return bytes(self.message[_DIAMETER:_DIAMETER + 2])
+
+
+class TDPStatusView(MessageView):
+    __slots__ = ()
+    length = TDP_STATUS.length
+    passing_state = _enum_field(TDP_STATUS, 'passing_state', 'see TrainDetectionPassingState class')
+    passing_direction = _enum_field(TDP_STATUS, 'passing_direction', 'see TrainDetectionPassingDirection class')
+
+
+def _call_view_callbacks(callbacks: List[Tuple[Callable, tuple]], view_type: type, message: Telegram) -> bool:
+    if callbacks:
+        # like the parsers without views, a truncated telegram is not parsed
+        if len(message) < view_type.length:
+            return False
+        view = view_type(message)
+        for function, params in callbacks:
+            function(view, params)
+    return True
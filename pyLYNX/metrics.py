@@ -0,0 +1,284 @@
+import multiprocessing
+import time
+
+from typing import Dict, Iterable, List, Tuple
+
+# type and help text of the queue metrics, see BoundedQueue.snapshot
+QUEUE_METRICS: Dict[str, Tuple[str, str]] = {
+    'depth': ('gauge', 'Messages in the queue'),
+    'high_water': ('gauge', 'Highest number of messages that were in the queue'),
+    'drops': ('counter', 'Messages dropped or refused because the queue was full'),
+    'capacity': ('gauge', 'Capacity of the queue, 0 for unbounded'),
+}
+
+# type and help text of the callback executor metrics, per shard
+SHARD_METRICS: Dict[str, Tuple[str, str]] = dict(QUEUE_METRICS, **{
+    'processed': ('counter', 'Messages processed by the shard'),
+    'errors': ('counter', 'Callbacks of the shard that raised an exception'),
+    'wait_mean': ('gauge', 'Mean time in seconds messages waited in the shard queue'),
+    'wait_max': ('gauge', 'Longest time in seconds a message waited in the shard queue'),
+    'callback_mean': ('gauge', 'Mean time in seconds spent in the callbacks of a message'),
+    'callback_max': ('gauge', 'Longest time in seconds spent in the callbacks of a message'),
+})
+
+# type and help text of the scheduler metrics
+SCHEDULER_METRICS: Dict[str, Tuple[str, str]] = {
+    'jobs': ('gauge', 'Registered recurring jobs'),
+    'sent': ('counter', 'Telegrams sent by the scheduler'),
+    'errors': ('counter', 'Scheduled sends that raised an exception'),
+    'lag_mean': ('gauge', 'Mean delay in seconds of the scheduler ticks'),
+    'lag_max': ('gauge', 'Longest delay in seconds of a scheduler tick'),
+}
+
+
+def _sample_value(value: float) -> str:
+    return '%d' % value if isinstance(value, int) else repr(float(value))
+
+
+def prometheus_family(name: str, kind: str, description: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    '''
+    export a metric family in the Prometheus text format
+
+    :param name: the metric name
+    :param kind: the metric type, e.g. "gauge" or "counter"
+    :param description: the help text
+    :param samples: labels and value of every series of the family
+
+    returns list of lines
+    '''
+    lines = ['# HELP %s %s' % (name, description), '# TYPE %s %s' % (name, kind)]
+    for labels, value in samples:
+        label = ','.join('%s="%s"' % item for item in labels.items())
+        lines.append('%s%s %s' % (name, '{%s}' % label if label else '', _sample_value(value)))
+    return lines
+
+
+class LatencyStats:
+    '''
+    Running count, mean, minimum and maximum of latencies in seconds.
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, latency: float) -> None:
+        self.count += 1
+        self.total += latency
+        self.last = latency
+        if latency < self.min:
+            self.min = latency
+        if latency > self.max:
+            self.max = latency
+
+    def snapshot(self) -> Dict[str, float]:
+        '''
+        get the current statistics
+
+        returns dict with count and mean, min, max and last latency in seconds
+        '''
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'last': self.last,
+        }
+
+
+# HDR style log-linear buckets over microseconds: values below 64 us have their own bucket,
+# above that every power of two is split into 32 buckets (about 3 % relative precision)
+_SUB_BUCKETS = 32
+_LINEAR_LIMIT = 2 * _SUB_BUCKETS
+_MAX_SHIFT = 30
+_BUCKETS = _LINEAR_LIMIT + _MAX_SHIFT * _SUB_BUCKETS
+_COUNT = _BUCKETS
+_SUM = _BUCKETS + 1
+_MAX = _BUCKETS + 2
+
+
+def _bucket_index(microseconds: int) -> int:
+    if microseconds < _LINEAR_LIMIT:
+        return microseconds if microseconds > 0 else 0
+    shift = microseconds.bit_length() - 6
+    if shift > _MAX_SHIFT:
+        return _BUCKETS - 1
+    return _LINEAR_LIMIT + (shift - 1) * _SUB_BUCKETS + (microseconds >> shift) - _SUB_BUCKETS
+
+
+def _bucket_upper_bound(index: int) -> int:
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = (index - _LINEAR_LIMIT) // _SUB_BUCKETS + 1
+    mantissa = (index - _LINEAR_LIMIT) % _SUB_BUCKETS + _SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+# le boundaries of the exported buckets: powers of two from 64 us to about 16 s with the index of the
+# log-linear bucket starting there, the buckets below it are summed up for the cumulative count
+_EXPORT_BOUNDS = [(microseconds / 1000000, _bucket_index(microseconds)) for microseconds in (1 << shift for shift in range(6, 25))]
+
+
+class LatencyHistogram:
+    '''
+    Latency histogram with log-linear microsecond buckets in shared memory, so the
+    grpc subprocess can record values that the main process reads. Recording does not
+    lock, concurrent records from several threads may rarely lose a count.
+    '''
+    def __init__(self):
+        self._counts = multiprocessing.Array('Q', _BUCKETS + 3, lock=False)
+
+    def record(self, latency: float) -> None:
+        '''
+        record a latency
+
+        :param latency: the latency in seconds
+
+        returns None
+        '''
+        microseconds = int(latency * 1000000)
+        if microseconds < 0:
+            microseconds = 0
+        counts = self._counts
+        counts[_bucket_index(microseconds)] += 1
+        counts[_COUNT] += 1
+        counts[_SUM] += microseconds
+        if microseconds > counts[_MAX]:
+            counts[_MAX] = microseconds
+
+    @property
+    def count(self) -> int:
+        return self._counts[_COUNT]
+
+    def reset(self) -> None:
+        counts = self._counts
+        for index in range(len(counts)):
+            counts[index] = 0
+
+    def percentile(self, percentile: float) -> float:
+        '''
+        get the upper bound of the bucket containing the given percentile
+
+        :param percentile: percentile between 0 and 100
+
+        returns latency in seconds
+        '''
+        counts = self._counts[:_BUCKETS]
+        total = sum(counts)
+        if not total:
+            return 0.0
+        threshold = total * percentile / 100
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= threshold:
+                return min(_bucket_upper_bound(index), self._counts[_MAX]) / 1000000
+        return self._counts[_MAX] / 1000000
+
+    def snapshot(self) -> Dict[str, float]:
+        '''
+        get count, mean, maximum and percentiles
+
+        returns dict with count and latencies in seconds
+        '''
+        count = self._counts[_COUNT]
+        return {
+            'count': count,
+            'mean': self._counts[_SUM] / count / 1000000 if count else 0.0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+            'max': self._counts[_MAX] / 1000000,
+        }
+
+    def prometheus(self, name: str, labels: Dict[str, str] = None, header: bool = True, description: str = None) -> List[str]:
+        '''
+        export the histogram in the Prometheus text format. The fine buckets are summed up into a
+        fixed set of buckets, powers of two from 64 us to about 16 s, so the series of a scrape
+        are few and the same whatever was recorded.
+
+        :param name: the metric name
+        :param labels: labels of the series, e.g. {"lane": "0"} for one histogram of a metric family
+        :param header: start with the HELP and TYPE lines, only the first series of a metric family has them
+        :param description: the help text, defaults to the name
+
+        returns list of lines
+        '''
+        label = ''.join('%s="%s",' % item for item in (labels or {}).items())
+        series = '{%s}' % label[:-1] if label else ''
+        lines = ['# HELP %s %s' % (name, description or name), '# TYPE %s histogram' % name] if header else []
+        counts = self._counts[:_BUCKETS]
+        cumulative = 0
+        start = 0
+        for bound, end in _EXPORT_BOUNDS:
+            cumulative += sum(counts[start:end])
+            start = end
+            lines.append('%s_bucket{%sle="%r"} %d' % (name, label, bound, cumulative))
+        cumulative += sum(counts[start:])
+        lines.append('%s_bucket{%sle="+Inf"} %d' % (name, label, cumulative))
+        lines.append('%s_sum%s %g' % (name, series, self._counts[_SUM] / 1000000))
+        lines.append('%s_count%s %d' % (name, series, cumulative))
+        return lines
+
+
+class LatencyTracer:
+    '''
+    Latency histograms and throughput of the stages a telegram passes through pyLYNX:
+
+        outbound_queue   send_message until the servicer takes the message from the queue
+        outbound_stream  servicer dequeue until the message is yielded to grpc
+        outbound_total   send_message until the message is yielded to grpc
+        inbound_queue    arrival in the servicer until dispatch to the parsers
+        callback         time spent in the parsers and their callbacks
+    '''
+    STAGES = ('outbound_queue', 'outbound_stream', 'outbound_total', 'inbound_queue', 'callback')
+    DESCRIPTIONS = {
+        'outbound_queue': 'Seconds from send_message until the grpc server takes the message from the queue',
+        'outbound_stream': 'Seconds from the grpc server taking the message until it is yielded to grpc',
+        'outbound_total': 'Seconds from send_message until the message is yielded to grpc',
+        'inbound_queue': 'Seconds from the arrival of a message in the grpc server until it is dispatched',
+        'callback': 'Seconds spent in the parsers and their callbacks',
+    }
+
+    def __init__(self):
+        self.started = time.monotonic()
+        for stage in self.STAGES:
+            setattr(self, stage, LatencyHistogram())
+
+    def reset(self) -> None:
+        self.started = time.monotonic()
+        for stage in self.STAGES:
+            getattr(self, stage).reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        '''
+        get the statistics of every stage, including the throughput in messages per second
+
+        returns dict mapping stage names to statistics
+        '''
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        snapshot = {}
+        for stage in self.STAGES:
+            stats = getattr(self, stage).snapshot()
+            stats['rate'] = stats['count'] / elapsed
+            snapshot[stage] = stats
+        return snapshot
+
+    def prometheus(self, prefix: str = 'pylynx') -> str:
+        '''
+        export all stages in the Prometheus text format
+
+        :param prefix: prefix of the metric names
+
+        returns str
+        '''
+        lines = []
+        for stage in self.STAGES:
+            lines.extend(getattr(self, stage).prometheus('%s_%s_seconds' % (prefix, stage), description=self.DESCRIPTIONS[stage]))
+        return '\n'.join(lines) + '\n'
@@ -1,62 +1,743 @@
 import grpc
 import logging
 import multiprocessing
+import queue
+import random
 import time
 import signal
 import threading
 
-from concurrent.futures import ThreadPoolExecutor
-from itertools import chain
-from .messages._generic import EulynxGenericParser
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, Iterator, List, Sequence, Tuple, Union
+from ._dispatch import _ParserRegistry
+from ._executor import _ShardedExecutor
+from ._outbound import PRIORITY_MESSAGES, SUPERSEDABLE_MESSAGES, _CoalescingQueue
+from ._queues import BoundedQueue
+from ._ring import SharedRingQueue
+from .capture import CaptureDirection, CaptureWriter
+from .commands import _CommandTracker
+from .metrics import QUEUE_METRICS, SCHEDULER_METRICS, SHARD_METRICS, LatencyHistogram, LatencyStats, LatencyTracer, prometheus_family
+from .scheduler import TelegramScheduler
+from .messages._generic import encode_identifier
 from .proto.rasta_pb2 import SciPacket
-from .proto.rasta_pb2_grpc import RastaServicer, add_RastaServicer_to_server
+from .proto.rasta_pb2_grpc import RastaServicer, RastaStub, add_RastaServicer_to_server
+
+try:
+    from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+except ImportError:
+    health = None
 
 stop_servicer = False
+# seconds the streams get to finish on close if no timeout is given
+_STOP_GRACE = 1.0
+# service name of the health status, next to the overall status ""
+_HEALTH_SERVICE = "sci.Rasta"
+# seconds between checks for a stop request while a bridge client waits for its channel
+_READY_POLL = 0.1
+# queued behind the received messages of a parse worker to stop it
+_STOP_WORKER = (b'', -1.0)
+# queued by the grpc process behind the messages it sent unparsed, once it feeds the parse workers again
+_RESUMED = ([], None)
+# seconds the grpc process gets to confirm that it feeds the parse workers again
+_RESUME_TIMEOUT = 5.0
+# results passed to pyLYNX.emit in a parse worker process, sent to the parent with the parsed messages
+_worker_results: List = None
+_COMPRESSION = {
+    None: grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
    
 
+def _peer_host(peer: str) -> str:
+    # grpc peers look like "ipv4:10.151.3.10:50051" or "ipv6:[::1]:50051"
+    address = peer.split(":", 1)[-1]
+    return address.rsplit(":", 1)[0].strip("[]")
+
+
+class _StreamConnection:
+    def __init__(
+        self,
+        peer: str,
+        supersedable: FrozenSet[bytes],
+        on_superseded: Callable[[], None],
+        resend: bool = False,
+        lanes: int = 1,
+        lane_weights: Sequence[int] = None
+    ):
+        self.peer = peer
+        self.host = _peer_host(peer)
+        self.queue = _CoalescingQueue(supersedable, on_superseded, lanes, lane_weights)
+        self.in_flight: Tuple[bytes, float] = None
+        # send the message grpc held when the stream failed again on another stream
+        self.resend = resend
+        self.finished = threading.Event()
+
+
 class _RastaElement(RastaServicer):
-        def __init__(self, message_queue, response_queue):
-             self.message_queue = message_queue
-             self.response_queue = response_queue
+    def __init__(
+        self,
+        message_queue,
+        response_queue,
+        routes: Dict[str, str] = None,
+        supersedable: FrozenSet[bytes] = frozenset(),
+        tracer: LatencyTracer = None,
+        capture: CaptureWriter = None,
+        events: multiprocessing.Queue = None,
+        shards: List[BoundedQueue] = None,
+        sharding: multiprocessing.Event = None,
+        sharding_request: multiprocessing.Event = None,
+        sharding_changed: multiprocessing.Event = None,
+        lanes: int = 1,
+        lane_weights: Sequence[int] = None,
+        lane_latency: List[LatencyHistogram] = None
+    ):
+        self.message_queue = message_queue
+        self.response_queue = response_queue
+        self.shards = shards
+        # cleared while the parse workers are stopped, the received messages then go to the parent unparsed
+        self.sharding = sharding
+        # the parent asks to stop or resume feeding the shards, this process queues the markers and acknowledges,
+        # it is the only producer of the shards
+        self.sharding_request = sharding_request
+        self.sharding_changed = sharding_changed
+        self._shard_lock = threading.Lock()
+        self._put_inbound = self._put_sharded if shards else response_queue.put
+        self.supersedable = supersedable
+        self.tracer = tracer
+        self.capture = capture
+        self.events = events
+        self.lanes = lanes
+        self.lane_weights = lane_weights
+        # time from send_message until a message leaves the queue of its stream, per lane
+        self.lane_latency = lane_latency
+        self.configured_routes: Dict[bytes, str] = {
+            encode_identifier(receiver): host for receiver, host in (routes or {}).items()
+        }
+        self.routes: Dict[bytes, _StreamConnection] = {}
+        self.streams: List[_StreamConnection] = []
+        self._parked: Deque[Tuple[bytes, float]] = deque()
+        self._lock = threading.Lock()
+        # the messages parked or queued for the streams are bounded by the outbound capacity as well
+        self.capacity = message_queue.capacity
+        self.policy = message_queue.policy
+        self._room = threading.Condition(self._lock)
 
-        def message_reader(self, request_iterator):
-            for request in request_iterator:
-                self.response_queue.put_nowait(request.message)
+    def start_router(self) -> None:
+        threading.Thread(target=self._router, daemon=True).start()
+
+    def start_shard_watch(self) -> None:
+        threading.Thread(target=self._shard_watch, daemon=True).start()
+
+    def _shard_watch(self) -> None:
+        while True:
+            self.sharding_request.wait()
+            with self._shard_lock:
+                # no stream reader is putting meanwhile, the markers are queued behind its last message
+                if self.sharding.is_set():
+                    self.sharding.clear()
+                    for shard in self.shards:
+                        shard.put_marker(_STOP_WORKER)
+                else:
+                    self.sharding.set()
+                    self.response_queue.put(_RESUMED)
+                self.sharding_request.clear()
+                self.sharding_changed.set()
+
+    def finish_streams(self) -> None:
+        # end the outbound streams after the messages already queued for them, the bridges see a regular end of the call
+        with self._lock:
+            for connection in self.streams:
+                connection.queue.put_nowait(None)
+
+    def _router(self) -> None:
+        # with drop_oldest the router discards the oldest held message, with the other policies the messages
+        # stay in the bounded queue until the streams took some, so send_message applies the policy
+        wait = self.capacity and self.policy != "drop_oldest"
+        drop = self.capacity and self.policy == "drop_oldest"
+        while True:
+            if wait:
+                with self._lock:
+                    while self._backlog() >= self.capacity:
+                        self._room.wait()
+            item = self.message_queue.get(True)
+            if self.tracer:
+                # remember when the servicer took the message, after the lane if there is one
+                item += (time.monotonic(),)
+            with self._lock:
+                self._forward(item)
+                if drop and self._backlog() > self.capacity:
+                    self._drop_oldest()
+
+    def _backlog(self) -> int:
+        # called with self._lock held
+        return len(self._parked) + sum(connection.queue.qsize() for connection in self.streams)
+
+    def _drop_oldest(self) -> None:
+        # called with self._lock held, the oldest message of the longest backlog is discarded
+        if self._parked:
+            self._parked.popleft()
+        else:
+            max(self.streams, key=lambda connection: connection.queue.qsize()).queue.drop_oldest()
+        self.message_queue.task_done()
+        self.message_queue._record_drop()
+
+    def _forward(self, item: Tuple[bytes, float]) -> None:
+        # called with self._lock held
+        connection = self.routes.get(item[0][23:43])
+        if connection is None:
+            if not self.streams:
+                self._parked.append(item)
+                return
+            connection = self.streams[0]
+        connection.queue.put_nowait(item)
+
+    def _connect(self, connection: _StreamConnection) -> None:
+        with self._lock:
+            self.streams.append(connection)
+            routed = []
+            for receiver, host in self.configured_routes.items():
+                if host == connection.host:
+                    self.routes[receiver] = connection
+                    routed.append(receiver)
+            parked, self._parked = self._parked, deque()
+            for item in parked:
+                self._forward(item)
+            if self.events:
+                self.events.put(("connect", connection.peer, routed))
+        logging.info("Bridge connected from " + connection.peer)
+
+    def _disconnect(self, connection: _StreamConnection) -> None:
+        with self._lock:
+            if connection not in self.streams:
+                return
+            self.streams.remove(connection)
+            if connection.in_flight is not None:
+                if connection.resend:
+                    self._forward(connection.in_flight)
+                else:
+                    # the stream ended while grpc held this message, it counts as sent
+                    self.message_queue.task_done()
+                connection.in_flight = None
+            unrouted = [receiver for receiver, routed in self.routes.items() if routed is connection]
+            for receiver in unrouted:
+                del self.routes[receiver]
+            if self.events:
+                self.events.put(("disconnect", connection.peer, unrouted))
 
-        def Stream(self, request_iterator, context):
-            threading.Thread(target=self.message_reader, args=(request_iterator,)).start()
             while True:
-                message = self.message_queue.get(True)
-                yield SciPacket(message=message)
-                logging.debug(message)
+                try:
+                    item = connection.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    self._forward(item)
+            connection.queue.put_nowait(None)
+        logging.info("Bridge disconnected from " + connection.peer)
+
+    def _connection(self, peer: str, resend: bool = False) -> _StreamConnection:
+        return _StreamConnection(peer, self.supersedable, self.message_queue.task_done, resend, self.lanes, self.lane_weights)
+
+    def _trace_outbound(self, item: Tuple[bytes, float, float]) -> None:
+        now = time.monotonic()
+        self.tracer.outbound_queue.record(item[-1] - item[1])
+        self.tracer.outbound_stream.record(now - item[-1])
+        self.tracer.outbound_total.record(now - item[1])
+
+    def _sent(self, connection: _StreamConnection) -> None:
+        with self._lock:
+            if connection.in_flight is not None:
+                connection.in_flight = None
                 self.message_queue.task_done()
+            if self.capacity:
+                self._room.notify()
+
+    def _learn_route(self, sender: bytes, connection: _StreamConnection) -> None:
+        with self._lock:
+            if connection in self.streams:
+                self.routes[sender] = connection
+                if self.events:
+                    self.events.put(("route", connection.peer, [sender]))
+
+    def _put_sharded(self, item: Tuple[bytes, float]) -> None:
+        with self._shard_lock:
+            if not self.sharding.is_set():
+                self.response_queue.put(([item], None))
+                return
+            # all telegrams of an element go to the same parse worker, which keeps them in order
+            self.shards[hash(item[0][3:23]) % len(self.shards)].put(item)
+
+    def message_reader(self, request_iterator, connection: _StreamConnection):
+        try:
+            for request in request_iterator:
+                message = request.message
+                if self.routes.get(message[3:23]) is not connection:
+                    self._learn_route(message[3:23], connection)
+                if self.capture:
+                    self.capture.write(CaptureDirection.inbound, message)
+                try:
+                    self._put_inbound((message, time.monotonic()))
+                except queue.Full:
+                    # the inbound queue counted the drop, the stream must keep being read
+                    pass
+        except grpc.RpcError:
+            pass
+
+    def Stream(self, request_iterator, context):
+        connection = self._connection(context.peer())
+        self._connect(connection)
+        context.add_callback(lambda: self._disconnect(connection))
+        threading.Thread(target=self.message_reader, args=(request_iterator, connection), daemon=True).start()
+        yield from self.outbound(connection)
+
+    def outbound(self, connection: _StreamConnection) -> Iterator[SciPacket]:
+        while True:
+            item = connection.queue.get(True)
+            if item is None:
+                connection.finished.set()
+                return
+            connection.in_flight = item
+            if self.lane_latency:
+                self.lane_latency[item[2]].record(time.monotonic() - item[1])
+            if self.tracer:
+                self._trace_outbound(item)
+            if self.capture:
+                self.capture.write(CaptureDirection.outbound, item[0])
+            yield SciPacket(message=item[0])
+            logging.debug(item[0])
+            self._sent(connection)
+
+
+class _BridgeClient:
+    '''
+    One pooled Stream call to a bridge that runs a grpc server, on its own channel. A failed call
+    is opened again with jittered exponential backoff. Meanwhile its messages, including the one
+    grpc held when the call failed, go to the other streams or are parked until a stream is connected.
+    '''
+    def __init__(self, element: _RastaElement, address: str, options: List[Tuple[str, Any]], compression: str, backoff: Tuple[float, float]):
+        self.element = element
+        self.address = address
+        self.peer = "bridge:" + address
+        self.channel = grpc.insecure_channel(address, options, _COMPRESSION[compression])
+        self.initial_backoff, self.max_backoff = backoff
+        self.random = random.Random()
+        self.call = None
+        self.connection: _StreamConnection = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def join(self, timeout: float) -> None:
+        connection = self.connection
+        if connection is not None:
+            # all messages are written once the outbound stream ended, the bridge may keep its side open
+            connection.queue.put_nowait(None)
+            connection.finished.wait(timeout)
+        call = self.call
+        if call is not None:
+            call.cancel()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stub = RastaStub(self.channel)
+        backoff = self.initial_backoff
+        while not self._stop.is_set():
+            ready = grpc.channel_ready_future(self.channel)
+            try:
+                # the channel reconnects on its own, with the backoff given in the channel options
+                ready.result(timeout=_READY_POLL)
+            except grpc.FutureTimeoutError:
+                ready.cancel()
+                continue
+            if self._stop.is_set():
+                return
+
+            element = self.element
+            connection = element._connection(self.peer, resend=True)
+            element._connect(connection)
+            opened = time.monotonic()
+            self.connection = connection
+            try:
+                self.call = stub.Stream(element.outbound(connection))
+                element.message_reader(self.call, connection)
+            finally:
+                self.call = None
+                self.connection = None
+                element._disconnect(connection)
+
+            if self._stop.is_set():
+                return
+            # a call that was up for a while starts over with the initial backoff
+            if time.monotonic() - opened > backoff:
+                backoff = self.initial_backoff
+            delay = self.random.uniform(backoff / 2, backoff)
+            backoff = min(2 * backoff, self.max_backoff)
+            logging.warning("Stream to bridge %s ended, reconnecting in %.2f seconds", self.address, delay)
+            self._stop.wait(delay)
+
+
+def _channel_options(
+    keepalive: float,
+    max_message_size: int,
+    backoff: Tuple[float, float],
+    extra: Dict[str, Any] = None
+) -> List[Tuple[str, Any]]:
+    options = {
+        "grpc.max_send_message_length": max_message_size,
+        "grpc.max_receive_message_length": max_message_size,
+        "grpc.initial_reconnect_backoff_ms": int(backoff[0] * 1000),
+        "grpc.min_reconnect_backoff_ms": int(backoff[0] * 1000),
+        "grpc.max_reconnect_backoff_ms": int(backoff[1] * 1000),
+        # every pooled stream gets its own connection, so one broken connection does not take down the pool
+        "grpc.use_local_subchannel_pool": 1,
+    }
+    if keepalive:
+        options.update({
+            "grpc.keepalive_time_ms": int(keepalive * 1000),
+            "grpc.keepalive_timeout_ms": int(min(keepalive, 20.0) * 1000),
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.http2.max_pings_without_data": 0,
+        })
+    options.update(extra or {})
+    return list(options.items())
+
+
+def _serve(
+    message_queue: BoundedQueue,
+    response_queue: BoundedQueue,
+    shards: List[BoundedQueue],
+    sharding: multiprocessing.Event,
+    sharding_request: multiprocessing.Event,
+    sharding_changed: multiprocessing.Event,
+    events: multiprocessing.Queue,
+    serving: multiprocessing.Event,
+    stop_requested: multiprocessing.Event,
+    stop_grace: multiprocessing.Value,
+    listen_addr: str,
+    bridges: List[str],
+    bridge_streams: int,
+    channel_options: List[Tuple[str, Any]],
+    compression: str,
+    reconnect_backoff: Tuple[float, float],
+    routes: Dict[str, str],
+    supersedable: FrozenSet[bytes],
+    tracer: LatencyTracer,
+    capture_path: str,
+    lanes: int,
+    lane_weights: Sequence[int],
+    lane_latency: List[LatencyHistogram]
+) -> None:
+    # target of the grpc process, it only gets picklable queues and configuration, so it also runs with spawn
+    logging.basicConfig(level=logging.INFO)
+    logging.info("Preparing Server...")
+    # connection events are only informative, do not block the exit if nobody reads them
+    events.cancel_join_thread()
+    server = grpc.server(ThreadPoolExecutor())
+    capture = CaptureWriter(capture_path) if capture_path else None
+    rasta_element = _RastaElement(
+        message_queue, response_queue, routes, supersedable, tracer, capture, events,
+        shards, sharding, sharding_request, sharding_changed, lanes, lane_weights, lane_latency
+    )
+    rasta_element.start_router()
+    if shards:
+        rasta_element.start_shard_watch()
+    health_servicer = None
+    if listen_addr:
+        add_RastaServicer_to_server(rasta_element, server)
+        if health is not None:
+            health_servicer = health.HealthServicer()
+            health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+        server.add_insecure_port(listen_addr)
+        logging.info("Starting Server...")
+        server.start()
+        if health_servicer is not None:
+            for service in ("", _HEALTH_SERVICE):
+                health_servicer.set(service, health_pb2.HealthCheckResponse.SERVING)
+        logging.info("Server running at " + listen_addr)
+    clients = [
+        _BridgeClient(rasta_element, address, channel_options, compression, reconnect_backoff)
+        for address in bridges for _ in range(bridge_streams)
+    ]
+    for client in clients:
+        client.start()
+    if clients:
+        logging.info("Connecting to bridges " + ", ".join(bridges))
+    serving.set()
+    stop_requested.wait()
+    if health_servicer is not None:
+        health_servicer.enter_graceful_shutdown()
+    for client in clients:
+        client.stop()
+    rasta_element.finish_streams()
+    deadline = time.monotonic() + stop_grace.value
+    for client in clients:
+        client.join(max(0.0, deadline - time.monotonic()))
+    server.stop(max(0.0, deadline - time.monotonic())).wait()
+
 
+def _parse_worker(registry: _ParserRegistry, shard: BoundedQueue, response_queue: BoundedQueue, batch_size: int) -> None:
+    # target of a parse worker process, stores and commands live in the parent, they are updated from the batches
+    global _worker_results
+    _worker_results = []
+    while True:
+        items = [shard.get()]
+        while len(items) < batch_size:
+            try:
+                items.append(shard.get_nowait())
+            except queue.Empty:
+                break
+        stop = _STOP_WORKER in items
+        unparsed = []
+        if stop:
+            # the messages behind the marker were queued while the workers stopped, the parent parses them
+            marker = items.index(_STOP_WORKER)
+            items, unparsed = items[:marker], items[marker + 1:]
+        for message, _ in items:
+            registry._dispatch(message)
+        results, _worker_results = _worker_results, []
+        if items or results:
+            response_queue.put((items, results))
+        if unparsed:
+            response_queue.put((unparsed, None))
+        for _ in range(len(items) + len(unparsed) + stop):
+            shard.task_done()
+        if stop:
+            return
 
-class pyLYNX:
-    def __init__(self, listen_addr: str):
+
+class pyLYNX(_ParserRegistry):
+    def __init__(
+        self,
+        listen_addr: str = None,
+        transport: str = "queue",
+        ring_capacity: int = 65536,
+        ring_slot_size: int = 128,
+        routes: Dict[str, str] = None,
+        coalesce: Union[bool, Iterable[bytes]] = False,
+        outbound_capacity: int = 0,
+        outbound_policy: str = "block",
+        inbound_capacity: int = 0,
+        inbound_policy: str = "block",
+        block_timeout: float = None,
+        tracing: bool = False,
+        capture_path: str = None,
+        parse_workers: int = 0,
+        bridges: Iterable[str] = None,
+        bridge_streams: int = 2,
+        keepalive: float = 10.0,
+        max_message_size: int = 65536,
+        compression: str = None,
+        reconnect_backoff: Tuple[float, float] = (0.1, 10.0),
+        channel_options: Dict[str, Any] = None,
+        lanes: int = 1,
+        lane_weights: Sequence[int] = None,
+        priorities: Union[bool, Dict[bytes, int]] = False
+    ):
         '''
         Constructor for pyLYNX class
 
-        @param listen_addr IP + Port where the underlying grpc server should listen
+        @param listen_addr IP + Port where the underlying grpc server should listen, None to only connect to bridges
+        @param transport how messages are exchanged with the grpc subprocess: "queue" (multiprocessing queues)
+                         or "shared_memory" (single-producer / single-consumer rings in shared memory)
+        @param ring_capacity number of messages each shared memory ring can hold, if no capacity is given below
+        @param ring_slot_size size of a ring slot in bytes, must exceed the longest message by 16 bytes
+        @param routes maps receiver ids to the host of the bridge serving them. Outbound messages are
+                      routed to the stream of that bridge. Routes are also learned from the sender of
+                      inbound messages, messages for unknown receivers go to the first connected bridge.
+        @param coalesce if True, a queued indicate signal aspect, set luminosity or move point command is
+                        replaced in place by a newer command of the same type to the same receiver.
+                        Alternatively the supersedable protocol type + message type keys can be given.
+        @param outbound_capacity maximum number of queued outbound messages, 0 for unbounded. The messages the
+                                 grpc process holds for the bridge streams, or parks until a bridge connects,
+                                 are bounded by the same capacity, up to 2 * outbound_capacity + 1 messages
+                                 can be waiting for a bridge
+        @param outbound_policy what send_message does if the outbound queue is full:
+                               "block", "drop_oldest", "drop_newest" or "raise" (queue.Full)
+        @param inbound_capacity maximum number of received messages waiting to be parsed, 0 for unbounded
+        @param inbound_policy what happens to received messages if the inbound queue is full, see outbound_policy.
+                              With "raise" and with "block" after block_timeout the message is dropped and counted,
+                              the stream is read on
+        @param block_timeout maximum time in seconds the "block" policy waits before raising queue.Full
+        @param tracing record latency histograms of every stage a message passes, see LatencyTracer
+        @param capture_path append every inbound and outbound telegram to this capture file, see pyLYNX.capture
+        @param parse_workers number of worker processes that parse the received messages, 0 parses them in this
+                             process. The messages are distributed by sender, see start_parse_workers
+        @param bridges addresses ("host:port") of bridges that run a grpc server themselves. pyLYNX connects to them
+                       as a client, with several streams per bridge that are reopened if they fail
+        @param bridge_streams number of pooled streams per bridge, each on its own connection. Messages go to
+                              the first stream, the others take over at once if it fails
+        @param keepalive seconds between keepalive pings on the bridge connections, detects dead links, 0 disables
+        @param max_message_size maximum size of a message on the bridge connections in bytes
+        @param compression compression of the bridge connections: None, "gzip" or "deflate"
+        @param reconnect_backoff initial and maximum delay in seconds before a failed bridge stream is reopened,
+                                 the delay doubles with every failure and is jittered
+        @param channel_options further grpc channel arguments of the bridge connections, they take precedence
+        @param lanes number of outbound priority lanes, lane 0 has the highest priority. Every stream keeps
+                     a queue per lane, so urgent commands do not wait behind bulk traffic queued for the stream.
+                     Raised to fit lane_weights and priorities
+        @param lane_weights None serves the lanes strictly by priority. Otherwise the non-empty lanes are served
+                            in proportion to their weights, so the lower lanes can not starve
+        @param priorities lane of each protocol type + message type key, messages without an entry go to the last
+                          lane. True puts indicate signal aspect and move point commands in lane 0.
+                          send_message can also set the lane of a single message
 
         @returns pyLYNX-Object
         '''
-        self.message_queue: multiprocessing.JoinableQueue = multiprocessing.JoinableQueue()
-        self.response_queue: multiprocessing.JoinableQueue = multiprocessing.JoinableQueue()
+        super().__init__()
+        if priorities is True:
+            priorities = PRIORITY_MESSAGES
+        self.priorities: Dict[bytes, int] = dict(priorities or {})
+        if self.priorities:
+            # the unlisted messages get a lane of their own below the listed ones
+            lanes = max(lanes, max(self.priorities.values()) + 2)
+        if lane_weights is not None:
+            lanes = max(lanes, len(lane_weights))
+            if len(lane_weights) != lanes or min(lane_weights) < 1:
+                raise ValueError("lane_weights needs a positive weight for each of the %d lanes" % lanes)
+            lane_weights = tuple(lane_weights)
+        if lanes > 256:
+            raise ValueError("at most 256 lanes are supported")
+        self.lanes = lanes
+        self.lane_weights = lane_weights
+        self._default_lane = lanes - 1
+        self.lane_latency: List[LatencyHistogram] = [LatencyHistogram() for _ in range(lanes)] if lanes > 1 else []
+        if transport == "shared_memory":
+            outbound_capacity = outbound_capacity or ring_capacity
+            inbound_capacity = inbound_capacity or ring_capacity
+        elif transport != "queue":
+            raise ValueError("unknown transport: " + transport)
+        self.transport = transport
+        self._queue_config = (
+            outbound_capacity, outbound_policy, inbound_capacity, inbound_policy, block_timeout, ring_slot_size, parse_workers
+        )
+        self._create_outbound_queue()
+        self._create_inbound_queues()
+        self.routes = routes
+        if coalesce is True:
+            self.supersedable = SUPERSEDABLE_MESSAGES
+        else:
+            self.supersedable = frozenset(coalesce or ())
         self.listen_addr = listen_addr
-        self.parsers = []
-        self.default_parser = None
+        if not listen_addr and not bridges:
+            raise ValueError("either listen_addr or bridges must be given")
+        if compression not in _COMPRESSION:
+            raise ValueError("unknown compression: " + str(compression))
+        self.bridges = list(bridges or ())
+        self.bridge_streams = bridge_streams
+        self.compression = compression
+        self.reconnect_backoff = reconnect_backoff
+        self.channel_options = _channel_options(keepalive, max_message_size, reconnect_backoff, channel_options)
+        self.dispatch_latency = LatencyStats()
+        self.tracer = LatencyTracer() if tracing else None
+        self.capture_path = capture_path
+        self._commands = _CommandTracker()
+        self._serving = multiprocessing.Event()
+        self._stop_requested = multiprocessing.Event()
+        self._stop_grace = multiprocessing.Value('d', _STOP_GRACE)
+        self._events: multiprocessing.Queue = None
+        # connected peers and routes as reported by the grpc process, kept current by the event reader thread
+        self._connected = threading.Condition()
+        self._peers: Dict[str, int] = {}
+        self._routed: Dict[bytes, str] = {}
+        self._event_reader: threading.Thread = None
+        self._event_reader_stop = threading.Event()
+        self._dispatcher: threading.Thread = None
+        self._executor: _ShardedExecutor = None
+        self._scheduler: TelegramScheduler = None
+        self._trace_lock = threading.Lock()
+        self.result_callbacks: List[Tuple[Callable, tuple]] = []
+        self._parse_workers: List[multiprocessing.Process] = []
+        self.subprocess: multiprocessing.Process = None
+        self._sharding = multiprocessing.Event()
+        self._sharding.set()
+        self._sharding_request = multiprocessing.Event()
+        self._sharding_changed = multiprocessing.Event()
+        # batches taken from the response queue while the parse workers stopped, parsed before the queue
+        self._received: Deque[Any] = deque()
+        self._dispatcher_stop = threading.Event()
+
+    def _create_outbound_queue(self) -> None:
+        outbound_capacity, outbound_policy, _, _, block_timeout, ring_slot_size, _ = self._queue_config
+        if self.transport == "queue":
+            message_queue = multiprocessing.JoinableQueue(outbound_capacity)
+        else:
+            message_queue = SharedRingQueue(outbound_capacity, ring_slot_size, outbound_policy == "drop_oldest", self.lanes > 1)
+        self.message_queue = BoundedQueue(message_queue, outbound_capacity, outbound_policy, block_timeout)
+
+    def _create_inbound_queues(self) -> None:
+        _, _, inbound_capacity, inbound_policy, block_timeout, ring_slot_size, parse_workers = self._queue_config
+        if self.transport == "queue":
+            inbound_queue = lambda: multiprocessing.JoinableQueue(inbound_capacity)
+        else:
+            inbound_queue = lambda: SharedRingQueue(inbound_capacity, ring_slot_size, inbound_policy == "drop_oldest")
+        self.parse_shards: List[BoundedQueue] = [
+            BoundedQueue(inbound_queue(), inbound_capacity, inbound_policy, block_timeout) for _ in range(parse_workers)
+        ]
+        if self.parse_shards:
+            # the workers send batches of parsed telegrams and results of the callbacks
+            self.response_queue = BoundedQueue(multiprocessing.JoinableQueue())
+        else:
+            self.response_queue = BoundedQueue(inbound_queue(), inbound_capacity, inbound_policy, block_timeout)
 
     def __enter__(self):
-        self.subprocess = multiprocessing.Process(target=self._serve)
+        if self.subprocess is not None:
+            # the grpc process of the last run may have exited while it waited for an outbound message,
+            # holding the reader lock of the queue
+            self._create_outbound_queue()
+            if self.transport == "shared_memory":
+                # close released the rings
+                self._create_inbound_queues()
+        # state of the previous run, the new grpc process must not see its stop request
+        self._stop_requested.clear()
+        self._serving.clear()
+        self._stop_grace.value = _STOP_GRACE
+        self._events = multiprocessing.Queue()
+        with self._connected:
+            self._peers = {}
+            self._routed = {}
+        self._received.clear()
+        self._sharding.set()
+        self._sharding_request.clear()
+        self._sharding_changed.clear()
+        self.subprocess = multiprocessing.Process(target=_serve, kwargs=dict(
+            message_queue=self.message_queue,
+            response_queue=self.response_queue,
+            shards=self.parse_shards,
+            sharding=self._sharding,
+            sharding_request=self._sharding_request,
+            sharding_changed=self._sharding_changed,
+            events=self._events,
+            serving=self._serving,
+            stop_requested=self._stop_requested,
+            stop_grace=self._stop_grace,
+            listen_addr=self.listen_addr,
+            bridges=self.bridges,
+            bridge_streams=self.bridge_streams,
+            channel_options=self.channel_options,
+            compression=self.compression,
+            reconnect_backoff=self.reconnect_backoff,
+            routes=self.routes,
+            supersedable=self.supersedable,
+            tracer=self.tracer,
+            capture_path=self.capture_path,
+            lanes=self.lanes,
+            lane_weights=self.lane_weights,
+            lane_latency=self.lane_latency,
+        ))
         self.subprocess.start()
+        self._event_reader_stop.clear()
+        self._event_reader = threading.Thread(target=self._read_events, args=(self._events,), daemon=True)
+        self._event_reader.start()
         return self
          
     def __exit__(self, type, value, traceback):
-        logging.info("Waiting for Message Queue to get empty")
-        self.message_queue.join()
-        logging.info("Message Queue is empty, killing Background Service")
-        self.subprocess.kill()
+        self.close()
 
     def open(self) -> None:
         '''
@@ -66,71 +747,595 @@ class pyLYNX:
         '''
         self.__enter__()
     
-    def close(self) -> None:
+    def close(self, timeout: float = None) -> None:
         '''
-        Stop the underlying grpc server. Unsend messages will still be processed.
+        Stop the underlying grpc server gracefully. Unsend messages will still be processed:
+        the outbound queue is drained first, then the open streams get the rest of the timeout
+        to finish before they are cancelled. The grpc process is only killed if it does not exit.
+
+        @param timeout maximum time in seconds for the shutdown, None waits until all messages are sent
 
         @returns None
         '''
-        self.__exit__()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.stop_scheduler()
+        self.stop_dispatcher()
+        self.stop_executor()
+        logging.info("Waiting for Message Queue to get empty")
+        if not self._drain(timeout):
+            logging.warning("Message Queue is not empty after %s seconds, stopping anyway", timeout)
+        grace = _STOP_GRACE if deadline is None else max(0.0, deadline - time.monotonic())
+        logging.info("Stopping Background Service")
+        self._stop_grace.value = grace
+        self._stop_requested.set()
+        self.subprocess.join(grace + 1)
+        if self.subprocess.is_alive():
+            logging.warning("Background Service did not stop, killing it")
+            self.subprocess.kill()
+            self.subprocess.join()
+        self._event_reader_stop.set()
+        self._event_reader.join()
+        self.stop_parse_workers()
+        if self.transport == "shared_memory":
+            self.message_queue.close()
+            self.response_queue.close()
+            for shard in self.parse_shards:
+                shard.close()
 
-    def _serve(self) -> None:
-        logging.basicConfig(level=logging.INFO)
-        logging.info("Preparing Server...")
-        self.server = grpc.server(ThreadPoolExecutor())
-        rasta_element = _RastaElement(self.message_queue, self.response_queue)
-        add_RastaServicer_to_server(rasta_element, self.server)
-        self.server.add_insecure_port(self.listen_addr)
-        logging.info("Starting Server...")
-        self.server.start()
-        logging.info("Server running at " + self.listen_addr)
-        self.server.wait_for_termination()
+    def _drain(self, timeout: float = None) -> bool:
+        if self.transport == "shared_memory":
+            # polled on this thread, a joiner thread left behind would read the ring after close released it
+            return self.message_queue.queue.join(timeout)
+        if timeout is None:
+            self.message_queue.join()
+            return True
+        joiner = threading.Thread(target=self.message_queue.join, daemon=True)
+        joiner.start()
+        joiner.join(timeout)
+        return not joiner.is_alive()
+
+    def _remaining(self, deadline: float) -> float:
+        if deadline is None:
+            return 0.05
+        return min(0.05, deadline - time.monotonic())
+
+    def wait_until_serving(self, timeout: float = None) -> bool:
+        '''
+        Block until the grpc server accepts connections and the connections to the bridges are being established.
+
+        @param timeout maximum time to wait in seconds, None waits forever
+
+        @returns True if the server is serving, False if the timeout expired.
+                 Raises RuntimeError if the grpc process exited, e.g. because the address is in use.
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._serving.wait(max(0.0, self._remaining(deadline))):
+            if not self.subprocess.is_alive():
+                raise RuntimeError("grpc server process exited with code %s" % self.subprocess.exitcode)
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def wait_until_connected(self, receiver: str = None, timeout: float = None) -> bool:
+        '''
+        Block until a bridge has opened a stream. If a receiver is given, block until the stream
+        serving it is known, through the configured routes or because the receiver sent a message.
+
+        @param receiver Identifier of a EULYNX instance, e.g. "99N1"
+        @param timeout maximum time to wait in seconds, None waits forever
+
+        @returns True if connected, False if the timeout expired
+        '''
+        field = encode_identifier(receiver) if receiver is not None else None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._connected:
+            while True:
+                if (field in self._routed) if field is not None else self._peers:
+                    return True
+                remaining = self._remaining(deadline)
+                if remaining <= 0:
+                    return False
+                if not self._connected.wait(remaining) and not self.subprocess.is_alive():
+                    raise RuntimeError("grpc server process exited with code %s" % self.subprocess.exitcode)
 
-    def send_message(self, message: bytes) -> None:
+    def _read_events(self, events: multiprocessing.Queue) -> None:
+        # every stream and route change of the grpc process is applied at once, so the events do not pile up
+        while not self._event_reader_stop.is_set():
+            try:
+                kind, peer, receivers = events.get(True, _READY_POLL)
+            except queue.Empty:
+                continue
+            with self._connected:
+                self._apply_event(kind, peer, receivers)
+                self._connected.notify_all()
+
+    def _apply_event(self, kind: str, peer: str, receivers: List[bytes]) -> None:
+        if kind == "connect":
+            self._peers[peer] = self._peers.get(peer, 0) + 1
+        elif kind == "disconnect":
+            self._peers[peer] -= 1
+            if not self._peers[peer]:
+                del self._peers[peer]
+            for receiver in receivers:
+                if self._routed.get(receiver) == peer:
+                    del self._routed[receiver]
+            return
+        for receiver in receivers:
+            self._routed[receiver] = peer
+
+    def send_message(self, message: bytes, priority: int = None) -> None:
         '''
-        Send the given message
+        Send the given message. If the outbound queue is full, the outbound policy applies
+        and queue.Full may be raised.
 
-        @param message Message to send
+        @param message Message to send, any bytes-like object (e.g. a slice of a TelegramBatch)
+        @param priority outbound lane of the message, 0 is the most urgent. None uses the lane
+                        of the message type, see priorities
 
         @returns None
         '''
-        self.message_queue.put_nowait(message)
+        if not isinstance(message, bytes):
+            message = bytes(message)
+        if priority is not None and not 0 <= priority < self.lanes:
+            raise ValueError("priority must be a lane between 0 and %d" % (self.lanes - 1))
+        if self.lanes > 1:
+            if priority is None:
+                priority = self.priorities.get(message[:3], self._default_lane)
+            self.message_queue.put((message, time.monotonic(), priority))
+        else:
+            self.message_queue.put((message, time.monotonic()))
+
+    def send_command(self, message: bytes, timeout: float = 5.0, responses: Iterable[bytes] = None, priority: int = None) -> Future:
+        '''
+        Send a command and get a future for the response of the commanded element. The future
+        resolves to the response telegram, or fails with CommandRejected if the element rejects
+        the command or with TimeoutError if no response arrives in time. Any number of commands
+        can be in flight. Responses are matched while received messages are parsed, so the
+        dispatcher or a loop calling "parse_messages" or "wait_for_messages" must be running.
+
+        @param message the command telegram
+        @param timeout seconds to wait for the response, None waits forever
+        @param responses protocol type + message type keys of the messages that answer the command,
+                         defaults to COMMAND_RESPONSES or any message of the same protocol type
+        @param priority outbound lane of the command, see send_message
+
+        @returns concurrent.futures.Future
+        '''
+        if not isinstance(message, bytes):
+            message = bytes(message)
+        pending = self._commands.add(message, responses=responses, timeout=timeout)
+        try:
+            self.send_message(message, priority)
+        except BaseException:
+            self._commands.discard(pending)
+            raise
+        return pending.future
 
-    def register_parser(self, parser: EulynxGenericParser) -> None:
+    def latency_metrics(self) -> Dict[str, Dict[str, float]]:
         '''
-        Register a message parser that is called when calling the "parse_message" method.
+        Get latency percentiles and throughput of every traced stage. Requires tracing=True.
 
-        @parser the parser to register
+        @returns dict mapping stage names to statistics
+        '''
+        return self.tracer.snapshot()
+
+    def prometheus_metrics(self, prefix: str = "pylynx") -> str:
+        '''
+        Export the queue metrics and, if tracing is enabled, the latency histograms in the Prometheus text format.
+
+        @param prefix prefix of the metric names
+
+        @returns str
+        '''
+        lines = []
+        for direction, metrics in self.queue_metrics().items():
+            for name, value in metrics.items():
+                kind, description = QUEUE_METRICS[name]
+                lines.extend(prometheus_family(
+                    '%s_%s_queue_%s' % (prefix, direction, name), kind, '%s (%s)' % (description, direction), [({}, value)]
+                ))
+        if self._executor is not None:
+            shards = self._executor.snapshot()
+            for name, (kind, description) in SHARD_METRICS.items():
+                samples = [({'shard': str(shard)}, metrics[name]) for shard, metrics in enumerate(shards)]
+                lines.extend(prometheus_family('%s_shard_%s' % (prefix, name), kind, description, samples))
+        if self._scheduler is not None:
+            for name, value in self._scheduler.snapshot().items():
+                kind, description = SCHEDULER_METRICS[name]
+                lines.extend(prometheus_family('%s_scheduler_%s' % (prefix, name), kind, description, [({}, value)]))
+        for lane, histogram in enumerate(self.lane_latency):
+            # one metric family with a series per lane, so dashboards can sum across lanes
+            lines.extend(histogram.prometheus(
+                '%s_lane_queue_seconds' % prefix, {'lane': str(lane)}, header=not lane,
+                description='Seconds from send_message until the message leaves the queue of its stream'
+            ))
+        text = '\n'.join(lines) + '\n'
+        if self.tracer:
+            text += self.tracer.prometheus(prefix)
+        return text
+
+    def queue_metrics(self) -> Dict[str, Dict[str, int]]:
+        '''
+        Get depth, high-water mark, drops and capacity of the outbound and inbound queues.
+
+        @returns dict with "outbound" and "inbound" metrics, and "parse_shard_<n>" metrics of the parse worker queues
+        '''
+        metrics = {
+            'outbound': self.message_queue.snapshot(),
+            'inbound': self.response_queue.snapshot(),
+        }
+        for index, shard in enumerate(self.parse_shards):
+            metrics['parse_shard_%d' % index] = shard.snapshot()
+        return metrics
+
+    def lane_metrics(self) -> List[Dict[str, float]]:
+        '''
+        Get the queueing delay of every outbound lane, from send_message until the message leaves
+        the queue of its stream.
+
+        @returns list with count, mean, percentiles and max in seconds per lane, empty with a single lane
+        '''
+        return [histogram.snapshot() for histogram in self.lane_latency]
+
+    def executor_metrics(self) -> List[Dict[str, float]]:
+        '''
+        Get the metrics of every shard of the callback executor, see start_executor.
+
+        @returns list of shard metrics, empty if the executor is not running
+        '''
+        if self._executor is None:
+            return []
+        return self._executor.snapshot()
+
+    def register_result_callback(self, function: Callable[[Any, tuple], None], params: tuple) -> None:
+        '''
+        Register a function that is called with every result passed to "emit".
+
+        @param function function(result, params), called on the thread that parses the messages
+        @param params tuple passed to the function
 
         @returns None
         '''
-        self.parsers.append(parser)
+        self.result_callbacks.append((function, params))
 
-    def register_default_parser(self, parser: EulynxGenericParser) -> None:
+    def emit(self, result: Any) -> None:
         '''
-        Register a default parser that will be called in the "parse_message" method
-        if no other parser could be found. An existing default parser will be overwritten.
+        Pass a result from a parser callback to the result callbacks. In a parse worker process the
+        results are collected and sent to this process in batches, so callbacks must report their
+        results this way, their other side effects stay in the worker. Results must be picklable.
 
-        @parser the default parser to register
+        @param result any picklable object
 
         @returns None
         '''
-        self.default_parser = parser
+        if _worker_results is not None:
+            _worker_results.append(result)
+            return
+        for function, params in self.result_callbacks:
+            function(result, params)
+
+    def _parse_item(self, item: Tuple[bytes, float]) -> int:
+        if self.parse_shards:
+            return self._parse_batch(item)
+        try:
+            self._parse_message(*item)
+        finally:
+            self.response_queue.task_done()
+        return 1
+
+    def _parse_message(self, message: bytes, arrival: float) -> None:
+        dispatched = time.monotonic()
+        self.dispatch_latency.record(dispatched - arrival)
+        if self.tracer:
+            self.tracer.inbound_queue.record(dispatched - arrival)
+        if self._executor is not None:
+            self._executor.submit(message)
+        else:
+            self._handle(message)
+
+    def _parse_batch(self, batch: Tuple[List[Tuple[bytes, float]], List[Any]]) -> int:
+        try:
+            return self._apply_batch(*batch)
+        finally:
+            self.response_queue.task_done()
+
+    def _apply_batch(self, items: List[Tuple[bytes, float]], results: List[Any]) -> int:
+        if results is None:
+            # received while the parse workers were stopped, the messages are parsed in this process
+            for message, arrival in items:
+                self._parse_message(message, arrival)
+            return len(items)
+        received = time.monotonic()
+        for message, arrival in items:
+            self.dispatch_latency.record(received - arrival)
+            if self.tracer:
+                self.tracer.inbound_queue.record(received - arrival)
+            for store in self.state_stores:
+                store.update(message)
+            if self._commands._pending:
+                self._commands.update(message)
+        for result in results:
+            for function, params in self.result_callbacks:
+                function(result, params)
+        return len(items)
+
+    def _handle(self, message: bytes) -> None:
+        started = time.monotonic()
+        if self._commands._pending:
+            self._commands.update(message)
+        self._dispatch(message)
+        if self.tracer:
+            elapsed = time.monotonic() - started
+            # the executor calls this from several threads, the histograms have a single writer
+            with self._trace_lock:
+                self.tracer.callback.record(elapsed)
+
+    def inject_message(self, message: bytes) -> bool:
+        '''
+        Pass a message to the pending commands, state stores and parsers as if it had been received,
+        e.g. to replay a capture. The parsers are called on the calling thread.
+
+        @param message EULYNX message as byte array
+
+        @returns True if a parser parsed the message, otherwise False
+        '''
+        if self._commands._pending:
+            self._commands.update(message)
+        return self._dispatch(message)
 
-    def parse_messages(self) -> None:
+    def parse_messages(self) -> int:
         '''
         Parse all messages that have been received since the last call of this function.
 
-        @returns None
+        @returns number of parsed messages
         '''
+        count = 0
+        while self._received:
+            count += self._apply_batch(*self._received.popleft())
         while not self.response_queue.empty():
-            found_parser = False
-            request = self.response_queue.get_nowait()
-            for parser in self.parsers:
-                found_parser = found_parser or parser.parse_message(request)
+            count += self._parse_item(self.response_queue.get_nowait())
+        return count
+
+    def wait_for_messages(self, timeout: float = None) -> int:
+        '''
+        Block until at least one message has been received, then parse all received messages.
+
+        @param timeout maximum time to wait in seconds, None waits forever
+
+        @returns number of parsed messages, 0 if the timeout expired
+        '''
+        if self._received:
+            return self.parse_messages()
+        try:
+            item = self.response_queue.get(True, timeout)
+        except queue.Empty:
+            return 0
+        return self._parse_item(item) + self.parse_messages()
+
+    def start_dispatcher(self) -> None:
+        '''
+        Start a background thread that parses every message as soon as it is received.
+        Registered callbacks are then called from that thread, do not call "parse_messages"
+        or "wait_for_messages" while the dispatcher is running.
 
-            if not found_parser and self.default_parser:
-                self.default_parser.parse_message(request)
-            
+        @returns None
+        '''
+        if self._dispatcher is not None:
+            return
+        self._dispatcher_stop.clear()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def stop_dispatcher(self) -> None:
+        '''
+        Stop the background dispatcher thread.
+
+        @returns None
+        '''
+        if self._dispatcher is None:
+            return
+        self._dispatcher_stop.set()
+        self._dispatcher.join()
+        self._dispatcher = None
+
+    def start_executor(self, workers: int = 4, shard_by: str = "sender", shard_capacity: int = 1024, shard_policy: str = "block") -> None:
+        '''
+        Run the parsers and callbacks on a pool of threads instead of the thread that parses the
+        messages. Messages are sharded by element: all messages of one element are processed in
+        order by the same thread, messages of different elements concurrently, so a slow callback
+        only delays the elements of its shard. "parse_messages", "wait_for_messages" and the
+        dispatcher then return as soon as the messages are handed to the shards.
+        Callbacks, parsers and state stores must be thread-safe across elements.
 
+        @param workers number of shards, each with its own thread
+        @param shard_by the identifier messages are sharded by, "sender" or "receiver"
+        @param shard_capacity maximum number of queued messages per shard, 0 for unbounded
+        @param shard_policy what happens if a shard is full: "block" (the inbound queue backs up),
+                            "drop_oldest" or "drop_newest"
+
+        @returns None
+        '''
+        if self._executor is not None:
+            return
+        executor = _ShardedExecutor(self._handle, workers, shard_by, shard_capacity, shard_policy)
+        executor.start()
+        self._executor = executor
+
+    def stop_executor(self) -> None:
+        '''
+        Process the messages queued in the shards, stop the executor threads and call the
+        parsers on the parsing thread again.
+
+        @returns None
+        '''
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        executor.stop()
+
+    def start_scheduler(self, tick: float = 0.01) -> TelegramScheduler:
+        '''
+        Start a background thread that sends recurring telegrams, e.g. to poll the filling level
+        of all sections. Register the jobs with the returned scheduler; the jobs of one period are
+        spread evenly across the period, see TelegramScheduler.
+
+        @param tick resolution of the scheduler in seconds
+
+        @returns TelegramScheduler, the running scheduler if it is already started
+        '''
+        if self._scheduler is None:
+            scheduler = TelegramScheduler(self.send_message, tick)
+            scheduler.start()
+            self._scheduler = scheduler
+        return self._scheduler
+
+    def stop_scheduler(self) -> None:
+        '''
+        Stop the scheduler thread and discard its jobs.
+
+        @returns None
+        '''
+        if self._scheduler is None:
+            return
+        scheduler, self._scheduler = self._scheduler, None
+        scheduler.stop()
+
+    def start_parse_workers(self, batch_size: int = 256) -> None:
+        '''
+        Start the parse worker processes, requires parse_workers in the constructor. Each worker runs
+        a copy of the parsers registered so far, received messages are distributed by sender, so the
+        messages of an element are parsed in order by the same worker. The workers send the parsed
+        messages and the results of their callbacks (see "emit") back in batches, which update the
+        state stores and pending commands and call the result callbacks in "parse_messages",
+        "wait_for_messages" or the dispatcher of this process.
+
+        @param batch_size maximum number of messages a worker parses before it sends a batch,
+                          a smaller batch is sent as soon as the worker has no more messages
+
+        @returns None
+        '''
+        if not self.parse_shards:
+            raise ValueError("parse_workers must be set in the constructor")
+        if self._parse_workers:
+            return
+        registry = self._parser_registry()
+        for shard in self.parse_shards:
+            worker = multiprocessing.Process(
+                target=_parse_worker, args=(registry, shard, self.response_queue, batch_size), daemon=True
+            )
+            worker.start()
+            self._parse_workers.append(worker)
+        if not self._sharding.is_set():
+            self._resume_sharding()
+
+    def _resume_sharding(self) -> None:
+        # the messages the grpc process sent unparsed may still be on their way, the first batches of the
+        # workers must not overtake them. They are collected until the grpc process confirms it resumed
+        dispatching = self._dispatcher is not None
+        self.stop_dispatcher()
+        if self._change_sharding(time.monotonic() + _RESUME_TIMEOUT):
+            unparsed = []
+            batches = []
+            while True:
+                batch = self.response_queue.get()
+                self.response_queue.task_done()
+                if batch == _RESUMED:
+                    break
+                (unparsed if batch[1] is None else batches).append(batch)
+            self._received.extend(unparsed)
+            self._received.extend(batches)
+        else:
+            self._sharding.set()
+        if dispatching:
+            self.start_dispatcher()
+
+    def stop_parse_workers(self, timeout: float = 5.0) -> None:
+        '''
+        Stop the parse worker processes after they parsed the queued messages. Their last batches
+        are handled by the next call of "parse_messages". Messages received from then on are
+        parsed in this process until the workers are started again.
+
+        @param timeout maximum time in seconds the workers get to finish, then they are terminated
+
+        @returns None
+        '''
+        workers, self._parse_workers = self._parse_workers, []
+        if not workers:
+            return
+        # the batches are collected here until the workers exited, the dispatcher must not take them meanwhile
+        dispatching = self._dispatcher is not None
+        self.stop_dispatcher()
+        deadline = time.monotonic() + timeout
+        self._stop_marked(deadline)
+        # a worker only exits once its batches are read. They are parsed before the messages the grpc process
+        # sent unparsed meanwhile, which may have overtaken them, so the messages of an element stay in order
+        batches = []
+        unparsed = []
+        while time.monotonic() < deadline:
+            try:
+                items, results = self.response_queue.get(True, 0.01)
+            except queue.Empty:
+                # the batches of an exited worker are all in the queue, it is empty once they are read
+                if not any(worker.is_alive() for worker in workers):
+                    break
+                continue
             self.response_queue.task_done()
+            if results is None:
+                unparsed.extend(items)
+            else:
+                batches.append((items, results))
+        for worker in workers:
+            if worker.is_alive():
+                logging.warning("Parse worker did not stop, terminating it")
+                worker.terminate()
+            worker.join()
+        for shard in self.parse_shards:
+            # messages the grpc process queued just before it stopped feeding the shards
+            while True:
+                try:
+                    item = shard.get_nowait()
+                except queue.Empty:
+                    break
+                shard.task_done()
+                if item != _STOP_WORKER:
+                    unparsed.append(item)
+        self._received.extend(batches)
+        if unparsed:
+            unparsed.sort(key=lambda item: item[1])
+            self._received.append((unparsed, None))
+        if dispatching:
+            self.start_dispatcher()
+
+    def _change_sharding(self, deadline: float) -> bool:
+        # the grpc process toggles feeding the shards, only it may put the markers: a stream reader may still be
+        # putting into a single producer shard. Returns False if the grpc process did not confirm the change
+        if self.subprocess is None or not self.subprocess.is_alive():
+            return False
+        self._sharding_changed.clear()
+        self._sharding_request.set()
+        if self._sharding_changed.wait(max(0.0, deadline - time.monotonic())):
+            return True
+        logging.warning("The grpc process did not confirm the change of the parse workers")
+        self._sharding_request.clear()
+        return False
+
+    def _stop_marked(self, deadline: float) -> None:
+        # the stop markers are queued behind the last message the grpc process put into the shards
+        if self._change_sharding(deadline):
+            return
+        self._sharding.clear()
+        for shard in self.parse_shards:
+            # bypass the policy, the stop marker is queued behind the received messages and must not be dropped
+            shard.put_marker(_STOP_WORKER)
+
+    def _dispatch_loop(self) -> None:
+        while not self._dispatcher_stop.is_set():
+            if self._received:
+                self._apply_batch(*self._received.popleft())
+                continue
+            try:
+                item = self.response_queue.get(True, 0.1)
+            except queue.Empty:
+                continue
+            self._parse_item(item)
+
@@ -0,0 +1,301 @@
+import heapq
+import logging
+import threading
+import time
+
+from typing import Any, Callable, Dict, Hashable, List, Union
+from .metrics import LatencyStats
+
+# slots of the first wheel level, one slot per tick
+_WHEEL_BITS = 8
+# slots of each higher level, a slot spans all slots of the level below
+_LEVEL_BITS = 6
+_LEVELS = 4
+# longest delay the wheel can hold in ticks, later jobs are parked in the last slot and placed again when it cascades
+_MAX_DELAY = (1 << (_WHEEL_BITS + (_LEVELS - 1) * _LEVEL_BITS)) - 1
+# fractional part of the golden ratio, successive multiples spread the phases of jobs evenly over a period
+_GOLDEN = 0.6180339887498949
+
+Telegram = Union[bytes, Callable[[], bytes]]
+
+
+class _Job:
+    __slots__ = ('key', 'telegram', 'period', 'expires', 'slot', 'stagger')
+
+    def __init__(self, key: Hashable, telegram: Telegram, period: int):
+        self.key = key
+        self.telegram = telegram
+        self.period = period
+        self.expires = 0
+        self.slot: Dict['_Job', None] = None
+        # index of the job among the staggered jobs of its period, None if it was registered with a phase
+        self.stagger: int = None
+
+
+class _TimerWheel:
+    '''
+    Hierarchical timer wheel. The first level has one slot per tick, every higher level has
+    slots spanning a whole turn of the level below. When a level wraps, the next slot of the
+    level above is cascaded down, so adding, removing and advancing by one tick are O(1)
+    regardless of the number of jobs.
+    '''
+    def __init__(self):
+        self.now = 0
+        self._levels: List[List[Dict[_Job, None]]] = [[{} for _ in range(1 << _WHEEL_BITS)]]
+        self._levels += [[{} for _ in range(1 << _LEVEL_BITS)] for _ in range(_LEVELS - 1)]
+
+    def add(self, job: _Job) -> None:
+        if job.expires <= self.now:
+            job.expires = self.now + 1
+        delay = min(job.expires - self.now, _MAX_DELAY)
+        expires = self.now + delay
+        if delay < 1 << _WHEEL_BITS:
+            slot = self._levels[0][expires & ((1 << _WHEEL_BITS) - 1)]
+        else:
+            level = 1
+            while delay >= 1 << (_WHEEL_BITS + level * _LEVEL_BITS):
+                level += 1
+            shift = _WHEEL_BITS + (level - 1) * _LEVEL_BITS
+            slot = self._levels[level][(expires >> shift) & ((1 << _LEVEL_BITS) - 1)]
+        slot[job] = None
+        job.slot = slot
+
+    def remove(self, job: _Job) -> None:
+        if job.slot is not None:
+            del job.slot[job]
+            job.slot = None
+
+    def advance(self) -> List[_Job]:
+        '''
+        Advance the wheel by one tick.
+
+        @returns the jobs that expire at the new tick, they are removed from the wheel
+        '''
+        now = self.now = self.now + 1
+        index = now & ((1 << _WHEEL_BITS) - 1)
+        current = self._levels[0][index]
+        level = 1
+        shift = _WHEEL_BITS
+        while not index and level < _LEVELS:
+            # the level below wrapped, move the jobs of the next slot of this level down
+            index = (now >> shift) & ((1 << _LEVEL_BITS) - 1)
+            slots = self._levels[level]
+            jobs, slots[index] = slots[index], {}
+            for job in jobs:
+                if job.expires <= now:
+                    # due at this tick, add would push it to the next tick and shift its phase for good
+                    current[job] = None
+                    job.slot = current
+                else:
+                    self.add(job)
+            level += 1
+            shift += _LEVEL_BITS
+
+        slots = self._levels[0]
+        index = now & ((1 << _WHEEL_BITS) - 1)
+        jobs, slots[index] = slots[index], {}
+        for job in jobs:
+            job.slot = None
+        return list(jobs)
+
+
+class TelegramScheduler:
+    '''
+    Sends recurring telegrams, e.g. polling thousands of sections with "update filling level"
+    or refreshing signal aspects. Jobs are kept in a hierarchical timer wheel, so every tick
+    costs the same however many jobs are scheduled. Unless a phase is given, the jobs of one
+    period are staggered across the period, so the bridge sees a smooth rate instead of a burst
+    every period.
+    '''
+    def __init__(self, send: Callable[[bytes], Any], tick: float = 0.01):
+        '''
+        @param send function that sends a telegram, e.g. pyLYNX.send_message
+        @param tick resolution of the scheduler in seconds, periods and phases are rounded to whole ticks
+
+        @returns TelegramScheduler-Object
+        '''
+        if tick <= 0:
+            raise ValueError("tick must be positive")
+        self.send = send
+        self.tick = tick
+        self._wheel = _TimerWheel()
+        self._jobs: Dict[Hashable, _Job] = {}
+        # staggered jobs per period in ticks: the next unused index and the indices released by
+        # cancelled jobs, which are handed out again first, so the current jobs stay evenly spread
+        self._staggered: Dict[int, int] = {}
+        self._released: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+        self.sent = 0
+        self.errors = 0
+        # how late the ticks are processed in seconds
+        self.lag = LatencyStats()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._jobs
+
+    def _ticks(self, seconds: float) -> int:
+        return max(1, round(seconds / self.tick))
+
+    def register(self, key: Hashable, telegram: Telegram, period: float, phase: float = None) -> None:
+        '''
+        Send a telegram every period. A job registered again under the same key is replaced.
+
+        @param key identifies the job, e.g. the receiver and the message type
+        @param telegram the telegram, or a function returning the telegram to send each time
+        @param period seconds between two sends
+        @param phase seconds from now until the first send, None staggers the job against
+                     the other jobs with the same period
+
+        @returns None
+        '''
+        job = _Job(key, telegram, self._ticks(period))
+        with self._lock:
+            previous = self._jobs.pop(key, None)
+            if previous is not None:
+                self._remove(previous)
+            job.expires = self._wheel.now + 1
+            if phase is None:
+                self._stagger(job)
+            else:
+                job.expires += round(phase / self.tick)
+            self._wheel.add(job)
+            self._jobs[key] = job
+
+    def _stagger(self, job: _Job) -> None:
+        # the phases are counted from tick 0, so jobs registered at different times are spread as well.
+        # The job is delayed to the next tick at its phase
+        released = self._released.get(job.period)
+        if released:
+            job.stagger = heapq.heappop(released)
+        else:
+            job.stagger = self._staggered.get(job.period, 0)
+            self._staggered[job.period] = job.stagger + 1
+        phase = int((job.stagger * _GOLDEN) % 1.0 * job.period)
+        job.expires += (phase - job.expires) % job.period
+
+    def _remove(self, job: _Job) -> None:
+        self._wheel.remove(job)
+        if job.stagger is None:
+            return
+        released = self._released.setdefault(job.period, [])
+        heapq.heappush(released, job.stagger)
+        job.stagger = None
+        if len(released) == self._staggered[job.period]:
+            # no staggered job of the period is left
+            del self._released[job.period]
+            del self._staggered[job.period]
+
+    def cancel(self, key: Hashable) -> bool:
+        '''
+        Stop sending the telegram of a job.
+
+        @param key the key the job was registered with
+
+        @returns True if the job was scheduled, otherwise False
+        '''
+        with self._lock:
+            job = self._jobs.pop(key, None)
+            if job is None:
+                return False
+            self._remove(job)
+            return True
+
+    def change_period(self, key: Hashable, period: float) -> bool:
+        '''
+        Change the period of a job. The next send is one new period after the last one, or at
+        the next tick if that time has already passed. A staggered job is staggered against the
+        jobs of the new period, its next send is delayed to its phase in the new period.
+
+        @param key the key the job was registered with
+        @param period seconds between two sends
+
+        @returns True if the job was scheduled, otherwise False
+        '''
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                return False
+            staggered = job.stagger is not None
+            self._remove(job)
+            period = self._ticks(period)
+            job.expires = max(job.expires + period - job.period, self._wheel.now + 1)
+            job.period = period
+            if staggered:
+                self._stagger(job)
+            self._wheel.add(job)
+            return True
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pyLYNX-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        '''
+        Stop the scheduler thread, the jobs are kept and continue when the scheduler is started again.
+
+        @returns None
+        '''
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        tick = self.tick
+        started = time.monotonic()
+        ticks = 0
+        while True:
+            due = started + (ticks + 1) * tick
+            delay = due - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            if self._stop.is_set():
+                return
+            ticks += 1
+            # ticks that are late are processed at once until the scheduler caught up
+            self.lag.record(max(0.0, time.monotonic() - due))
+            self._fire()
+
+    def _fire(self) -> None:
+        with self._lock:
+            jobs = self._wheel.advance()
+            for job in jobs:
+                job.expires += job.period
+                self._wheel.add(job)
+        for job in jobs:
+            with self._lock:
+                # cancelled or replaced, e.g. by the send of an earlier job of this tick
+                if self._jobs.get(job.key) is not job:
+                    continue
+            telegram = job.telegram
+            try:
+                self.send(telegram() if callable(telegram) else telegram)
+                self.sent += 1
+            except Exception:
+                # a failing job, e.g. a full outbound queue with the "raise" policy, must not stop the others
+                self.errors += 1
+                logging.exception("Scheduled telegram %r could not be sent", job.key)
+
+    def snapshot(self) -> Dict[str, float]:
+        '''
+        Get the metrics of the scheduler.
+
+        @returns dict with the number of jobs, sent telegrams and failed sends, and mean and max lag of the ticks in seconds
+        '''
+        lag = self.lag.snapshot()
+        return {
+            'jobs': len(self._jobs),
+            'sent': self.sent,
+            'errors': self.errors,
+            'lag_mean': lag['mean'],
+            'lag_max': lag['max'],
+        }
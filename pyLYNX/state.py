@@ -0,0 +1,229 @@
+'''
+Live state of all field elements in compact numpy arrays, fed from inbound telegrams.
+
+Requires numpy, install it with the "batch" extra: pip install "pyLYNX[batch]"
+'''
+import threading
+import time
+
+import numpy as np
+
+from typing import Any, Dict, List, Tuple, Union
+from .messages._generic import IDENTIFIERS, IdentifierTable
+from .messages.schema import INDICATE_SIGNAL_ASPECT, MOVE_POINT, OCCUPANCY_STATUS, SET_LUMINOSITY, TDP_STATUS, MessageSchema
+
+# state columns with their dtype and the value of elements that never reported it
+COLUMNS: Dict[str, Tuple[str, int]] = {
+    'signal_aspect': ('u1', 0),
+    'luminosity': ('u1', 0),
+    'point_position': ('u1', 0),
+    'occupancy_status': ('u1', 0),
+    'force_clear_ability': ('u1', 0),
+    'filling_level': ('u2', 0xFFFF),
+    'pom_state': ('u1', 0),
+    'disturbance_state': ('u1', 0),
+    'change_trigger': ('u1', 0),
+    'passing_state': ('u1', 0),
+    'passing_direction': ('u1', 0),
+}
+
+_SENDER = 3
+_RECEIVER = 23
+
+
+def _state(element: int, schema: MessageSchema, columns: Tuple[str, ...]) -> Tuple[int, Tuple[Tuple[str, int, int], ...]]:
+    fields = {field.name: field for field in schema.fields}
+    return element, tuple((column, fields[column].offset, fields[column].width) for column in columns)
+
+
+# element field and (column, offset, width) of the state carried by a message, keyed by protocol type + message type.
+# commands update the commanded element (receiver), reports the reporting element (sender)
+_MESSAGES: Dict[bytes, Tuple[int, Tuple[Tuple[str, int, int], ...]]] = {
+    INDICATE_SIGNAL_ASPECT.key: _state(_RECEIVER, INDICATE_SIGNAL_ASPECT, ('signal_aspect',)),
+    SET_LUMINOSITY.key: _state(_RECEIVER, SET_LUMINOSITY, ('luminosity',)),
+    MOVE_POINT.key: _state(_RECEIVER, MOVE_POINT, ('point_position',)),
+    OCCUPANCY_STATUS.key: _state(_SENDER, OCCUPANCY_STATUS, (
+        'occupancy_status',
+        'force_clear_ability',
+        'filling_level',
+        'pom_state',
+        'disturbance_state',
+        'change_trigger',
+    )),
+    TDP_STATUS.key: _state(_SENDER, TDP_STATUS, ('passing_state', 'passing_direction')),
+}
+
+
+def _enum_value(value: Union[bytes, int]) -> int:
+    return value[0] if isinstance(value, bytes) else value
+
+
+class ElementStateStore:
+    '''
+    Last known state of every element in one numpy array per state column, indexed by the
+    id of the element in the identifier table. Besides the state columns, "updated" and
+    "changed" hold the time of the last telegram and of the last change of the element in
+    seconds since the epoch, elements that never sent state have an "updated" time of 0.
+
+    Register the store with pyLYNX.register_state_store to feed it from all inbound telegrams.
+    '''
+    def __init__(self, capacity: int = 1024, identifiers: IdentifierTable = None):
+        '''
+        :param capacity: initial number of elements, the arrays grow when needed
+        :param identifiers: the identifier table, defaults to the table shared by the parsers
+        '''
+        # an empty table is falsy, it must not fall back to the shared one
+        self.identifiers = IDENTIFIERS if identifiers is None else identifiers
+        self._count = 0
+        self._size = 0
+        self._capacity = capacity
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.full(capacity, default, dtype=dtype) for name, (dtype, default) in COLUMNS.items()
+        }
+        self.columns['updated'] = np.zeros(capacity)
+        self.columns['changed'] = np.zeros(capacity)
+        # per state column, whether the element ever reported it, an unreported value is the default
+        self._reported: Dict[str, np.ndarray] = {name: np.zeros(capacity, dtype=bool) for name in COLUMNS}
+        self._lock = threading.Lock()
+        self._attach()
+
+    def _attach(self) -> None:
+        # memoryviews of the columns, single values are much faster to read and write through them than through numpy
+        self._views = {name: memoryview(column) for name, column in self.columns.items()}
+        self._reported_views = {name: memoryview(column) for name, column in self._reported.items()}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _grow(self, index: int) -> None:
+        size = self._size
+        self._capacity = max(2 * self._capacity, index + 1)
+        for name, column in self.columns.items():
+            grown = np.full(self._capacity, COLUMNS[name][1] if name in COLUMNS else 0, dtype=column.dtype)
+            grown[:size] = column[:size]
+            self.columns[name] = grown
+        for name, column in self._reported.items():
+            grown = np.zeros(self._capacity, dtype=bool)
+            grown[:size] = column[:size]
+            self._reported[name] = grown
+        self._attach()
+
+    def update(self, message: bytes) -> bool:
+        '''
+        update the state from a telegram
+
+        :param message: the telegram
+
+        returns True if the telegram carries state of an element, otherwise False
+        '''
+        layout = _MESSAGES.get(message[:3])
+        if layout is None:
+            return False
+        start, fields = layout
+        if len(message) < fields[-1][1] + fields[-1][2]:
+            return False
+
+        index = self.identifiers.id(message[start:start + 20])
+        if index is None:
+            return False
+        now = time.time()
+        with self._lock:
+            if index >= self._size:
+                if index >= self._capacity:
+                    self._grow(index)
+                self._size = index + 1
+            views = self._views
+            if not views['updated'][index]:
+                self._count += 1
+            changed = False
+            reported = self._reported_views
+            for name, offset, width in fields:
+                value = message[offset] if width == 1 else int.from_bytes(message[offset:offset + width], 'big')
+                reported[name][index] = True
+                view = views[name]
+                if view[index] != value:
+                    view[index] = value
+                    changed = True
+            views['updated'][index] = now
+            if changed:
+                views['changed'][index] = now
+        return True
+
+    def index(self, element: str) -> int:
+        '''
+        get the index of an element
+
+        :param element: the element identifier
+
+        returns the index or None if the element never sent state
+        '''
+        index = self.identifiers.id_of(element)
+        if index is None or index >= self._size or not self.columns['updated'][index]:
+            return None
+        return index
+
+    def get(self, element: str) -> Dict[str, Any]:
+        '''
+        get the state of an element
+
+        :param element: the element identifier
+
+        returns dict mapping the columns to the values of the element, None if the element is unknown
+        '''
+        index = self.index(element)
+        if index is None:
+            return None
+        return {name: column[index].item() for name, column in self.columns.items()}
+
+    def value(self, element: str, column: str) -> Any:
+        '''
+        get one state value of an element
+
+        :param element: the element identifier
+        :param column: the state column, e.g. "occupancy_status"
+
+        returns the value or None if the element is unknown
+        '''
+        index = self.index(element)
+        if index is None:
+            return None
+        return self.columns[column][index].item()
+
+    def where(self, column: str, value: Union[bytes, int], negate: bool = False) -> np.ndarray:
+        '''
+        find all elements with a state value, e.g. all occupied sections:
+        store.where("occupancy_status", TrainDetectionOccupancyState.OCCUPIED)
+
+        :param column: the state column
+        :param value: the value, as enum constant or integer
+        :param negate: find the elements with another value instead, elements that never reported the column are excluded
+
+        returns numpy array of element indices
+        '''
+        with self._lock:
+            values = self.columns[column][:self._size]
+            mask = values != _enum_value(value) if negate else values == _enum_value(value)
+            mask &= self._reported[column][:self._size]
+        return np.flatnonzero(mask)
+
+    def changed_since(self, timestamp: float) -> np.ndarray:
+        '''
+        find all elements whose state changed after the given time
+
+        :param timestamp: seconds since the epoch
+
+        returns numpy array of element indices
+        '''
+        with self._lock:
+            return np.flatnonzero(self.columns['changed'][:self._size] > timestamp)
+
+    def elements(self, indices: np.ndarray) -> List[str]:
+        '''
+        get the identifiers of elements
+
+        :param indices: element indices, e.g. the result of where
+
+        returns list of element identifiers
+        '''
+        names = self.identifiers.names
+        return [names[index] for index in indices]
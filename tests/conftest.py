@@ -0,0 +1,79 @@
+import socket
+import threading
+import time
+
+import grpc
+import pytest
+
+from pyLYNX.proto.rasta_pb2_grpc import RastaStub
+
+
+@pytest.fixture
+def address() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return "127.0.0.1:%d" % sock.getsockname()[1]
+
+
+class Bridge:
+    '''
+    Minimal bridge: opens one Stream call to pyLYNX, sends the given telegrams and records
+    every telegram pyLYNX sends, optionally slowly.
+    '''
+    def __init__(self, address: str, messages=(), delay: float = 0.0):
+        self.received = []
+        self.delay = delay
+        self._messages = list(messages)
+        self._stop = threading.Event()
+        self._channel = grpc.insecure_channel(address)
+        self._call = RastaStub(self._channel).Stream(self._requests())
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _requests(self):
+        from pyLYNX.proto.rasta_pb2 import SciPacket
+        for message in self._messages:
+            yield SciPacket(message=message)
+        self._stop.wait()
+
+    def _read(self) -> None:
+        try:
+            for packet in self._call:
+                self.received.append(packet.message)
+                if self.delay:
+                    time.sleep(self.delay)
+        except grpc.RpcError:
+            pass
+
+    def wait_for(self, count: int, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while len(self.received) < count:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def wait_closed(self, timeout: float = 10.0) -> bool:
+        # pyLYNX ended the call, every telegram it sent has been received
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._call.cancel()
+        self._thread.join(5)
+        self._channel.close()
+
+
+@pytest.fixture
+def bridges():
+    opened = []
+
+    def open_bridge(address: str, messages=(), delay: float = 0.0) -> Bridge:
+        bridge = Bridge(address, messages, delay)
+        opened.append(bridge)
+        return bridge
+
+    yield open_bridge
+    for bridge in opened:
+        bridge.close()
@@ -0,0 +1,88 @@
+import asyncio
+
+import grpc
+import pytest
+
+from grpc import aio
+
+from pyLYNX.aio import AsyncPyLYNX
+from pyLYNX.proto.rasta_pb2 import SciPacket
+from pyLYNX.proto.rasta_pb2_grpc import RastaStub
+from pyLYNX.messages.signal import EulynxSignal
+
+
+class BrokenKey(bytes):
+    # response key that raises when a received message is compared against it
+    __hash__ = bytes.__hash__
+
+    def __eq__(self, other):
+        raise RuntimeError("broken")
+
+
+def test_cancelled_stream_does_not_block_close(address):
+    async def scenario():
+        srv = AsyncPyLYNX(address)
+        await srv.open()
+        channel = aio.insecure_channel(address)
+
+        async def requests():
+            await asyncio.sleep(100)
+            yield SciPacket()
+
+        call = RastaStub(channel).Stream(requests())
+        for _ in range(3):
+            await srv.send_message(EulynxSignal.initialization_request("IL", "S1"))
+        await call.read()
+        call.cancel()
+        await channel.close()
+        await asyncio.sleep(0.2)
+        await asyncio.wait_for(srv.close(0), 5)
+
+    asyncio.run(scenario())
+
+
+def test_close_gives_up_after_the_timeout(address):
+    async def scenario():
+        srv = AsyncPyLYNX(address)
+        await srv.open()
+        await srv.send_message(EulynxSignal.initialization_request("IL", "S1"))
+        await asyncio.wait_for(srv.close(0, timeout=0.1), 5)
+
+    asyncio.run(scenario())
+
+
+def test_failing_reader_ends_the_stream_and_reaches_the_consumer(address):
+    async def scenario():
+        srv = AsyncPyLYNX(address)
+        await srv.open()
+
+        # a command to S1 is pending, matching the answer of S1 against its response key fails
+        answer = EulynxSignal.initialization_request("S1", "IL")
+        command = asyncio.ensure_future(
+            srv.send_command(EulynxSignal.initialization_request("IL", "S1"), None, [BrokenKey(answer[:3])])
+        )
+        await asyncio.sleep(0)
+        channel = aio.insecure_channel(address)
+
+        received = asyncio.Event()
+
+        async def requests():
+            # the bridge answers the command once it received it
+            await received.wait()
+            yield SciPacket(message=answer)
+            await asyncio.sleep(100)
+
+        call = RastaStub(channel).Stream(requests())
+        assert (await call.read()).message == EulynxSignal.initialization_request("IL", "S1")
+        received.set()
+        with pytest.raises(RuntimeError):
+            async for _ in srv.messages():
+                pass
+        assert isinstance(srv.error, RuntimeError)
+        # the servicer ended the stream, so the bridge sees the call end
+        assert await asyncio.wait_for(call.code(), 5) == grpc.StatusCode.INTERNAL
+        command.cancel()
+        await channel.close()
+        await asyncio.wait_for(srv.close(0), 5)
+
+    asyncio.run(scenario())
@@ -0,0 +1,131 @@
+import pytest
+
+from pyLYNX.messages.point import EulynxPoint, PointPosition
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPOMState,
+)
+
+np = pytest.importorskip("numpy")
+batch = pytest.importorskip("pyLYNX.messages.batch")
+
+RECEIVERS = ["TDS%d" % index for index in range(5)]
+
+
+def test_occupancy_status_batch_matches_the_encoder():
+    levels = [0, 1, 513, 0xFFFE, -1]
+    states = [TrainDetectionOccupancyState.OCCUPIED, TrainDetectionOccupancyState.VACANT] * 2 + [TrainDetectionOccupancyState.OCCUPIED]
+    telegrams = batch.occupancy_status_batch(
+        "IL", RECEIVERS, states, TrainDetectionForceClearAbility.ABLE, levels, TrainDetectionPOMState.OK,
+        np.full(5, TrainDetectionDisturbanceState.NA[0]), TrainDetectionChangeTrigger.PASSING_DETECTED
+    )
+    assert len(telegrams) == 5
+    expected = [
+        EulynxTrainDetection.occupancy_status(
+            "IL", receiver, state, TrainDetectionForceClearAbility.ABLE, level, TrainDetectionPOMState.OK,
+            TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+        ) for receiver, state, level in zip(RECEIVERS, states, levels)
+    ]
+    assert [bytes(telegram) for telegram in telegrams] == expected
+    assert bytes(telegrams[-1]) == expected[-1] and telegrams.tobytes() == b''.join(expected)
+    with pytest.raises(IndexError):
+        telegrams[5]
+
+
+def test_filling_levels_out_of_range_are_rejected():
+    with pytest.raises(ValueError):
+        EulynxTrainDetection.occupancy_status(
+            "IL", "TDS0", TrainDetectionOccupancyState.OCCUPIED, TrainDetectionForceClearAbility.ABLE, 0x10000,
+            TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+        )
+    with pytest.raises(ValueError):
+        batch.occupancy_status_batch(
+            "IL", RECEIVERS, TrainDetectionOccupancyState.OCCUPIED, TrainDetectionForceClearAbility.ABLE,
+            [0, 1, 0x10000, 3, 4], TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA,
+            TrainDetectionChangeTrigger.PASSING_DETECTED
+        )
+
+
+def test_columns_must_match_the_receivers():
+    def statuses(occupancy, level=0):
+        return batch.occupancy_status_batch(
+            "IL", RECEIVERS, occupancy, TrainDetectionForceClearAbility.ABLE, level, TrainDetectionPOMState.OK,
+            TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+        )
+
+    for occupancy in ([TrainDetectionOccupancyState.OCCUPIED], [1, 2], np.ones(6, dtype=np.uint8), np.ones((5, 1))):
+        with pytest.raises(ValueError):
+            statuses(occupancy)
+    with pytest.raises(ValueError):
+        statuses(TrainDetectionOccupancyState.OCCUPIED, [0, 1])
+    # values that do not fit into one byte are not wrapped
+    for occupancy in ([1, 2, 256, 3, 4], np.array([1, 2, -1, 3, 4]), b'\x01\x02', [b'\x01'] * 4 + [b'\x01\x02']):
+        with pytest.raises(ValueError):
+            statuses(occupancy)
+    with pytest.raises(ValueError):
+        batch.move_point_batch("IL", RECEIVERS, 300)
+    assert len(statuses(np.array([1, 2, 1, 2, 1], dtype=np.int64))) == 5
+
+
+def test_command_batches_match_the_encoders():
+    aspects = batch.indicate_signal_aspect_batch("IL", RECEIVERS, EulynxSignalAspect.proceed_clear)
+    assert [bytes(telegram) for telegram in aspects] == [
+        EulynxSignal.indicate_signal_aspect("IL", receiver, EulynxSignalAspect.proceed_clear) for receiver in RECEIVERS
+    ]
+    positions = [PointPosition.left, PointPosition.right] * 2 + [PointPosition.left]
+    points = batch.move_point_batch("IL", RECEIVERS, positions)
+    assert [bytes(telegram) for telegram in points] == [
+        EulynxPoint.move_point("IL", receiver, position) for receiver, position in zip(RECEIVERS, positions)
+    ]
+
+
+def test_overlong_receivers_are_rejected():
+    with pytest.raises(ValueError):
+        batch.move_point_batch("IL", ["W1", "X" * 21], PointPosition.left)
+
+
+def test_decode_batch_groups_by_message_type():
+    statuses = [
+        EulynxTrainDetection.occupancy_status(
+            receiver, "IL", TrainDetectionOccupancyState.OCCUPIED, TrainDetectionForceClearAbility.ABLE, level,
+            TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+        ) for level, receiver in enumerate(RECEIVERS)
+    ]
+    aspect = EulynxSignal.indicate_signal_aspect("S1", "IL", EulynxSignalAspect.stop_danger)
+    # unknown types and telegrams with a wrong length are skipped
+    decoded = batch.decode_batch(statuses + [aspect, statuses[0][:-1], b'\x99\x00\x00' + statuses[0][3:]])
+    assert set(decoded) == {'occupancy_status', 'indicate_signal_aspect'}
+    records = decoded['occupancy_status']
+    assert len(records) == 5
+    assert list(records['filling_level']) == [0, 1, 2, 3, 4]
+    assert list(batch.decode_identifiers(records['sender'])) == [receiver.encode() for receiver in RECEIVERS]
+    assert (records['occupancy_status'] == TrainDetectionOccupancyState.OCCUPIED[0]).all()
+    assert decoded['indicate_signal_aspect']['signal_aspect'][0] == EulynxSignalAspect.stop_danger[0]
+
+
+def test_decode_buffer_reads_an_encoded_batch():
+    telegrams = batch.move_point_batch("IL", RECEIVERS, [PointPosition.left] * 5)
+    records = batch.decode_buffer(telegrams.buffer, 'move_point')
+    assert list(records['point_position']) == [PointPosition.left[0]] * 5
+    assert records['receiver'][4].rstrip(b'_') == b'TDS4'
+    with pytest.raises(ValueError):
+        batch.decode_buffer(telegrams.tobytes()[:-1], 'move_point')
+
+
+def test_decode_batch_skips_short_and_long_telegrams_of_a_group():
+    statuses = [
+        EulynxTrainDetection.occupancy_status(
+            receiver, "IL", TrainDetectionOccupancyState.OCCUPIED, TrainDetectionForceClearAbility.ABLE, level,
+            TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+        ) for level, receiver in enumerate(RECEIVERS)
+    ]
+    # one byte too short and one byte too long, together they are as long as two valid telegrams
+    telegrams = [statuses[0], statuses[1][:-1], statuses[2], statuses[3] + b'\x00', statuses[4]]
+    records = batch.decode_batch(telegrams)['occupancy_status']
+    assert list(records['filling_level']) == [0, 2, 4]
+    assert list(batch.decode_identifiers(records['sender'])) == [b'TDS0', b'TDS2', b'TDS4']
@@ -0,0 +1,63 @@
+import asyncio
+import time
+import warnings
+
+import pytest
+
+from pyLYNX.aio import AsyncPyLYNX
+from pyLYNX.capture import CaptureDirection, CaptureReader, CaptureWriter, replay, replay_async
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalParser
+
+
+def _aspect(receiver: str) -> bytes:
+    return EulynxSignal.indicate_signal_aspect("IL", receiver, EulynxSignalAspect.stop_danger)
+
+
+@pytest.fixture
+def capture(tmp_path):
+    path = str(tmp_path / "traffic.cap")
+    with CaptureWriter(path) as writer:
+        for index in range(5):
+            writer.write(CaptureDirection.inbound, _aspect("S%d" % index), 100.0 + index * 0.01)
+            writer.write(CaptureDirection.outbound, _aspect("T%d" % index), 100.0 + index * 0.01)
+    return path
+
+
+def test_records_are_read_back(capture):
+    with CaptureReader(capture) as reader:
+        records = list(reader)
+        inbound = [bytes(message) for _, _, message in reader.records(CaptureDirection.inbound)]
+    assert len(records) == 10
+    assert records[0][:2] == (100.0, CaptureDirection.inbound)
+    assert inbound == [_aspect("S%d" % index) for index in range(5)]
+
+
+def test_replay_keeps_the_timing(capture):
+    received = []
+    parser = EulynxSignalParser()
+    parser.register_indicate_signal_aspect_callback(lambda sender, receiver, aspect, params: received.append(receiver), ())
+    started = time.monotonic()
+    assert replay(capture, parser, speed=1) == 5
+    assert time.monotonic() - started >= 0.035
+    assert received == ["S%d" % index for index in range(5)]
+
+
+def test_replay_into_async_target(address, capture):
+    async def scenario():
+        srv = AsyncPyLYNX(address)
+        await srv.open()
+        received = []
+        parser = EulynxSignalParser()
+        parser.register_indicate_signal_aspect_callback(lambda sender, receiver, aspect, params: received.append(receiver), ())
+        srv.register_parser(parser)
+        with pytest.raises(TypeError):
+            replay(capture, srv, speed=0, direction=CaptureDirection.outbound)
+        assert await replay_async(capture, srv, speed=0, direction=CaptureDirection.outbound) == 5
+        assert srv.message_queue.qsize() == 5
+        assert await replay_async(capture, srv, speed=0) == 5
+        assert received == ["S%d" % index for index in range(5)]
+        await srv.close(0, timeout=0.1)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        asyncio.run(scenario())
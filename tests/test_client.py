@@ -0,0 +1,187 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import grpc
+import pytest
+
+from pyLYNX._queues import BoundedQueue
+from pyLYNX.pyLYNX import _BridgeClient, _RastaElement, _channel_options, pyLYNX
+from pyLYNX.messages.traindetection import EulynxTrainDetection
+from pyLYNX.proto.rasta_pb2_grpc import RastaServicer, add_RastaServicer_to_server
+
+BACKOFF = (0.05, 0.4)
+
+
+def _filling_level(index: int) -> bytes:
+    return EulynxTrainDetection.update_filling_level("IL", "TDS%d" % index)
+
+
+class BridgeServer(RastaServicer):
+    '''
+    Bridge that runs the grpc server: records the telegrams of every stream. A stream can be ended
+    right away or after it was open for a while.
+    '''
+    def __init__(self, address: str, end_at_once: bool = False, hold: float = None):
+        self.address = address
+        self.end_at_once = end_at_once
+        self.hold = hold
+        self.received = []
+        self.streams = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self) -> None:
+        self._server = grpc.server(ThreadPoolExecutor(8))
+        add_RastaServicer_to_server(self, self._server)
+        self._server.add_insecure_port(self.address)
+        self._server.start()
+
+    def stop(self) -> None:
+        self._server.stop(0).wait()
+
+    def Stream(self, request_iterator, context):
+        with self._lock:
+            self.streams += 1
+        if self.end_at_once:
+            return
+        if self.hold is not None:
+            time.sleep(self.hold)
+            return
+        for request in request_iterator:
+            with self._lock:
+                self.received.append((context.peer(), request.message))
+        return
+        yield
+
+    def messages(self):
+        with self._lock:
+            return [message for _, message in self.received]
+
+    def wait_for(self, messages, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not set(messages) <= set(self.messages()):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+class RecordedBackoff:
+    # stands in for the jitter, always waits the full backoff and records it
+    def __init__(self):
+        self.delays = []
+
+    def uniform(self, low: float, high: float) -> float:
+        self.delays.append(high)
+        return high
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start_server(address: str, **kwargs) -> BridgeServer:
+        server = BridgeServer(address, **kwargs)
+        server.start()
+        started.append(server)
+        return server
+
+    yield start_server
+    for server in started:
+        server.stop()
+
+
+def _element() -> _RastaElement:
+    return _RastaElement(BoundedQueue(queue.Queue()), BoundedQueue(queue.Queue()))
+
+
+def _client(element: _RastaElement, address: str) -> _BridgeClient:
+    return _BridgeClient(element, address, _channel_options(0, 65536, BACKOFF), None, BACKOFF)
+
+
+def _wait(condition, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_backoff_grows_and_resets(address, servers):
+    server = servers(address, end_at_once=True)
+    client = _client(_element(), address)
+    client.random = backoff = RecordedBackoff()
+    client.start()
+    try:
+        assert _wait(lambda: len(backoff.delays) >= 5)
+        assert backoff.delays[:5] == [0.05, 0.1, 0.2, 0.4, 0.4]
+        # a stream that was up for longer than the backoff starts over with the initial backoff
+        server.end_at_once, server.hold = False, 0.6
+        count = len(backoff.delays)
+        assert _wait(lambda: 0.05 in backoff.delays[count:])
+    finally:
+        client.stop()
+        client.join(2)
+    assert not client._thread.is_alive()
+
+
+def test_failed_stream_resends_its_message_on_the_other_stream(address, servers):
+    server = servers(address)
+    element = _element()
+    clients = [_client(element, address) for _ in range(2)]
+    for client in clients:
+        client.start()
+    try:
+        assert _wait(lambda: len(element.streams) == 2)
+        failing, other = element.streams
+        owner = next(client for client in clients if client.connection is failing)
+        item = (_filling_level(1), time.monotonic())
+        # taken from the queue by the router and handed to grpc, which still holds it when the stream fails
+        element.message_queue.put(item)
+        element.message_queue.get()
+        with element._lock:
+            failing.in_flight = item
+        owner.call.cancel()
+        assert server.wait_for([_filling_level(1)])
+        assert failing not in element.streams and other in element.streams
+
+        # the other stream takes the new messages at once, the failed one is reopened
+        element.start_router()
+        element.message_queue.put((_filling_level(2), time.monotonic()))
+        assert server.wait_for([_filling_level(2)])
+        assert server.messages() == [_filling_level(1), _filling_level(2)]
+        assert _wait(lambda: len(element.streams) == 2)
+        element.message_queue.join()
+    finally:
+        for client in clients:
+            client.stop()
+            client.join(2)
+    assert not any(client._thread.is_alive() for client in clients)
+
+
+def test_messages_sent_while_the_bridge_is_down_arrive_after_it_restarted(address, servers):
+    server = servers(address)
+    srv = pyLYNX(bridges=[address], reconnect_backoff=BACKOFF)
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        assert srv.wait_until_connected(timeout=10)
+        srv.send_message(_filling_level(0))
+        assert server.wait_for([_filling_level(0)])
+
+        server.stop()
+        parked = [_filling_level(index) for index in range(1, 20)]
+        for message in parked:
+            srv.send_message(message)
+        time.sleep(0.3)
+        server = servers(address)
+        assert server.wait_for(parked)
+        # the message grpc held when the stream failed may be sent again, the parked ones keep their order
+        assert [message for message in server.messages() if message in parked] == parked
+    finally:
+        srv.close(timeout=2)
+    # the client threads ended, the grpc process exited on its own
+    assert srv.subprocess.exitcode == 0
@@ -0,0 +1,43 @@
+import queue
+
+import pytest
+
+from pyLYNX._outbound import SUPERSEDABLE_MESSAGES, _CoalescingQueue
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect
+from pyLYNX.messages.traindetection import EulynxTrainDetection
+
+
+def _aspect(receiver: str, aspect: bytes = EulynxSignalAspect.stop_danger) -> bytes:
+    return EulynxSignal.indicate_signal_aspect("IL", receiver, aspect)
+
+
+def _poll(index: int) -> bytes:
+    return EulynxTrainDetection.update_filling_level("IL", "TDS%d" % index)
+
+
+def _take(outbound: _CoalescingQueue, count: int):
+    return [outbound.get_nowait() for _ in range(count)]
+
+
+def test_single_lane_is_fifo_and_ends_after_the_items():
+    outbound = _CoalescingQueue()
+    outbound.put_nowait((b'a', 1.0))
+    outbound.put_nowait(None)
+    outbound.put_nowait((b'b', 2.0))
+    assert _take(outbound, 3) == [(b'a', 1.0), (b'b', 2.0), None]
+    with pytest.raises(queue.Empty):
+        outbound.get(True, 0.01)
+
+
+def test_supersede_replaces_in_place():
+    superseded = []
+    outbound = _CoalescingQueue(SUPERSEDABLE_MESSAGES, lambda: superseded.append(1))
+    outbound.put_nowait((_aspect("S1"), 1.0))
+    outbound.put_nowait((_poll(1), 2.0))
+    outbound.put_nowait((_aspect("S2"), 3.0))
+    outbound.put_nowait((_aspect("S1", EulynxSignalAspect.proceed_clear), 4.0))
+    assert outbound.qsize() == 3 and outbound.superseded == 1 and superseded == [1]
+    assert _take(outbound, 3) == [(_aspect("S1", EulynxSignalAspect.proceed_clear), 4.0), (_poll(1), 2.0), (_aspect("S2"), 3.0)]
+    # once sent, the next command to the element is queued again
+    outbound.put_nowait((_aspect("S1"), 5.0))
+    assert outbound.qsize() == 1
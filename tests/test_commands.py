@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from pyLYNX.commands import CommandRejected, _CommandTracker
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionFCMode,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPOMState,
+    TrainDetectionRejectionReason,
+)
+
+
+def _status(element: str, level: int) -> bytes:
+    return EulynxTrainDetection.occupancy_status(
+        element, "IL", TrainDetectionOccupancyState.VACANT, TrainDetectionForceClearAbility.ABLE,
+        level, TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.EIL_COMMAND
+    )
+
+
+def test_response_completes_the_oldest_command_of_the_element():
+    tracker = _CommandTracker()
+    first = tracker.add(EulynxTrainDetection.fc("IL", "TDS1", TrainDetectionFCMode.FCU))
+    second = tracker.add(EulynxTrainDetection.update_filling_level("IL", "TDS1"))
+    other = tracker.add(EulynxTrainDetection.cancel("IL", "TDS2"))
+    assert len(tracker) == 3
+    # a message of another element or type does not match
+    assert not tracker.update(EulynxTrainDetection.cancel("TDS1", "IL"))
+    assert tracker.update(_status("TDS1", 1))
+    assert tracker.update(_status("TDS1", 2))
+    assert first.future.result(0) == _status("TDS1", 1)
+    assert second.future.result(0) == _status("TDS1", 2)
+    assert not other.future.done() and len(tracker) == 1
+
+
+def test_rejection_fails_the_command():
+    tracker = _CommandTracker()
+    pending = tracker.add(EulynxTrainDetection.fc("IL", "TDS1", TrainDetectionFCMode.FCC))
+    tracker.update(EulynxTrainDetection.command_rejected("TDS1", "IL", TrainDetectionRejectionReason.TECHNICAL))
+    with pytest.raises(CommandRejected) as rejected:
+        pending.future.result(0)
+    assert rejected.value.reason == TrainDetectionRejectionReason.TECHNICAL
+
+
+def test_command_times_out():
+    tracker = _CommandTracker()
+    slow = tracker.add(EulynxTrainDetection.cancel("IL", "TDS1"), timeout=0.05)
+    fast = tracker.add(EulynxTrainDetection.cancel("IL", "TDS2"), timeout=5)
+    with pytest.raises(TimeoutError):
+        slow.future.result(2)
+    assert not fast.future.done() and len(tracker) == 1
+    # a late response is not matched to the expired command
+    time.sleep(0.01)
+    assert not tracker.update(_status("TDS1", 1))
+
+
+def test_discarded_command_is_not_completed():
+    tracker = _CommandTracker()
+    pending = tracker.add(EulynxTrainDetection.cancel("IL", "TDS1"))
+    tracker.discard(pending)
+    assert not tracker.update(_status("TDS1", 1))
+    with pytest.raises(ValueError):
+        tracker.add(b'short')
+
+
+def test_completed_commands_do_not_keep_their_deadlines():
+    tracker = _CommandTracker()
+    waiting = tracker.add(EulynxTrainDetection.cancel("IL", "TDS0"), timeout=60)
+    for level in range(1000):
+        pending = tracker.add(EulynxTrainDetection.update_filling_level("IL", "TDS1"), timeout=60)
+        if level % 2:
+            tracker.discard(pending)
+        else:
+            assert tracker.update(_status("TDS1", level))
+        assert len(tracker._deadlines) <= 3
+    assert len(tracker) == 1 and not waiting.future.done()
+    # the command still in flight keeps its deadline
+    assert any(entry[2] is waiting for entry in tracker._deadlines)
@@ -0,0 +1,73 @@
+from pyLYNX.pyLYNX import pyLYNX
+from pyLYNX.messages._generic import EulynxGenericParser
+from pyLYNX.messages.point import EulynxPoint, EulynxPointParser, PointPosition
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalParser
+from pyLYNX.messages.traindetection import EulynxTrainDetection
+
+
+class _CatchAll(EulynxGenericParser):
+    # declares no message types, so it is offered every message
+    def __init__(self, parses: bool = True):
+        self.parses = parses
+        self.messages = []
+
+    def parse_message(self, message: bytes) -> bool:
+        self.messages.append(message)
+        return self.parses
+
+
+def _aspect() -> bytes:
+    return EulynxSignal.indicate_signal_aspect("IL", "S1", EulynxSignalAspect.stop_danger)
+
+
+def test_messages_reach_the_parser_of_their_type(address):
+    srv = pyLYNX(address)
+    signals, points = [], []
+    signal = EulynxSignalParser()
+    signal.register_indicate_signal_aspect_callback(lambda *arguments: signals.append(arguments), ())
+    point = EulynxPointParser()
+    point.register_move_point_callback(lambda *arguments: points.append(arguments), ())
+    default = _CatchAll()
+    srv.register_parser(signal)
+    srv.register_parser(point)
+    srv.register_default_parser(default)
+
+    assert srv.inject_message(_aspect())
+    assert srv.inject_message(EulynxPoint.move_point("IL", "W1", PointPosition.left))
+    assert not srv.inject_message(EulynxTrainDetection.cancel("IL", "TDS1"))
+    assert not srv.inject_message(b'\x30\x01')
+    assert signals == [("IL", "S1", EulynxSignalAspect.stop_danger, ())]
+    assert points == [("IL", "W1", PointPosition.left[0], ())]
+    assert default.messages == [EulynxTrainDetection.cancel("IL", "TDS1"), b'\x30\x01']
+
+
+def test_parsers_keep_the_registration_order(address):
+    srv = pyLYNX(address)
+    first = _CatchAll()
+    signals = []
+    signal = EulynxSignalParser()
+    signal.register_indicate_signal_aspect_callback(lambda *arguments: signals.append(arguments), ())
+    last = _CatchAll()
+    srv.register_parser(first)
+    srv.register_parser(signal)
+    srv.register_parser(last)
+
+    # the parser registered first parses the message, the later ones are not called
+    assert srv.inject_message(_aspect())
+    assert first.messages == [_aspect()] and not signals and not last.messages
+
+    first.parses = False
+    assert srv.inject_message(_aspect())
+    assert len(signals) == 1 and not last.messages
+
+
+def test_parser_without_types_registered_last_gets_the_unparsed_messages(address):
+    srv = pyLYNX(address)
+    signal = EulynxSignalParser()
+    catch_all = _CatchAll(parses=False)
+    srv.register_parser(signal)
+    srv.register_parser(catch_all)
+    # without callbacks the signal parser still accepts its message types
+    assert srv.inject_message(_aspect())
+    assert not srv.inject_message(EulynxTrainDetection.drfc("IL", "TDS1"))
+    assert catch_all.messages == [EulynxTrainDetection.drfc("IL", "TDS1")]
@@ -0,0 +1,115 @@
+import random
+import threading
+import time
+
+import pytest
+
+from pyLYNX._executor import _ShardedExecutor
+from pyLYNX.messages.traindetection import EulynxTrainDetection
+
+
+def _message(element: int, sequence: int) -> bytes:
+    return EulynxTrainDetection.update_filling_level("TDS%d" % element, "IL") + sequence.to_bytes(4, 'big')
+
+
+def _decode(message: bytes):
+    return message[3:23], int.from_bytes(message[-4:], 'big')
+
+
+def test_messages_of_an_element_stay_in_order():
+    processed = {}
+    lock = threading.Lock()
+    jitter = random.Random(0)
+
+    def process(message: bytes) -> None:
+        if jitter.random() < 0.05:
+            time.sleep(0.001)
+        element, sequence = _decode(message)
+        with lock:
+            processed.setdefault(element, []).append(sequence)
+
+    executor = _ShardedExecutor(process, workers=4, capacity=16)
+    executor.start()
+    for sequence in range(200):
+        for element in range(8):
+            executor.submit(_message(element, sequence))
+    executor.join()
+    executor.stop()
+    assert len(processed) == 8
+    assert all(sequences == list(range(200)) for sequences in processed.values())
+    assert sum(shard['processed'] for shard in executor.snapshot()) == 1600
+
+
+def test_elements_of_other_shards_are_not_delayed():
+    started = threading.Event()
+    release = threading.Event()
+    processed = []
+
+    def process(message: bytes) -> None:
+        element, _ = _decode(message)
+        if element.startswith(b'TDS0'):
+            started.set()
+            release.wait(5)
+        processed.append(element)
+
+    executor = _ShardedExecutor(process, workers=8)
+    executor.start()
+    executor.submit(_message(0, 0))
+    assert started.wait(5)
+    slow = hash(_message(0, 0)[3:23]) % 8
+    other = next(element for element in range(1, 50) if hash(_message(element, 0)[3:23]) % 8 != slow)
+    executor.submit(_message(other, 0))
+    deadline = time.monotonic() + 5
+    while not processed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert processed == [_message(other, 0)[3:23]]
+    release.set()
+    executor.stop()
+
+
+def test_failing_callback_does_not_stop_the_shard():
+    processed = []
+
+    def process(message: bytes) -> None:
+        _, sequence = _decode(message)
+        if sequence == 1:
+            raise RuntimeError("callback failed")
+        processed.append(sequence)
+
+    executor = _ShardedExecutor(process, workers=1)
+    executor.start()
+    for sequence in range(3):
+        executor.submit(_message(0, sequence))
+    executor.stop()
+    assert processed == [0, 2]
+    assert executor.snapshot()[0]['errors'] == 1
+
+
+def test_stop_processes_the_queued_messages():
+    processed = []
+    executor = _ShardedExecutor(lambda message: (time.sleep(0.001), processed.append(message)), workers=2)
+    executor.start()
+    for sequence in range(50):
+        executor.submit(_message(sequence % 4, sequence))
+    executor.stop()
+    assert len(processed) == 50
+
+
+def test_full_shard_drops_with_drop_newest():
+    release = threading.Event()
+    executor = _ShardedExecutor(lambda message: release.wait(5), workers=1, capacity=2, policy="drop_newest")
+    executor.start()
+    for sequence in range(10):
+        executor.submit(_message(0, sequence))
+    assert executor.snapshot()[0]['drops'] >= 7
+    release.set()
+    executor.stop()
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        _ShardedExecutor(lambda message: None, workers=0)
+    with pytest.raises(ValueError):
+        _ShardedExecutor(lambda message: None, key="payload")
+    with pytest.raises(ValueError):
+        _ShardedExecutor(lambda message: None, policy="raise")
@@ -0,0 +1,76 @@
+import pytest
+
+from pyLYNX.messages._generic import EulynxGeneric, EulynxGenericHandle
+from pyLYNX.messages.point import EulynxPoint, EulynxPointHandle, PointPosition
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalHandle, EulynxSignalLuminosity
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    EulynxTrainDetectionHandle,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionFCMode,
+    TrainDetectionForceClearAbility,
+    TrainDetectionMessageType,
+    TrainDetectionOccupancyState,
+    TrainDetectionPOMState,
+)
+
+
+def test_handles_match_the_classmethods():
+    signal = EulynxSignalHandle("IL", "S1")
+    assert signal.indicate_signal_aspect(EulynxSignalAspect.proceed_clear) == \
+        EulynxSignal.indicate_signal_aspect("IL", "S1", EulynxSignalAspect.proceed_clear)
+    assert signal.set_luminosity(EulynxSignalLuminosity.night) == EulynxSignal.set_luminosity("IL", "S1", EulynxSignalLuminosity.night)
+    assert EulynxPointHandle("IL", "W1").move_point(PointPosition.left) == EulynxPoint.move_point("IL", "W1", PointPosition.left)
+
+    section = EulynxTrainDetectionHandle("IL", "TDS1")
+    assert section.fc(TrainDetectionFCMode.FCP) == EulynxTrainDetection.fc("IL", "TDS1", TrainDetectionFCMode.FCP)
+    assert section.update_filling_level() == EulynxTrainDetection.update_filling_level("IL", "TDS1")
+    assert section.cancel() == EulynxTrainDetection.cancel("IL", "TDS1")
+    assert section.drfc() == EulynxTrainDetection.drfc("IL", "TDS1")
+    arguments = (
+        TrainDetectionOccupancyState.OCCUPIED, TrainDetectionForceClearAbility.ABLE, 700,
+        TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+    )
+    assert section.occupancy_status(*arguments) == EulynxTrainDetection.occupancy_status("IL", "TDS1", *arguments)
+
+    generic = EulynxGenericHandle("IL", "E1")
+    assert generic.pdi_version_check() == EulynxGeneric.pdi_version_check("IL", "E1")
+    assert generic.initialization_request() == EulynxGeneric.initialization_request("IL", "E1")
+
+
+def test_repeated_commands_return_the_memoized_telegram():
+    signal = EulynxSignalHandle("IL", "S1")
+    first = signal.indicate_signal_aspect(EulynxSignalAspect.stop_danger)
+    assert signal.indicate_signal_aspect(EulynxSignalAspect.stop_danger) is first
+    assert signal.indicate_signal_aspect(EulynxSignalAspect.proceed_clear) is not first
+
+    section = EulynxTrainDetectionHandle("IL", "TDS1")
+    assert section.update_filling_level() is section.update_filling_level()
+    header = section.header(TrainDetectionMessageType.fc)
+    assert section.header(TrainDetectionMessageType.fc) is header
+    assert len(header) == 43 and section.fc(TrainDetectionFCMode.FCU).startswith(header)
+
+
+def test_protocol_type_can_be_overridden():
+    handle = EulynxGenericHandle("IL", "E1", protocol_type=EulynxSignal.protocol_type)
+    assert handle.pdi_version_check()[:1] == EulynxSignal.protocol_type
+    assert EulynxSignalHandle("IL", "S1").protocol_type == EulynxSignal.protocol_type
+
+
+def test_arguments_must_fit_their_fields():
+    signal = EulynxSignalHandle("IL", "S1")
+    section = EulynxTrainDetectionHandle("IL", "TDS1")
+    for encode in (
+        lambda: signal.indicate_signal_aspect(b'\x01\x02'),
+        lambda: signal.set_luminosity(b''),
+        lambda: EulynxSignal.indicate_signal_aspect("IL", "S1", b'\x01\x02'),
+        lambda: section.fc(b'\x01\x02'),
+        lambda: section.occupancy_status(b'\x01\x02', b'\x01', 0, b'\x01', b'\x01', b'\x01'),
+        lambda: section.occupancy_status(b'\x01', b'\x01', 0x10000, b'\x01', b'\x01', b'\x01'),
+        lambda: section.tdp_status(b'\x01', b''),
+    ):
+        with pytest.raises(ValueError):
+            encode()
+    # rejected arguments are not memoized
+    assert len(signal.indicate_signal_aspect(EulynxSignalAspect.stop_danger)) == 61
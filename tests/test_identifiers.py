@@ -0,0 +1,51 @@
+import pytest
+
+from pyLYNX.messages._identifiers import IDENTIFIER_LENGTH, IdentifierTable
+
+
+def test_identifiers_are_padded_and_stripped():
+    table = IdentifierTable()
+    assert table.encode("99N1") == b"99N1" + b"_" * 16
+    assert table.encode("X" * IDENTIFIER_LENGTH) == b"X" * IDENTIFIER_LENGTH
+    # one byte per character in ISO-8859-1
+    assert table.encode("Weiche\xc4") == "Weiche\xc4".encode("iso8859-1") + b"_" * 13
+    assert table.decode(b"S1" + b"_" * 18) == "S1"
+
+
+def test_round_trips_return_interned_identifiers():
+    table = IdentifierTable()
+    field = table.encode("TDS1")
+    name = table.decode(bytes(field))
+    assert name == "TDS1" and table.decode(b"TDS1" + b"_" * 16) is name
+    assert table.encode(name) is field
+    # fields seen first on the wire are interned as well
+    decoded = table.decode(b"TDS2" + b"_" * 16)
+    assert table.decode(b"TDS2" + b"_" * 16) is decoded
+    assert table.encode("TDS2") == b"TDS2" + b"_" * 16
+
+    assert [table.id_of("TDS1"), table.id_of("TDS2"), table.id(b"TDS3" + b"_" * 16)] == [0, 1, 2]
+    assert table.names == ["TDS1", "TDS2", "TDS3"] and table.fields[2] == b"TDS3" + b"_" * 16
+    assert len(table) == 3
+
+
+def test_identifiers_longer_than_20_bytes_are_rejected():
+    table = IdentifierTable()
+    with pytest.raises(ValueError):
+        table.encode("X" * (IDENTIFIER_LENGTH + 1))
+    with pytest.raises(ValueError):
+        table.id_of("X" * (IDENTIFIER_LENGTH + 1))
+    assert len(table) == 0
+
+
+def test_full_table_still_encodes_and_decodes():
+    table = IdentifierTable()
+    for index in range(65536):
+        assert table.id_of("E%d" % index) == index
+    assert len(table) == table.limit == 65536
+
+    # beyond the limit identifiers are encoded and decoded, but get no id and are not added
+    assert table.encode("NEW") == b"NEW" + b"_" * 17
+    assert table.decode(b"OTHER" + b"_" * 15) == "OTHER"
+    assert table.id_of("NEW") is None and table.id(b"OTHER" + b"_" * 15) is None
+    assert len(table) == 65536
+    assert table.id_of("E65535") == 65535
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from pyLYNX.pyLYNX import pyLYNX
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalParser
+
+
+def _aspects(count: int):
+    return [
+        EulynxSignal.indicate_signal_aspect("S%d" % index, "IL", EulynxSignalAspect.stop_danger) for index in range(count)
+    ]
+
+
+def _parser(received: list) -> EulynxSignalParser:
+    parser = EulynxSignalParser()
+    parser.register_indicate_signal_aspect_callback(lambda sender, *arguments: received.append(sender), ())
+    return parser
+
+
+@pytest.mark.parametrize("transport", ("queue", "shared_memory"))
+def test_wait_for_messages_parses_what_arrived(address, bridges, transport):
+    srv = pyLYNX(address, transport=transport)
+    received = []
+    srv.register_parser(_parser(received))
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        started = time.monotonic()
+        assert srv.wait_for_messages(0.2) == 0
+        assert time.monotonic() - started >= 0.2
+
+        bridges(address, _aspects(50))
+        deadline = time.monotonic() + 10
+        while len(received) < 50 and time.monotonic() < deadline:
+            srv.wait_for_messages(1)
+        assert received == ["S%d" % index for index in range(50)]
+        assert srv.parse_messages() == 0
+        assert srv.dispatch_latency.snapshot()['count'] == 50
+    finally:
+        srv.close(timeout=2)
+
+
+@pytest.mark.parametrize("transport", ("queue", "shared_memory"))
+def test_dispatcher_calls_the_parsers_in_the_background(address, bridges, transport):
+    srv = pyLYNX(address, transport=transport)
+    received = []
+    done = threading.Event()
+    srv.register_parser(_parser(received))
+    srv.register_default_parser(_Done(done))
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        srv.start_dispatcher()
+        srv.start_dispatcher()
+        bridges(address, _aspects(20) + [EulynxSignal.initialization_request("S1", "IL")])
+        assert done.wait(10)
+        assert received == ["S%d" % index for index in range(20)]
+        srv.stop_dispatcher()
+        assert srv._dispatcher is None
+    finally:
+        srv.close(timeout=2)
+
+
+class _Done:
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def parse_message(self, message: bytes) -> bool:
+        self.event.set()
+        return True
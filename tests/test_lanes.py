@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from pyLYNX._outbound import SUPERSEDABLE_MESSAGES, _CoalescingQueue
+from pyLYNX.pyLYNX import pyLYNX
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect
+from pyLYNX.messages.traindetection import EulynxTrainDetection
+
+
+def _aspect(receiver: str, aspect: bytes = EulynxSignalAspect.stop_danger) -> bytes:
+    return EulynxSignal.indicate_signal_aspect("IL", receiver, aspect)
+
+
+def _poll(index: int) -> bytes:
+    return EulynxTrainDetection.update_filling_level("IL", "TDS%d" % index)
+
+
+def _take(outbound: _CoalescingQueue, count: int):
+    return [outbound.get_nowait() for _ in range(count)]
+
+
+def test_strict_lanes_serve_the_lowest_lane_first():
+    outbound = _CoalescingQueue(lanes=3)
+    for index in range(3):
+        outbound.put_nowait((b'bulk%d' % index, 0.0, 2))
+    outbound.put_nowait((b'normal', 0.0, 1))
+    outbound.put_nowait((b'urgent', 0.0, 0))
+    assert outbound.lane_sizes() == [1, 1, 3]
+    assert [item[0] for item in _take(outbound, 5)] == [b'urgent', b'normal', b'bulk0', b'bulk1', b'bulk2']
+
+
+def test_weighted_lanes_share_in_proportion():
+    outbound = _CoalescingQueue(lanes=3, weights=(5, 3, 1))
+    for lane in range(3):
+        for index in range(100):
+            outbound.put_nowait((b'%d' % index, 0.0, lane))
+    served = [item[2] for item in _take(outbound, 18)]
+    assert [served.count(lane) for lane in range(3)] == [10, 6, 2]
+    # every lane keeps its own order
+    assert [item[0] for item in _take(outbound, 282) if item[2] == 2][:3] == [b'2', b'3', b'4']
+
+
+def test_weighted_lanes_serve_a_single_non_empty_lane():
+    outbound = _CoalescingQueue(lanes=2, weights=(10, 1))
+    outbound.put_nowait((b'a', 0.0, 1))
+    outbound.put_nowait((b'b', 0.0, 1))
+    assert [item[0] for item in _take(outbound, 2)] == [b'a', b'b']
+
+
+def test_supersede_moves_the_command_to_its_new_lane():
+    outbound = _CoalescingQueue(SUPERSEDABLE_MESSAGES, lanes=2)
+    outbound.put_nowait((_poll(1), 1.0, 1))
+    outbound.put_nowait((_aspect("S1"), 2.0, 1))
+    outbound.put_nowait((_aspect("S1", EulynxSignalAspect.proceed_clear), 3.0, 0))
+    assert outbound.lane_sizes() == [1, 1]
+    assert _take(outbound, 2) == [(_aspect("S1", EulynxSignalAspect.proceed_clear), 3.0, 0), (_poll(1), 1.0, 1)]
+
+
+def test_drop_oldest_takes_the_lowest_lane():
+    outbound = _CoalescingQueue(SUPERSEDABLE_MESSAGES, lanes=2)
+    outbound.put_nowait((_aspect("S1"), 1.0, 0))
+    outbound.put_nowait((_aspect("S2"), 2.0, 1))
+    outbound.put_nowait((_poll(1), 3.0, 1))
+    assert outbound.drop_oldest()
+    assert _take(outbound, 2) == [(_aspect("S1"), 1.0, 0), (_poll(1), 3.0, 1)]
+    # the dropped command no longer supersedes
+    outbound.put_nowait((_aspect("S2"), 4.0, 1))
+    assert outbound.qsize() == 1
+    assert outbound.drop_oldest() and not outbound.drop_oldest()
+
+
+@pytest.mark.parametrize("transport", ("queue", "shared_memory"))
+def test_urgent_lane_overtakes_bulk_traffic(address, bridges, transport):
+    srv = pyLYNX(address, transport=transport, priorities=True)
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        # queued before the bridge connects, so grpc can not have taken any of the bulk messages yet
+        for index in range(2000):
+            srv.send_message(_poll(index))
+        srv.send_message(_aspect("S1"))
+        srv.send_message(_poll(9999), priority=0)
+        time.sleep(0.2)
+        bridge = bridges(address)
+        assert bridge.wait_for(2002, 30)
+        assert bridge.received[:2] == [_aspect("S1"), _poll(9999)]
+        assert bridge.received[2:] == [_poll(index) for index in range(2000)]
+        lanes = srv.lane_metrics()
+        assert [lane['count'] for lane in lanes] == [2, 2000]
+        text = srv.prometheus_metrics()
+        assert 'pylynx_lane_queue_seconds_count{lane="0"} 2' in text
+        assert 'pylynx_lane_queue_seconds_count{lane="1"} 2000' in text
+        assert text.count('# TYPE pylynx_lane_queue_seconds histogram') == 1
+    finally:
+        srv.close(timeout=2)
+
+
+def test_send_message_checks_the_priority(address):
+    srv = pyLYNX(address, lanes=2)
+    with pytest.raises(ValueError):
+        srv.send_message(_poll(1), priority=2)
+    with pytest.raises(ValueError):
+        pyLYNX(address, lanes=2, lane_weights=(1,))
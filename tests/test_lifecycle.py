@@ -0,0 +1,85 @@
+import time
+
+import grpc
+import pytest
+
+from pyLYNX.pyLYNX import pyLYNX
+from pyLYNX.messages.traindetection import EulynxTrainDetection
+
+TRANSPORTS = ("queue", "shared_memory")
+
+
+def _filling_level(index: int) -> bytes:
+    return EulynxTrainDetection.update_filling_level("IL", "TDS%d" % index)
+
+
+def _accepts_connections(address: str) -> bool:
+    with grpc.insecure_channel(address) as channel:
+        try:
+            grpc.channel_ready_future(channel).result(timeout=2)
+        except grpc.FutureTimeoutError:
+            return False
+    return True
+
+
+def test_serving_means_the_port_accepts_connections(address):
+    srv = pyLYNX(address)
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        assert _accepts_connections(address)
+    finally:
+        srv.close(timeout=2)
+    assert not srv.subprocess.is_alive()
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_reopen_the_same_instance(address, bridges, transport):
+    srv = pyLYNX(address, transport=transport)
+    srv.open()
+    assert srv.wait_until_serving(10)
+    bridge = bridges(address)
+    assert srv.wait_until_connected(timeout=10)
+    srv.close(timeout=2)
+    assert bridge.wait_closed()
+
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        assert srv.subprocess.is_alive()
+        bridge = bridges(address)
+        assert srv.wait_until_connected(timeout=10)
+        srv.send_message(_filling_level(1))
+        assert bridge.wait_for(1)
+        assert bridge.received == [_filling_level(1)]
+    finally:
+        srv.close(timeout=2)
+
+
+def test_close_sends_everything_without_timeout(address, bridges):
+    srv = pyLYNX(address)
+    srv.open()
+    assert srv.wait_until_serving(10)
+    bridge = bridges(address)
+    assert srv.wait_until_connected(timeout=10)
+    for index in range(100):
+        srv.send_message(_filling_level(index))
+    srv.close()
+    assert bridge.wait_closed()
+    assert bridge.received == [_filling_level(index) for index in range(100)]
+
+
+def test_close_keeps_its_deadline_with_a_slow_bridge(address, bridges):
+    srv = pyLYNX(address)
+    srv.open()
+    assert srv.wait_until_serving(10)
+    bridge = bridges(address, delay=0.5)
+    assert srv.wait_until_connected(timeout=10)
+    for index in range(50):
+        srv.send_message(_filling_level(index))
+    started = time.monotonic()
+    srv.close(timeout=1)
+    # the stop grace ends with the deadline, the process gets one more second before it is killed
+    assert time.monotonic() - started < 2.5
+    assert not srv.subprocess.is_alive()
+    assert len(bridge.received) < 50
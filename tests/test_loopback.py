@@ -0,0 +1,45 @@
+import time
+
+from pyLYNX.loopback import LoopbackBridge, _Responder
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalParser
+from pyLYNX.pyLYNX import pyLYNX
+
+
+def test_bridge_echoes_telegrams_with_swapped_identifiers(address):
+    received = []
+    parser = EulynxSignalParser()
+    parser.register_indicate_signal_aspect_callback(lambda sender, receiver, aspect, params: received.append((sender, receiver)), ())
+    srv = pyLYNX(address)
+    srv.register_parser(parser)
+    srv.open()
+    bridge = LoopbackBridge(address, rate=0)
+    try:
+        assert srv.wait_until_serving(10)
+        bridge.start()
+        assert srv.wait_until_connected(timeout=10)
+        srv.send_message(EulynxSignal.indicate_signal_aspect("IL", "S1", EulynxSignalAspect.proceed_clear))
+        deadline = time.monotonic() + 10
+        while not received and time.monotonic() < deadline:
+            srv.wait_for_messages(0.1)
+        assert received == [("S1", "IL")]
+    finally:
+        bridge.stop()
+        srv.close(timeout=2)
+    assert bridge.report()['echoed'] == 1
+
+
+def test_round_trips_against_a_responding_server(address):
+    srv = pyLYNX(address)
+    srv.register_default_parser(_Responder(srv))
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        srv.start_dispatcher()
+        report = LoopbackBridge(address, streams=2, rate=200, elements=10, echo=False).run(1.0)
+    finally:
+        srv.close(timeout=2)
+    assert report['sent'] > 100
+    # the telegrams still in flight when the bridge stopped are not answered
+    assert report['received'] > report['sent'] - 50
+    assert report['round_trip']['count'] == report['received']
+    assert report['echoed'] == 0
@@ -0,0 +1,103 @@
+import re
+import time
+
+from pyLYNX.pyLYNX import pyLYNX
+from pyLYNX.metrics import LatencyHistogram
+from pyLYNX.messages.traindetection import EulynxTrainDetection
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+
+
+def _filling_level(index: int) -> bytes:
+    return EulynxTrainDetection.update_filling_level("IL", "TDS%d" % index)
+
+
+def _parse(text: str):
+    # families with their type and samples, every sample must belong to a family declared before it
+    families = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            current = line.split(' ')[2]
+            families[current] = {'help': line.split(' ', 3)[3], 'type': None, 'samples': []}
+        elif line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert name == current
+            families[name]['type'] = kind
+        else:
+            name, labels, value = SAMPLE.match(line).groups()
+            assert current is not None and name.startswith(current)
+            labels = dict(re.findall(r'(\w+)="([^"]*)"', labels or ''))
+            families[current]['samples'].append((name, labels, float(value)))
+    return families
+
+
+def _buckets(family, name: str, **labels):
+    return [
+        (float(sample_labels['le']), value) for sample_name, sample_labels, value in family['samples']
+        if sample_name == name + '_bucket' and all(sample_labels.get(key) == value_ for key, value_ in labels.items())
+    ]
+
+
+def test_histogram_exports_few_cumulative_buckets():
+    histogram = LatencyHistogram()
+    for latency in (0.00001, 0.00001, 0.0005, 0.002, 0.25):
+        histogram.record(latency)
+    empty = _parse('\n'.join(LatencyHistogram().prometheus('latency', description='Test latency')))['latency']
+    family = _parse('\n'.join(histogram.prometheus('latency', description='Test latency')))['latency']
+    assert family['type'] == 'histogram' and family['help'] == 'Test latency'
+
+    buckets = _buckets(family, 'latency')
+    # the same series whatever was recorded, in increasing order and ending with +Inf
+    assert [le for le, _ in buckets] == [le for le, _ in _buckets(empty, 'latency')]
+    assert [le for le, _ in buckets] == sorted(le for le, _ in buckets) and buckets[-1][0] == float('inf')
+    counts = [count for _, count in buckets]
+    assert counts == sorted(counts) and counts[-1] == 5
+    # powers of two from 64 us, the fine buckets are summed up into them
+    assert buckets[0][0] == 0.000064 and all(high == 2 * low for (low, _), (high, _) in zip(buckets, buckets[1:-1]))
+
+    def below(seconds: float) -> float:
+        return max(count for le, count in buckets if le <= seconds)
+
+    assert below(0.000064) == 2 and below(0.000256) == 2 and below(0.000512) == 3
+    assert below(0.001024) == 3 and below(0.002048) == 4 and below(0.131072) == 4 and below(0.262144) == 5
+    samples = {name: value for name, _, value in family['samples'] if not name.endswith('_bucket')}
+    assert samples == {'latency_count': 5, 'latency_sum': 0.25252}
+
+
+def test_tracing_and_the_exposition_format(address, bridges):
+    srv = pyLYNX(address, tracing=True)
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        bridge = bridges(address, [_filling_level(index) for index in range(10)])
+        assert srv.wait_until_connected(timeout=10)
+        for index in range(20):
+            srv.send_message(_filling_level(index))
+        assert bridge.wait_for(20)
+        parsed = 0
+        deadline = time.monotonic() + 10
+        while parsed < 10 and time.monotonic() < deadline:
+            parsed += srv.wait_for_messages(0.1)
+        assert parsed == 10
+
+        latency = srv.latency_metrics()
+        assert latency['inbound_queue']['count'] == 10 and latency['callback']['count'] == 10
+        # the last message may still be held by grpc, it is counted once it was yielded
+        assert latency['outbound_total']['count'] >= 19
+        assert all(stats['p50'] <= stats['p99'] <= stats['max'] for stats in latency.values())
+
+        text = srv.prometheus_metrics()
+        # a few buckets per histogram, cheap enough to scrape with tracing left on
+        assert len(text.splitlines()) <= 150
+        families = _parse(text)
+        assert families['pylynx_outbound_queue_depth']['type'] == 'gauge'
+        assert families['pylynx_inbound_queue_drops']['type'] == 'counter'
+        assert families['pylynx_outbound_queue_capacity']['samples'] == [('pylynx_outbound_queue_capacity', {}, 0.0)]
+        assert all(family['help'] and family['type'] for family in families.values())
+        inbound = families['pylynx_inbound_queue_seconds']
+        assert inbound['type'] == 'histogram'
+        assert _buckets(inbound, 'pylynx_inbound_queue_seconds')[-1] == (float('inf'), 10)
+        assert ('pylynx_inbound_queue_seconds_count', {}, 10) in inbound['samples']
+    finally:
+        srv.close(timeout=2)
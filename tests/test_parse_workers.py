@@ -0,0 +1,129 @@
+import collections
+import time
+
+import pytest
+
+from pyLYNX.pyLYNX import pyLYNX
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    EulynxTrainDetectionParser,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPOMState,
+)
+
+ELEMENTS = 8
+MESSAGES = 800
+MESSAGES_PER_ELEMENT = 40000
+TRANSPORTS = ("queue", "shared_memory")
+
+
+def _status(element: int, level: int) -> bytes:
+    return EulynxTrainDetection.occupancy_status(
+        "TDS%d" % element, "IL", TrainDetectionOccupancyState.OCCUPIED, TrainDetectionForceClearAbility.ABLE,
+        level, TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+    )
+
+
+def _report(sender, receiver, occupancy, force_clear, level, pom, disturbance, trigger, params) -> None:
+    params[0].emit((sender, level))
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_workers_parse_in_order_and_stop(address, bridges, transport):
+    state = pytest.importorskip("pyLYNX.state")
+    srv = pyLYNX(address, transport=transport, parse_workers=2)
+    parser = EulynxTrainDetectionParser()
+    parser.register_occupancy_status_callback(_report, (srv,))
+    srv.register_parser(parser)
+    store = state.ElementStateStore()
+    srv.register_state_store(store)
+    results = collections.defaultdict(list)
+    srv.register_result_callback(lambda result, params: results[result[0]].append(result[1]), ())
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        srv.start_parse_workers(batch_size=32)
+        workers = list(srv._parse_workers)
+        bridges(address, [_status(index % ELEMENTS, index // ELEMENTS) for index in range(MESSAGES)])
+        parsed = 0
+        deadline = time.monotonic() + 20
+        while parsed < MESSAGES and time.monotonic() < deadline:
+            parsed += srv.wait_for_messages(0.1)
+        assert parsed == MESSAGES
+        assert sorted(results) == sorted("TDS%d" % element for element in range(ELEMENTS))
+        assert all(levels == list(range(MESSAGES // ELEMENTS)) for levels in results.values())
+        assert store.value("TDS3", "filling_level") == MESSAGES // ELEMENTS - 1
+    finally:
+        srv.close(timeout=2)
+    assert srv._parse_workers == []
+    assert [worker.exitcode for worker in workers] == [0, 0]
+
+
+def test_parse_workers_must_be_configured(address):
+    srv = pyLYNX(address)
+    with pytest.raises(ValueError):
+        srv.start_parse_workers()
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_stop_workers_while_a_bridge_is_sending(address, bridges, transport):
+    srv = pyLYNX(address, transport=transport, parse_workers=1)
+    parser = EulynxTrainDetectionParser()
+    parser.register_occupancy_status_callback(_report, (srv,))
+    srv.register_parser(parser)
+    levels = []
+    srv.register_result_callback(lambda result, params: levels.append(result[1]), ())
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        srv.start_parse_workers(batch_size=32)
+        worker = srv._parse_workers[0]
+        bridges(address, [_status(0, index % 0x10000) for index in range(20000)])
+        time.sleep(0.3)
+        started = time.monotonic()
+        srv.stop_parse_workers()
+        assert time.monotonic() - started < 5
+        assert worker.exitcode == 0
+        # the messages received from then on are parsed in this process, none is lost
+        parsed = 0
+        deadline = time.monotonic() + 30
+        while parsed < 20000 and time.monotonic() < deadline:
+            parsed += srv.wait_for_messages(0.1)
+        assert parsed == 20000
+        assert levels == list(range(20000))
+    finally:
+        srv.close(timeout=2)
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_restart_workers_while_bridges_are_sending(address, bridges, transport):
+    srv = pyLYNX(address, transport=transport, parse_workers=2)
+    parser = EulynxTrainDetectionParser()
+    parser.register_occupancy_status_callback(_report, (srv,))
+    srv.register_parser(parser)
+    results = collections.defaultdict(list)
+    srv.register_result_callback(lambda result, params: results[result[0]].append(result[1]), ())
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        srv.start_parse_workers(batch_size=16)
+        # several streams put into the shards while the workers are stopped and started again
+        for element in range(4):
+            bridges(address, [_status(element, index) for index in range(MESSAGES_PER_ELEMENT)])
+        for _ in range(40):
+            workers = list(srv._parse_workers)
+            srv.stop_parse_workers()
+            assert [worker.exitcode for worker in workers] == [0, 0]
+            srv.start_parse_workers(batch_size=16)
+        parsed = 0
+        deadline = time.monotonic() + 30
+        while parsed < 4 * MESSAGES_PER_ELEMENT and time.monotonic() < deadline:
+            parsed += srv.wait_for_messages(0.1)
+        assert parsed == 4 * MESSAGES_PER_ELEMENT
+        assert sorted(results) == ["TDS%d" % element for element in range(4)]
+        assert all(levels == list(range(MESSAGES_PER_ELEMENT)) for levels in results.values())
+    finally:
+        srv.close(timeout=2)
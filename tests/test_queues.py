@@ -0,0 +1,221 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+import pytest
+
+from pyLYNX._queues import QUEUE_POLICIES, BoundedQueue
+from pyLYNX._ring import SharedRingQueue
+from pyLYNX.pyLYNX import pyLYNX
+from pyLYNX.messages.traindetection import EulynxTrainDetection
+
+TRANSPORTS = ("queue", "shared_memory")
+CAPACITY = 3
+
+
+@pytest.fixture(params=TRANSPORTS + ("local",))
+def bounded(request):
+    created = []
+
+    def create(policy: str) -> BoundedQueue:
+        if request.param == "queue":
+            wrapped = multiprocessing.JoinableQueue(CAPACITY)
+        elif request.param == "local":
+            # a queue of this process, e.g. a shard of the callback executor
+            wrapped = queue.Queue(CAPACITY)
+        else:
+            wrapped = SharedRingQueue(CAPACITY, 64, policy == "drop_oldest")
+        bounded_queue = BoundedQueue(wrapped, CAPACITY, policy, timeout=0.05)
+        created.append(bounded_queue)
+        return bounded_queue
+
+    yield create
+    for bounded_queue in created:
+        bounded_queue.close()
+
+
+def _items(count: int):
+    return [(b'%d' % index, float(index)) for index in range(count)]
+
+
+def _drain(bounded_queue: BoundedQueue):
+    items = []
+    while True:
+        try:
+            items.append(bounded_queue.get(True, 0.2))
+        except queue.Empty:
+            return items
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BoundedQueue(multiprocessing.JoinableQueue(), 1, "drop_everything")
+
+
+@pytest.mark.parametrize("policy", ("block", "raise"))
+def test_full_queue_raises(bounded, policy):
+    bounded_queue = bounded(policy)
+    for item in _items(CAPACITY):
+        bounded_queue.put(item)
+    with pytest.raises(queue.Full):
+        bounded_queue.put((b'x', 9.0))
+    assert bounded_queue.snapshot() == {'depth': CAPACITY, 'high_water': CAPACITY, 'drops': 1, 'capacity': CAPACITY}
+    assert _drain(bounded_queue) == _items(CAPACITY)
+
+
+def test_block_waits_for_space(bounded):
+    bounded_queue = bounded("block")
+    bounded_queue.timeout = 5
+    for item in _items(CAPACITY):
+        bounded_queue.put(item)
+    # a local queue is only shared between threads
+    local = isinstance(bounded_queue.queue, queue.Queue)
+    consumer = (threading.Thread if local else multiprocessing.Process)(target=_take_one_later, args=(bounded_queue,))
+    consumer.start()
+    bounded_queue.put((b'x', 9.0))
+    consumer.join(5)
+    assert bounded_queue.drops == 0
+
+
+def _take_one_later(bounded_queue: BoundedQueue) -> None:
+    time.sleep(0.1)
+    bounded_queue.get(True, 5)
+
+
+def test_drop_newest(bounded):
+    bounded_queue = bounded("drop_newest")
+    for item in _items(5):
+        bounded_queue.put(item)
+    assert bounded_queue.drops == 2
+    assert _drain(bounded_queue) == _items(CAPACITY)
+
+
+def test_drop_oldest(bounded):
+    bounded_queue = bounded("drop_oldest")
+    for item in _items(5):
+        bounded_queue.put(item)
+    assert bounded_queue.drops == 2
+    assert bounded_queue.high_water == CAPACITY
+    assert _drain(bounded_queue) == _items(5)[2:]
+
+
+def _filling_level(index: int) -> bytes:
+    return EulynxTrainDetection.update_filling_level("IL", "TDS%d" % index)
+
+
+def _index(message: bytes) -> int:
+    return int(message[23:43].rstrip(b'_')[3:])
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+@pytest.mark.parametrize("policy", QUEUE_POLICIES)
+def test_outbound_capacity_bounds_the_backlog(address, bridges, transport, policy):
+    # without a bridge the messages are parked in the grpc process, they count against the capacity as well
+    capacity = 10
+    srv = pyLYNX(address, transport=transport, outbound_capacity=capacity, outbound_policy=policy, block_timeout=0.05)
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        accepted = 0
+        for index in range(200):
+            try:
+                srv.send_message(_filling_level(index))
+            except queue.Full:
+                break
+            accepted += 1
+        time.sleep(0.2)
+        metrics = srv.queue_metrics()['outbound']
+        if policy in ("block", "raise"):
+            assert capacity <= accepted <= 2 * capacity + 1
+        else:
+            assert accepted == 200
+            assert metrics['drops'] >= 200 - 2 * capacity - 1
+        assert metrics['depth'] <= capacity
+
+        bridge = bridges(address)
+        assert srv.wait_until_connected(timeout=10)
+        srv.close(timeout=5)
+        assert bridge.wait_closed()
+        indices = [_index(message) for message in bridge.received]
+        assert indices == sorted(indices)
+        assert len(indices) <= 2 * capacity + 1
+        if policy == "drop_oldest":
+            assert indices[-1] == 199
+        elif policy == "drop_newest":
+            assert indices[0] == 0
+        else:
+            assert indices == list(range(accepted))
+    finally:
+        if srv.subprocess.is_alive():
+            srv.close(timeout=1)
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+def test_drop_oldest_while_the_servicer_waits(address, transport):
+    # the router blocks in get on the empty queue while send_message discards the oldest message
+    srv = pyLYNX(address, transport=transport, outbound_capacity=50, outbound_policy="drop_oldest")
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        time.sleep(0.1)
+        started = time.monotonic()
+        for index in range(300):
+            srv.send_message(_filling_level(index))
+        assert time.monotonic() - started < 5
+        assert srv.queue_metrics()['outbound']['drops'] > 0
+    finally:
+        srv.close(timeout=1)
+
+
+def test_timed_out_close_leaves_no_thread_on_the_ring(address):
+    errors = []
+    previous = threading.excepthook
+    threading.excepthook = lambda args: errors.append(args.exc_value)
+    try:
+        srv = pyLYNX(address, transport="shared_memory")
+        srv.open()
+        assert srv.wait_until_serving(10)
+        srv.send_message(_filling_level(0))
+        started = time.monotonic()
+        srv.close(timeout=0.2)
+        assert time.monotonic() - started < 5
+        time.sleep(0.1)
+    finally:
+        threading.excepthook = previous
+    assert errors == []
+
+
+def test_depth_does_not_need_qsize(monkeypatch):
+    # multiprocessing queues raise NotImplementedError from qsize on macOS
+    wrapped = multiprocessing.JoinableQueue(CAPACITY)
+    monkeypatch.setattr(wrapped, "qsize", _not_implemented)
+    bounded_queue = BoundedQueue(wrapped, CAPACITY, "drop_oldest")
+    for item in _items(5):
+        bounded_queue.put(item)
+    assert bounded_queue.snapshot() == {'depth': CAPACITY, 'high_water': CAPACITY, 'drops': 2, 'capacity': CAPACITY}
+    bounded_queue.get()
+    bounded_queue.put_marker(None)
+    bounded_queue.get()
+    assert bounded_queue.qsize() == CAPACITY - 1
+
+
+def _not_implemented() -> int:
+    raise NotImplementedError()
+
+
+@pytest.mark.parametrize("transport", TRANSPORTS)
+@pytest.mark.parametrize("policy", ("block", "raise"))
+def test_full_inbound_queue_keeps_reading_the_stream(address, bridges, transport, policy):
+    srv = pyLYNX(address, transport=transport, inbound_capacity=5, inbound_policy=policy, block_timeout=0.01)
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        bridges(address, [_filling_level(index) for index in range(20)])
+        deadline = time.monotonic() + 10
+        while srv.queue_metrics()['inbound']['drops'] < 15 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert srv.queue_metrics()['inbound']['drops'] == 15
+        assert srv.parse_messages() == 5
+    finally:
+        srv.close(timeout=2)
@@ -0,0 +1,121 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+import pytest
+
+from pyLYNX._ring import SharedRingQueue
+
+
+@pytest.fixture
+def ring():
+    rings = []
+
+    def create(*args, **kwargs) -> SharedRingQueue:
+        created = SharedRingQueue(*args, **kwargs)
+        rings.append(created)
+        return created
+
+    yield create
+    for created in rings:
+        created.close()
+
+
+def test_wraparound_keeps_order(ring):
+    queue_ = ring(capacity=4, slot_size=64)
+    expected = []
+    received = []
+    for round_ in range(10):
+        for index in range(3):
+            item = (bytes([round_, index]) * (round_ + 1), round_ + index / 10)
+            queue_.put(item)
+            expected.append(item)
+        for _ in range(3):
+            received.append(queue_.get_nowait())
+    assert received == expected
+    assert queue_.empty()
+
+
+def test_full_and_empty(ring):
+    queue_ = ring(capacity=2, slot_size=32)
+    with pytest.raises(queue.Empty):
+        queue_.get_nowait()
+    started = time.monotonic()
+    with pytest.raises(queue.Empty):
+        queue_.get(True, 0.05)
+    assert time.monotonic() - started >= 0.05
+
+    queue_.put_nowait((b'a', 1.0))
+    queue_.put_nowait((b'b', 2.0))
+    assert queue_.full() and queue_.qsize() == 2
+    with pytest.raises(queue.Full):
+        queue_.put_nowait((b'c', 3.0))
+    with pytest.raises(queue.Full):
+        queue_.put((b'c', 3.0), True, 0.05)
+    assert queue_.get_nowait() == (b'a', 1.0)
+    queue_.put_nowait((b'c', 3.0))
+    assert [queue_.get_nowait() for _ in range(2)] == [(b'b', 2.0), (b'c', 3.0)]
+
+
+def test_oversized_message_is_rejected(ring):
+    queue_ = ring(capacity=2, slot_size=32)
+    queue_.put((b'x' * 16, 0.0))
+    with pytest.raises(ValueError):
+        queue_.put((b'x' * 17, 0.0))
+
+
+def test_lanes_are_kept(ring):
+    queue_ = ring(capacity=4, slot_size=64, lanes=True)
+    queue_.put((b'urgent', 1.0, 0))
+    queue_.put((b'bulk', 2.0, 7))
+    assert queue_.get() == (b'urgent', 1.0, 0)
+    assert queue_.get() == (b'bulk', 2.0, 7)
+
+
+def test_join_with_timeout(ring):
+    queue_ = ring(capacity=4, slot_size=32)
+    assert queue_.join(0)
+    queue_.put((b'a', 0.0))
+    queue_.get()
+    assert not queue_.join(0.05)
+    queue_.task_done()
+    assert queue_.join(0.05)
+    with pytest.raises(ValueError):
+        queue_.task_done()
+
+
+def test_blocked_shared_consumer_does_not_block_other_consumers(ring):
+    queue_ = ring(capacity=4, slot_size=32, shared_consumer=True)
+    received = []
+    consumer = threading.Thread(target=lambda: received.append(queue_.get(True, 5)))
+    consumer.start()
+    time.sleep(0.05)
+    # the blocked get must not hold the shared lock, e.g. for the producer discarding the oldest item
+    started = time.monotonic()
+    with pytest.raises(queue.Empty):
+        queue_.get_nowait()
+    assert time.monotonic() - started < 0.5
+    queue_.put((b'a', 1.0))
+    consumer.join(5)
+    assert received == [(b'a', 1.0)]
+
+
+def _consume(queue_: SharedRingQueue, count: int, results) -> None:
+    for _ in range(count):
+        message, timestamp = queue_.get(True, 10)
+        results.put((message, timestamp))
+        queue_.task_done()
+
+
+def test_items_cross_processes(ring):
+    queue_ = ring(capacity=8, slot_size=64)
+    results = multiprocessing.Queue()
+    consumer = multiprocessing.Process(target=_consume, args=(queue_, 100, results))
+    consumer.start()
+    for index in range(100):
+        queue_.put((b'%d' % index, float(index)))
+    received = [results.get(True, 10) for _ in range(100)]
+    consumer.join(10)
+    assert received == [(b'%d' % index, float(index)) for index in range(100)]
+    assert queue_.join(5)
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from pyLYNX.pyLYNX import pyLYNX
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect
+
+
+def _aspect(receiver: str) -> bytes:
+    return EulynxSignal.indicate_signal_aspect("IL", receiver, EulynxSignalAspect.stop_danger)
+
+
+@pytest.mark.parametrize("transport", ("queue", "shared_memory"))
+def test_messages_go_to_the_bridge_serving_the_receiver(address, bridges, transport):
+    srv = pyLYNX(address, transport=transport)
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        first = bridges(address, [EulynxSignal.initialization_request("S1", "IL")])
+        assert srv.wait_until_connected("S1", 10)
+        second = bridges(address, [EulynxSignal.initialization_request("S2", "IL")])
+        assert srv.wait_until_connected("S2", 10)
+
+        for _ in range(3):
+            srv.send_message(_aspect("S1"))
+            srv.send_message(_aspect("S2"))
+        assert first.wait_for(3) and second.wait_for(3)
+        assert first.received == [_aspect("S1")] * 3
+        assert second.received == [_aspect("S2")] * 3
+
+        # a receiver without route goes to the first connected bridge
+        srv.send_message(_aspect("S3"))
+        assert first.wait_for(4)
+        assert first.received[-1] == _aspect("S3") and len(second.received) == 3
+
+        # a sender that moves to another bridge takes its route along
+        third = bridges(address, [EulynxSignal.initialization_request("S1", "IL")])
+        assert _wait_for_route(srv, third, "S1")
+    finally:
+        srv.close(timeout=2)
+
+
+def _wait_for_route(srv: pyLYNX, bridge, receiver: str) -> bool:
+    # the route changes when the grpc process read the message of the new bridge, probe until it did
+    for _ in range(100):
+        srv.send_message(_aspect(receiver))
+        if bridge.wait_for(1, 0.1):
+            return True
+    return False
+
+
+def test_configured_routes_are_used_before_any_message(address, bridges):
+    srv = pyLYNX(address, routes={"S9": "127.0.0.1"})
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        bridge = bridges(address)
+        assert srv.wait_until_connected("S9", 10)
+        srv.send_message(_aspect("S9"))
+        assert bridge.wait_for(1)
+    finally:
+        srv.close(timeout=2)
+
+
+def test_route_events_do_not_pile_up(address, bridges):
+    # nobody calls wait_until_connected while the senders arrive, their events must still be read
+    srv = pyLYNX(address)
+    srv.open()
+    try:
+        assert srv.wait_until_serving(10)
+        bridges(address, [EulynxSignal.initialization_request("S%d" % index, "IL") for index in range(200)])
+        deadline = time.monotonic() + 10
+        while len(srv._routed) < 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(srv._routed) == 200
+        assert srv._events.empty()
+        assert srv.wait_until_connected("S199", 0)
+    finally:
+        srv.close(timeout=2)
+    assert not srv._event_reader.is_alive()
@@ -0,0 +1,189 @@
+import threading
+import time
+
+import pytest
+
+from pyLYNX.scheduler import _MAX_DELAY, TelegramScheduler, _Job, _TimerWheel
+
+
+@pytest.mark.parametrize("delay", (1, 2, 255, 256, 257, 1000, 16383, 16384, 70000, 1048577))
+def test_wheel_fires_at_the_expiry(delay):
+    wheel = _TimerWheel()
+    for _ in range(123):
+        wheel.advance()
+    job = _Job("job", b'', 1)
+    job.expires = wheel.now + delay
+    wheel.add(job)
+    fired = None
+    for _ in range(delay):
+        if wheel.advance():
+            fired = wheel.now
+            break
+    assert fired == job.expires
+
+
+@pytest.mark.parametrize("expires", (256, 512, 16384, 1 << 20))
+def test_wheel_fires_a_cascaded_job_at_the_tick_of_the_cascade(expires):
+    # the expiry is a multiple of a whole turn of the first level, the job arrives with the cascade
+    wheel = _TimerWheel()
+    job = _Job("job", b'', 1)
+    job.expires = expires
+    wheel.add(job)
+    fired = None
+    for _ in range(expires):
+        if wheel.advance():
+            fired = wheel.now
+            break
+    assert fired == expires
+
+
+def test_phase_of_a_job_256_ticks_away_stays():
+    scheduler = TelegramScheduler(None, tick=0.01)
+    # phase 0 sends at the next tick, the first send is exactly 256 ticks away
+    scheduler.register("a", b'a', period=1.28, phase=2.55)
+    fired = _fire(scheduler, 1000)
+    assert [tick for tick, _ in fired] == [256, 384, 512, 640, 768, 896]
+
+
+def test_wheel_keeps_the_expiry_of_delays_beyond_its_range():
+    wheel = _TimerWheel()
+    job = _Job("job", b'', 1)
+    job.expires = 2 * _MAX_DELAY
+    wheel.add(job)
+    # parked in the last level and placed again when that slot cascades
+    assert any(job in slot for slot in wheel._levels[-1])
+    assert job.expires == 2 * _MAX_DELAY
+
+
+def test_removed_job_does_not_fire():
+    wheel = _TimerWheel()
+    job = _Job("job", b'', 1)
+    job.expires = 300
+    wheel.add(job)
+    wheel.remove(job)
+    assert not any(wheel.advance() for _ in range(400))
+
+
+def _fire(scheduler: TelegramScheduler, ticks: int):
+    # drive the scheduler tick by tick without its thread
+    fired = []
+    scheduler.send = lambda telegram: fired.append((scheduler._wheel.now, telegram))
+    for _ in range(ticks):
+        scheduler._fire()
+    return fired
+
+
+def test_jobs_fire_every_period():
+    scheduler = TelegramScheduler(None, tick=0.01)
+    scheduler.register("a", b'a', period=0.05, phase=0)
+    scheduler.register("b", lambda: b'b', period=0.1, phase=0.02)
+    fired = _fire(scheduler, 100)
+    assert [tick for tick, telegram in fired if telegram == b'a'] == list(range(1, 101, 5))
+    assert [tick for tick, telegram in fired if telegram == b'b'] == list(range(3, 101, 10))
+
+
+def test_jobs_of_a_period_are_staggered():
+    scheduler = TelegramScheduler(None, tick=0.01)
+    for index in range(50):
+        scheduler.register(index, b'%d' % index, period=1.0)
+    fired = _fire(scheduler, 100)
+    assert len(fired) == 50
+    per_tenth = [sum(1 for tick, _ in fired if start <= tick < start + 10) for start in range(1, 101, 10)]
+    assert max(per_tenth) - min(per_tenth) <= 2
+
+
+def _phases(fired, period: int):
+    return sorted(tick % period for tick, _ in fired)
+
+
+def test_staggered_phases_are_released():
+    scheduler = TelegramScheduler(None, tick=0.01)
+    for index in range(20):
+        scheduler.register(("first", index), b'', period=1.0)
+    phases = _phases(_fire(scheduler, 100), 100)
+    assert len(set(phases)) == 20
+    for index in range(20):
+        scheduler.cancel(("first", index))
+    # the new jobs take the phases of the cancelled ones instead of crowding between the remaining ones
+    for index in range(20):
+        scheduler.register(("second", index), b'', period=1.0)
+    assert _phases(_fire(scheduler, 100), 100) == phases
+
+    # a job with a new period is staggered against the jobs of that period
+    fresh = TelegramScheduler(None, tick=0.01)
+    for index in range(20):
+        fresh.register(index, b'', period=0.5)
+    for index in range(20):
+        scheduler.change_period(("second", index), 0.5)
+    assert _phases(_fire(scheduler, 100)[-20:], 50) == _phases(_fire(fresh, 50), 50)
+
+
+def test_job_cancelled_or_replaced_in_its_tick_is_not_sent():
+    scheduler = TelegramScheduler(None, tick=0.01)
+    sent = []
+
+    def send(telegram: bytes) -> None:
+        sent.append(telegram)
+        if telegram == b'a':
+            scheduler.cancel("b")
+            scheduler.register("c", b'new', period=1.0, phase=0.5)
+
+    for key in ("a", "b", "c"):
+        scheduler.register(key, key.encode(), period=1.0, phase=0)
+    scheduler.send = send
+    scheduler._fire()
+    assert sent == [b'a']
+
+
+def test_cancel_change_period_and_replace():
+    scheduler = TelegramScheduler(None, tick=0.01)
+    scheduler.register("a", b'a', period=0.1, phase=0)
+    scheduler.register("b", b'b', period=0.1, phase=0)
+    assert scheduler.cancel("b") and not scheduler.cancel("b")
+    assert "a" in scheduler and "b" not in scheduler and len(scheduler) == 1
+    fired = _fire(scheduler, 10)
+    assert fired == [(1, b'a')]
+    assert scheduler.change_period("a", 0.02)
+    assert not scheduler.change_period("missing", 0.02)
+    fired = _fire(scheduler, 10)
+    # the next send would have been one new period after the last one, that time has passed
+    assert [tick for tick, _ in fired] == [11, 13, 15, 17, 19]
+    scheduler.register("a", b'c', period=0.05, phase=0)
+    assert len(scheduler) == 1 and _fire(scheduler, 5)[0] == (21, b'c')
+
+
+def test_failing_send_does_not_stop_the_other_jobs():
+    scheduler = TelegramScheduler(None, tick=0.01)
+    scheduler.register("bad", lambda: 1 / 0, period=0.01, phase=0)
+    scheduler.register("good", b'good', period=0.01, phase=0)
+    sent = []
+    scheduler.send = sent.append
+    for _ in range(3):
+        scheduler._fire()
+    assert sent == [b'good'] * 3
+    assert scheduler.snapshot()['errors'] == 3 and scheduler.snapshot()['sent'] == 3
+
+
+def test_thread_sends_until_stopped():
+    sent = []
+    lock = threading.Lock()
+
+    def send(telegram: bytes) -> None:
+        with lock:
+            sent.append(telegram)
+
+    scheduler = TelegramScheduler(send, tick=0.005)
+    scheduler.register("a", b'a', period=0.02, phase=0)
+    scheduler.start()
+    time.sleep(0.3)
+    scheduler.stop()
+    count = len(sent)
+    assert 5 <= count <= 20
+    time.sleep(0.05)
+    assert len(sent) == count
+    assert scheduler.snapshot()['jobs'] == 1
+
+
+def test_tick_must_be_positive():
+    with pytest.raises(ValueError):
+        TelegramScheduler(None, tick=0)
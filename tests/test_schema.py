@@ -0,0 +1,61 @@
+import pytest
+
+from pyLYNX.messages._generic import EulynxGeneric, EulynxGenericHandle
+from pyLYNX.messages.schema import FC, GENERIC_SCHEMAS, OCCUPANCY_STATUS, SCHEMAS, SCHEMAS_BY_KEY, SIGNAL_PROTOCOL
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalHandle
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionFCMode,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPOMState,
+)
+
+
+def _status() -> bytes:
+    return EulynxTrainDetection.occupancy_status(
+        "TDS1", "IL", TrainDetectionOccupancyState.OCCUPIED, TrainDetectionForceClearAbility.ABLE,
+        513, TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+    )
+
+
+def test_schema_round_trip():
+    telegram = FC.encode("IL", "TDS1", TrainDetectionFCMode.FCC)
+    assert telegram == EulynxTrainDetection.fc("IL", "TDS1", TrainDetectionFCMode.FCC)
+    assert FC.validate(telegram) and len(telegram) == FC.length
+    assert FC.decode(telegram) == ("IL", "TDS1", 2)
+    buffer = bytearray(2 * FC.length)
+    assert FC.encode_into(buffer, FC.length, "IL", "TDS1", TrainDetectionFCMode.FCC) == 2 * FC.length
+    assert bytes(buffer[FC.length:]) == telegram
+    assert OCCUPANCY_STATUS.decode(_status())[4] == 513
+    with pytest.raises(ValueError):
+        FC.decode(telegram[:-1])
+
+
+def test_message_types_are_unique():
+    assert len(SCHEMAS_BY_KEY) == len(SCHEMAS)
+
+
+@pytest.mark.parametrize("encode", (
+    lambda identifier: FC.encode("IL", identifier, TrainDetectionFCMode.FCU),
+    lambda identifier: EulynxTrainDetection.cancel("IL", identifier),
+    lambda identifier: EulynxSignalHandle("IL", identifier).indicate_signal_aspect(EulynxSignalAspect.stop_danger),
+))
+def test_overlong_identifiers_are_rejected(encode):
+    assert encode("X" * 20)[23:43] == b"X" * 20
+    with pytest.raises(ValueError):
+        encode("X" * 21)
+
+
+def test_generic_messages_are_declared_per_protocol_type():
+    check = GENERIC_SCHEMAS[SIGNAL_PROTOCOL].pdi_version_check
+    assert check in SCHEMAS and SCHEMAS_BY_KEY[bytes.fromhex('302400')] is check
+    telegram = EulynxSignal.pdi_version_check("IL", "S1")
+    assert telegram == bytes.fromhex('302400') + b"IL__________________S1__________________" + b'\x01'
+    assert check.validate(telegram) and check.decode(telegram) == ("IL", "S1")
+    assert EulynxSignalHandle("IL", "S1").pdi_version_check() == telegram
+    assert EulynxGeneric.initialization_request("IL", "E1")[:3] == bytes.fromhex('002100')
+    # a protocol type without declaration still gets the generic messages
+    assert EulynxGenericHandle("IL", "E1", bytes.fromhex('50')).initialization_request()[:3] == bytes.fromhex('502100')
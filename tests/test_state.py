@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from pyLYNX.messages._identifiers import IdentifierTable
+from pyLYNX.messages.point import EulynxPoint, PointPosition
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPOMState,
+)
+from pyLYNX.state import ElementStateStore
+
+
+def _status(section: str, occupancy: bytes, level: int = 0) -> bytes:
+    return EulynxTrainDetection.occupancy_status(
+        section, "IL", occupancy, TrainDetectionForceClearAbility.ABLE, level,
+        TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+    )
+
+
+def test_where_finds_the_elements_with_a_value():
+    store = ElementStateStore(identifiers=IdentifierTable())
+    store.update(_status("TDS1", TrainDetectionOccupancyState.OCCUPIED))
+    store.update(_status("TDS2", TrainDetectionOccupancyState.VACANT))
+    store.update(_status("TDS3", TrainDetectionOccupancyState.OCCUPIED))
+    # a point only reports its position, it has no occupancy
+    store.update(EulynxPoint.move_point("IL", "W1", PointPosition.left))
+
+    occupied = store.where("occupancy_status", TrainDetectionOccupancyState.OCCUPIED)
+    assert store.elements(occupied) == ["TDS1", "TDS3"]
+    assert store.elements(store.where("occupancy_status", TrainDetectionOccupancyState.OCCUPIED, negate=True)) == ["TDS2"]
+    assert store.elements(store.where("point_position", PointPosition.left[0])) == ["W1"]
+    assert store.value("TDS2", "occupancy_status") == TrainDetectionOccupancyState.VACANT[0]
+    assert store.get("TDS9") is None and len(store) == 4
+
+
+def test_where_only_finds_elements_that_reported_the_column():
+    store = ElementStateStore(identifiers=IdentifierTable())
+    store.update(_status("TDS1", TrainDetectionOccupancyState.OCCUPIED, level=0xFFFF))
+    store.update(_status("TDS2", TrainDetectionOccupancyState.OCCUPIED, level=3))
+    store.update(EulynxPoint.move_point("IL", "W1", PointPosition.left))
+
+    # the point has the default filling level, but never reported one
+    assert store.elements(store.where("filling_level", 0xFFFF)) == ["TDS1"]
+    assert store.elements(store.where("filling_level", 3, negate=True)) == ["TDS1"]
+    assert store.elements(store.where("point_position", 0, negate=True)) == ["W1"]
+
+
+def test_changed_since_only_reports_changes():
+    store = ElementStateStore(identifiers=IdentifierTable())
+    store.update(_status("TDS1", TrainDetectionOccupancyState.VACANT))
+    store.update(_status("TDS2", TrainDetectionOccupancyState.VACANT))
+    time.sleep(0.01)
+    since = time.time()
+    time.sleep(0.01)
+
+    assert list(store.changed_since(since)) == []
+    # the same state again only refreshes "updated"
+    store.update(_status("TDS1", TrainDetectionOccupancyState.VACANT))
+    assert list(store.changed_since(since)) == []
+    assert store.value("TDS1", "updated") > since > store.value("TDS1", "changed")
+    store.update(_status("TDS2", TrainDetectionOccupancyState.OCCUPIED))
+    assert store.elements(store.changed_since(since)) == ["TDS2"]
+    # a later change of the first element is reported as well, in the order of the elements
+    store.update(_status("TDS1", TrainDetectionOccupancyState.VACANT, level=3))
+    assert store.elements(store.changed_since(since)) == ["TDS1", "TDS2"]
+
+
+def test_the_arrays_grow_for_new_identifiers():
+    identifiers = IdentifierTable()
+    store = ElementStateStore(capacity=2, identifiers=identifiers)
+    sections = ["TDS%d" % index for index in range(9)]
+    for level, section in enumerate(sections):
+        assert store.update(_status(section, TrainDetectionOccupancyState.OCCUPIED, level))
+
+    assert len(store) == 9 and len(identifiers) == 9
+    assert len(store.columns['filling_level']) >= 9
+    assert [store.value(section, "filling_level") for section in sections] == list(range(9))
+    assert [store.index(section) for section in sections] == [identifiers.id_of(section) for section in sections]
+    assert store.elements(store.where("occupancy_status", TrainDetectionOccupancyState.OCCUPIED)) == sections
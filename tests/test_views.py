@@ -0,0 +1,49 @@
+import pytest
+
+from pyLYNX.messages.signal import EulynxSignal, EulynxSignalAspect, EulynxSignalParser
+from pyLYNX.messages.traindetection import (
+    EulynxTrainDetection,
+    EulynxTrainDetectionParser,
+    TrainDetectionChangeTrigger,
+    TrainDetectionDisturbanceState,
+    TrainDetectionForceClearAbility,
+    TrainDetectionOccupancyState,
+    TrainDetectionPOMState,
+)
+
+
+def _status() -> bytes:
+    return EulynxTrainDetection.occupancy_status(
+        "TDS1", "IL", TrainDetectionOccupancyState.OCCUPIED, TrainDetectionForceClearAbility.ABLE,
+        513, TrainDetectionPOMState.OK, TrainDetectionDisturbanceState.NA, TrainDetectionChangeTrigger.PASSING_DETECTED
+    )
+
+
+@pytest.mark.parametrize("views", (False, True))
+def test_truncated_telegrams_are_not_parsed(views):
+    received = []
+    parser = EulynxTrainDetectionParser(views=views)
+    parser.register_occupancy_status_callback(lambda *arguments: received.append(arguments), ())
+    telegram = _status()
+    assert parser.parse_message(telegram)
+    assert not parser.parse_message(telegram[:-1])
+    assert not parser.parse_message(telegram[:45])
+    assert len(received) == 1
+
+    signal = EulynxSignalParser(views=views)
+    signal.register_indicate_signal_aspect_callback(lambda *arguments: received.append(arguments), ())
+    aspect = EulynxSignal.indicate_signal_aspect("IL", "S1", EulynxSignalAspect.stop_danger)
+    assert signal.parse_message(aspect)
+    assert not signal.parse_message(aspect[:44])
+    assert len(received) == 2
+
+
+def test_view_fields():
+    received = []
+    parser = EulynxTrainDetectionParser(views=True)
+    parser.register_occupancy_status_callback(lambda view, params: received.append(view), ())
+    parser.parse_message(_status())
+    view = received[0]
+    assert view.sender == "TDS1" and view.receiver == "IL"
+    assert view.occupancy_status == TrainDetectionOccupancyState.OCCUPIED
+    assert view.filling_level == 513